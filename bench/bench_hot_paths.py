@@ -0,0 +1,194 @@
+""" Micro benchmarks of the order path hot spots, stdlib only (no network, no UI)
+
+    python bench/bench_hot_paths.py                 # run & print
+    python bench/bench_hot_paths.py --save          # run & record bench/baseline.json
+    python bench/bench_hot_paths.py --compare       # run & exit 1 if a case got slower than the baseline
+
+Numbers depend on the machine, record the baseline on the machine used to compare.
+"""
+import argparse
+import json
+import os
+import platform
+import random
+import sys
+import timeit
+
+from typing import Callable
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "terminal"))
+
+from command_compiler import ShortcutCache, compile_cmd, remove_space_and_split
+from exchanges.bybit.bybit_tools import build_scale_orders, build_single_tp_order, filter_postion_with_zero_size
+from exchanges.bybit.position_store import PositionStore
+from exchanges.bybit.symbol_catalogue import parse_symbol_filters
+from terminal_title import TerminalTitle
+
+BASELINE_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "baseline.json")
+# Slower than baseline * (1 + tolerance) is a regression
+DEFAULT_TOLERANCE = 0.25
+REPEAT = 5
+# A case over the tolerance is measured again this many times before being reported, filters out noisy neighbours
+CONFIRM_RUNS = 2
+
+BTC_FILTERS = parse_symbol_filters({
+    "name": "BTCUSDT",
+    "price_scale": 2,
+    "price_filter": {"min_price": "0.50", "max_price": "1999999", "tick_size": "0.50"},
+    "lot_size_filter": {"max_trading_qty": 100, "min_trading_qty": 0.001, "qty_step": 0.001,
+                        "post_only_max_trading_qty": "1000"}
+})  # type: ignore
+
+
+def _position(symbol: str, size: float, side: str = "Buy", position_idx: int = 0) -> dict:
+    return {"symbol": symbol, "side": side, "size": size, "entry_price": 20000.0, "position_idx": position_idx}
+
+
+def _case_scale_orders(number_of_orders: int) -> Callable[[], object]:
+    positions = [_position("BTCUSDT", 2.5)]
+    return lambda: build_scale_orders(positions, BTC_FILTERS, number_of_orders, 0.1, 1.5)  # type: ignore
+
+
+def _case_single_tp() -> Callable[[], object]:
+    positions = [_position("BTCUSDT", 2.5)]
+    return lambda: build_single_tp_order(positions, BTC_FILTERS, 0.4)  # type: ignore
+
+
+def _case_filter_zero_size(number_of_positions: int) -> Callable[[], object]:
+    rng = random.Random(0)
+    positions = [_position(f"SYM{i}USDT", rng.choice([0.0, 1.0])) for i in range(number_of_positions)]
+    return lambda: filter_postion_with_zero_size(positions)  # type: ignore
+
+
+def _case_split() -> Callable[[], object]:
+    return lambda: remove_space_and_split("  scale   10 0.1    0.5 ")
+
+
+def _case_compile(cmd: str) -> Callable[[], object]:
+    return lambda: compile_cmd(cmd)
+
+
+def _case_resolve_shortcut(number_of_shortcuts: int, hit: bool) -> Callable[[], object]:
+    """ Submitted cmd to compiled cmd, a hit is a dict lookup, a miss compiles the typed cmd """
+    shortcuts = ShortcutCache({f"sc{i}": f"scale {i % 50 + 1} 0.1 0.5" for i in range(number_of_shortcuts)})
+    raw_cmd = f"sc{number_of_shortcuts // 2}" if hit else "ticker btcusdt"
+    return lambda: shortcuts.resolve(raw_cmd)
+
+
+def _case_position_delta(number_of_positions: int) -> Callable[[], object]:
+    """ One position of a big book changes size, what the position stream callback does on a fill """
+    store = PositionStore()
+    store.apply([_position(f"SYM{i}USDT", 1.0) for i in range(number_of_positions)])  # type: ignore
+    sizes = [1.0, 2.0]
+    counter = [0]
+
+    def run() -> object:
+        counter[0] += 1
+        return store.apply([_position("SYM0USDT", sizes[counter[0] % 2])])  # type: ignore
+    return run
+
+
+def _case_position_snapshot(number_of_positions: int) -> Callable[[], object]:
+    """ Whole book sent at once, ie after a reconnect """
+    store = PositionStore()
+    books = [[_position(f"SYM{i}USDT", size) for i in range(number_of_positions)] for size in (1.0, 2.0)]
+    counter = [0]
+
+    def run() -> object:
+        counter[0] += 1
+        return store.apply(books[counter[0] % 2])  # type: ignore
+    return run
+
+
+def _case_terminal_title(price_changes: bool) -> Callable[[], object]:
+    """ Title update on every exchange update, most of them change nothing shown """
+    title = TerminalTitle("Bybit", lambda symbol: BTC_FILTERS["price_scale"])
+    position = _position("BTCUSDT", 2.5)
+    prices = ["20000.5", "20001"] if price_changes else ["20000.5", "20000.5"]
+    counter = [0]
+
+    def run() -> object:
+        counter[0] += 1
+        return title.update("BTCUSDT", prices[counter[0] % 2], position, True)  # type: ignore
+    return run
+
+
+CASES: dict[str, Callable[[], Callable[[], object]]] = {
+    **{f"build_scale_orders[{n}]": (lambda n=n: _case_scale_orders(n)) for n in (2, 10, 50, 100, 500, 1000)},
+    "build_single_tp_order": _case_single_tp,
+    "filter_postion_with_zero_size[10000]": lambda: _case_filter_zero_size(10000),
+    "remove_space_and_split": _case_split,
+    "compile_cmd[scale]": lambda: _case_compile("scale 10 0.1 0.5"),
+    "resolve_shortcut[200 shortcuts, hit]": lambda: _case_resolve_shortcut(200, True),
+    "resolve_shortcut[200 shortcuts, miss]": lambda: _case_resolve_shortcut(200, False),
+    "position_store_delta[500 positions]": lambda: _case_position_delta(500),
+    "position_store_snapshot[500 positions]": lambda: _case_position_snapshot(500),
+    "terminal_title_update[unchanged]": lambda: _case_terminal_title(False),
+    "terminal_title_update[new price]": lambda: _case_terminal_title(True),
+}
+
+
+def measure(fn: Callable[[], object]) -> float:
+    """ Best time per call in microseconds, over REPEAT runs of at least 0.2s each (timeit autorange) """
+    timer = timeit.Timer(fn)
+    number, _ = timer.autorange()
+    return min(timer.repeat(repeat=REPEAT, number=number)) / number * 1e6
+
+
+def run(selected: str | None) -> dict[str, float]:
+    results: dict[str, float] = {}
+    for name, make_case in CASES.items():
+        if selected and selected not in name:
+            continue
+        results[name] = measure(make_case())
+        print(f"{name:<45} {results[name]:>12.3f} us")
+    return results
+
+
+def compare(results: dict[str, float], baseline: dict[str, float], tolerance: float) -> bool:
+    """ Print current vs baseline, return False if any case regressed """
+    ok = True
+    print(f"\n{'case':<45} {'baseline':>12} {'current':>12} {'ratio':>7}")
+    for name, current_us in results.items():
+        baseline_us = baseline.get(name)
+        if baseline_us is None:
+            print(f"{name:<45} {'-':>12} {current_us:>12.3f}     new")
+            continue
+        for _ in range(CONFIRM_RUNS):
+            if current_us / baseline_us <= 1 + tolerance:
+                break
+            current_us = min(current_us, measure(CASES[name]()))
+        ratio = current_us / baseline_us
+        regressed = ratio > 1 + tolerance
+        ok = ok and not regressed
+        print(f"{name:<45} {baseline_us:>12.3f} {current_us:>12.3f} {ratio:>7.2f}{'  REGRESSION' if regressed else ''}")
+    return ok
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Benchmark the order path hot spots")
+    parser.add_argument("--save", action="store_true", help=f"record the results as baseline in {BASELINE_PATH}")
+    parser.add_argument("--compare", action="store_true", help="compare with the baseline, exit 1 on regression")
+    parser.add_argument("--tolerance", type=float, default=DEFAULT_TOLERANCE,
+                        help=f"allowed slowdown before failing (default {DEFAULT_TOLERANCE} = +25%%)")
+    parser.add_argument("-k", dest="selected", default=None, help="only run cases containing this text")
+    args = parser.parse_args()
+
+    results = run(args.selected)
+
+    if args.save:
+        with open(BASELINE_PATH, "w") as f:
+            json.dump({"python": platform.python_version(), "machine": platform.machine(),
+                       "results_us": results}, f, indent=4)
+        print(f"\nbaseline written to {BASELINE_PATH}")
+
+    if args.compare:
+        with open(BASELINE_PATH, "r") as f:
+            baseline = json.load(f)["results_us"]
+        if not compare(results, baseline, args.tolerance):
+            return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,17 +1,22 @@
 from abc import ABC, abstractmethod
 
-from typing import Tuple, cast
+from typing import Callable, Tuple, cast
 
 from abstract.auto_take_profit_data import AutoTakeProfitScaleData, AutoTakeProfitSingleTpData
 from abstract.scale_order_data import ScaleOrdersData
 from abstract.positions_info import Position
 from abstract.symbol_price_info import SymbolPriceInfo
 from abstract.single_tp_order_data import SingleTpOrder
+from ring_log import RingLog, LOG_PATH
 
 
 class Exchange(ABC):
     def __init__(self):
         self._auto_tp_data: AutoTakeProfitScaleData | AutoTakeProfitSingleTpData | None = None
+        self._update_listener: Callable[[], None] | None = None
+
+        # Bounded debug log, written to LOG_PATH in the background
+        self.debug_log = RingLog(sink_path=LOG_PATH)
 
     @property
     def auto_tp_data(self) -> AutoTakeProfitScaleData | AutoTakeProfitSingleTpData | None:
@@ -26,6 +31,16 @@ class Exchange(ABC):
         del self._auto_tp_data
 
 
+    # Push channel to the UI #
+    def set_update_listener(self, listener: Callable[[], None] | None) -> None:
+        """ Register a function called when price, positions or logs change, called from any thread """
+        self._update_listener = listener
+
+    def _notify_update(self) -> None:
+        """ To call by the exchange every time something shown by the UI changed """
+        if self._update_listener is not None:
+            self._update_listener()
+
     # Methods for the UI to get info or update data on screen #
     @abstractmethod
     def get_active_symbol(self) -> str | None:
@@ -42,17 +57,45 @@ class Exchange(ABC):
         """ Get current active position """
         ...
 
+    def get_position_for_symbol(self, symbol: str | None) -> Position | None:
+        """ Get current active position of one symbol """
+        return next((pos for pos in self.get_current_positions() if pos.get("symbol") == symbol), None)
+
+    def get_price_scale(self, symbol: str) -> int | None:
+        """ Number of decimals of the symbol prices, None if unknown (prices shown as received) """
+        return None
+
     @abstractmethod
     def get_error_log(self, flush: bool = True) -> list | None:
-        """ Get debug log array to print in log file"""
+        """ Get debug log lines (only the ones not read yet if flush), the file is written by the log itself """
         ...
 
+    def get_stats(self, name: str) -> dict | None:
+        """ Get internal stats to print on the UI (ie "conn"), None if not supported """
+        return None
+
+    def dump_stats(self, name: str) -> str | None:
+        """ Write detailed stats to a file, return its path, None if not supported """
+        return None
+
+    def reset_stats(self, name: str) -> bool:
+        """ Start measuring from zero, False if not supported """
+        return False
+
     #  CMD methods #
     @abstractmethod
     def terminal_cmd_switch_active_symbol(self, new_symbol: str) -> Tuple[bool, str]:
         """ Cmd to switch active symbol """
         ...
 
+    def terminal_cmd_unsubscribe_symbol(self, symbol: str) -> Tuple[bool, str]:
+        """ Cmd to stop the price feed of a symbol """
+        return False, f"Unsubscribe not supported by {self.__class__.__name__}"
+
+    def terminal_cmd_record_stream(self, path: str | None) -> Tuple[bool, str]:
+        """ Cmd to start recording websocket messages to path ("" = default path), stop if path is None """
+        return False, f"Recording not supported by {self.__class__.__name__}"
+
     @abstractmethod
     def terminal_cmd_cancel_all_orders(self) -> Tuple[bool, str, int]:
         """ Cmd to cancel all orders return number of order cancelled"""
@@ -0,0 +1,266 @@
+""" Terminal cmds compiled once to typed cmds (syntax checked, numbers parsed), run by commands.CommandRunner
+
+Shortcuts are compiled when loaded and when saved, submitting one is a dict lookup.
+"""
+from abstract.scale_order_data import ScaleOrdersData
+from abstract.single_tp_order_data import SingleTpOrder
+from abstract.auto_take_profit_data import AutoTakeProfitScaleData, AutoTakeProfitSingleTpData
+
+from typing import Callable, Tuple, TypedDict
+
+
+class TickerArgs(TypedDict):
+    ticker: str
+
+
+class CancelArgs(TypedDict):
+    target: str
+
+
+class AutoTpArgs(TypedDict):
+    action: str
+    shortcut: str | None
+    auto_cancel_orders: bool
+
+
+class ShortcutArgs(TypedDict):
+    action: str
+    name: str
+    value: "CompiledCmd | None"
+
+
+class StatsArgs(TypedDict):
+    name: str
+    action: str | None
+
+
+class HistoryArgs(TypedDict):
+    query: str
+
+
+class RecordArgs(TypedDict):
+    # "" = default path, None = stop recording
+    path: str | None
+
+
+CmdArgs = TickerArgs | ScaleOrdersData | SingleTpOrder | CancelArgs | AutoTpArgs | ShortcutArgs | StatsArgs | RecordArgs | HistoryArgs | None
+
+
+class CompiledCmd(TypedDict):
+    # canonical cmd name (aliases resolved), None if the cmd does not exist
+    name: str | None
+    # cmd as typed or as stored in the shortcut
+    text: str
+    args: CmdArgs
+    # syntax error, the cmd cannot run
+    error: str | None
+
+
+def remove_space_and_split(string: str) -> list[str]:
+    # empty cmd stays [""], same as " ".join(string.split()).split(" ")
+    return string.split() or [""]
+
+
+def _compile_ticker(words: list[str]) -> TickerArgs:
+    """ ticker ethusdt """
+    if len(words) != 2:
+        raise ValueError("Wrong command syntax")
+
+    ticker = str.upper(words[1])
+
+    if not ticker.find("USDT"):
+        raise ValueError("Only accept USDT ticker")
+    return {"ticker": ticker}
+
+
+def _compile_unsub(words: list[str]) -> TickerArgs:
+    """ unsub ethusdt """
+    if len(words) != 2:
+        raise ValueError("Wrong command syntax")
+    return {"ticker": str.upper(words[1])}
+
+
+def _compile_scale(words: list[str]) -> ScaleOrdersData:
+    """ scale 10 0.1 0.4 """
+    if len(words) != 4:
+        raise ValueError("Wrong scale syntax")
+
+    number_of_orders = int(words[1])
+    scale_from = float(words[2])
+    scale_to = float(words[3])
+
+    if scale_from <= 0.0 or scale_to <= 0.0 or scale_from >= scale_to or number_of_orders <= 0:
+        raise ValueError("Wrong data for scale order")
+    return {"number_of_orders": number_of_orders, "scale_from": scale_from, "scale_to": scale_to}
+
+
+def _compile_tp(words: list[str]) -> SingleTpOrder:
+    """ tp 0.4 """
+    if len(words) != 2:
+        raise ValueError("Wrong tp syntax")
+
+    percent_away = float(words[1])
+
+    if percent_away <= 0.0:
+        raise ValueError("Wrong data for tp command")
+    return {"percent_away": percent_away}
+
+
+def _compile_cancel(words: list[str]) -> CancelArgs:
+    """ cancel all """
+    if len(words) != 2:
+        raise ValueError("Wrong syntax")
+
+    target = str.upper(words[1])
+    if target != "ALL":
+        raise ValueError(f"No command matching {words[1]}")
+    return {"target": target}
+
+
+def _compile_auto_tp(words: list[str]) -> AutoTpArgs:
+    """ autotp on tp1 (cancel_off), autotp update tp2, autotp off, autotp status """
+    if len(words) < 2:
+        raise ValueError("Wrong syntax")
+
+    action = str.upper(words[1])
+    match action:
+        case "OFF":
+            return {"action": action, "shortcut": None, "auto_cancel_orders": True}
+        case "STATUS" | "ST":
+            return {"action": "STATUS", "shortcut": None, "auto_cancel_orders": True}
+        case "ON" | "UPDATE" | "UP":
+            if len(words) < 3:
+                raise ValueError(f"Cannot set autotp to {action} without a following shortcut")
+            # the shortcut is looked up when the cmd runs, it can be saved later than this cmd
+            return {"action": "UPDATE" if action == "UP" else action, "shortcut": words[2],
+                    "auto_cancel_orders": not (len(words) > 3 and words[3] == "cancel_off")}
+    raise ValueError(f"Auto tp action {words[1]} not supported")
+
+
+def _compile_shortcut(words: list[str]) -> ShortcutArgs:
+    """ shortcut add btc ticker btcusdt, shortcut del btc """
+    if len(words) < 3:
+        raise ValueError("Wrong syntax, ex: shortcut add/del/up btc ticker btcusdt")
+
+    action = str.upper(words[1])
+    match action:
+        case "ADD" | "UPDATE" | "UP":
+            value = compile_cmd(" ".join(words[3:]))
+            if value["name"] is None:
+                raise ValueError(f"Shortcut value \"{value['text']}\" is not a command")
+            if value["error"] is not None:
+                raise ValueError(f"Shortcut value \"{value['text']}\" : {value['error']}")
+            return {"action": "ADD", "name": words[2], "value": value}
+        case "DEL":
+            return {"action": action, "name": words[2], "value": None}
+    raise ValueError(f"Shortcut action {action} not supported")
+
+
+def _compile_stats(words: list[str]) -> StatsArgs:
+    """ stats conn, stats latency dump """
+    if len(words) != 2 and len(words) != 3:
+        raise ValueError("Wrong syntax, ex: stats conn")
+
+    action = str.lower(words[2]) if len(words) == 3 else None
+    if action not in (None, "dump", "reset"):
+        raise ValueError(f"Stats action {action} not supported")
+    return {"name": str.lower(words[1]), "action": action}
+
+
+def _compile_record(words: list[str]) -> RecordArgs:
+    """ record on, record on my_session.rec, record off """
+    if len(words) < 2 or len(words) > 3:
+        raise ValueError("Wrong syntax, ex: record on")
+
+    match str.upper(words[1]):
+        case "ON":
+            return {"path": words[2] if len(words) == 3 else ""}
+        case "OFF":
+            return {"path": None}
+    raise ValueError(f"Record action {words[1]} not supported")
+
+
+def _compile_history(words: list[str]) -> HistoryArgs:
+    """ history btcusdt, history scale 5 """
+    if len(words) < 2:
+        raise ValueError("Wrong syntax, ex: history btcusdt")
+    return {"query": " ".join(words[1:])}
+
+
+# First word of the cmd -> (canonical name, compiler)
+_COMPILERS: dict[str, Tuple[str, Callable[[list[str]], CmdArgs]]] = {
+    "ticker": ("ticker", _compile_ticker),
+    "t": ("ticker", _compile_ticker),
+    "unsub": ("unsub", _compile_unsub),
+    "scale": ("scale", _compile_scale),
+    "s": ("scale", _compile_scale),
+    "tp": ("tp", _compile_tp),
+    "cancel": ("cancel", _compile_cancel),
+    "c": ("cancel", _compile_cancel),
+    "autotp": ("autotp", _compile_auto_tp),
+    "atp": ("autotp", _compile_auto_tp),
+    "shortcut": ("shortcut", _compile_shortcut),
+    "sc": ("shortcut", _compile_shortcut),
+    "stats": ("stats", _compile_stats),
+    "record": ("record", _compile_record),
+    "history": ("history", _compile_history),
+    "h": ("history", _compile_history),
+    "quit": ("quit", lambda words: None),
+}
+
+
+def compile_cmd(text: str) -> CompiledCmd:
+    """ Parse & check a cmd, never raise, syntax errors are in "error" """
+    words = remove_space_and_split(text)
+    compiler = _COMPILERS.get(words[0])
+    if compiler is None:
+        return {"name": None, "text": text, "args": None, "error": None}
+
+    name, compile_args = compiler
+    try:
+        return {"name": name, "text": text, "args": compile_args(words), "error": None}
+    except ValueError as e:
+        return {"name": name, "text": text, "args": None, "error": str(e)}
+
+
+def build_auto_tp_data(cmd: CompiledCmd, auto_cancel_orders: bool) -> AutoTakeProfitScaleData | AutoTakeProfitSingleTpData:
+    """ Auto tp data from a compiled scale or tp cmd (the shortcut value given to the autotp cmd) """
+    if cmd["error"] is not None:
+        raise ValueError(cmd["error"])
+
+    match cmd["name"]:
+        case "scale":
+            scale: ScaleOrdersData = cmd["args"]  # type: ignore
+            return {**scale, "auto_cancel_orders": auto_cancel_orders}  # type: ignore
+        case "tp":
+            tp: SingleTpOrder = cmd["args"]  # type: ignore
+            return {**tp, "auto_cancel_orders": auto_cancel_orders}  # type: ignore
+    raise ValueError(f"Wrong shortcut, please only set scale or tp shortcut for atp command")
+
+
+class ShortcutCache(object):
+    """ shortcut name -> compiled shortcut value, kept in sync with the shortcuts file by the shortcut cmd """
+
+    def __init__(self, shortcuts: dict[str, str]) -> None:
+        self.compiled: dict[str, CompiledCmd] = {name: compile_cmd(text) for name, text in shortcuts.items()}
+
+    def resolve(self, raw_cmd: str) -> CompiledCmd:
+        """ The compiled shortcut if raw_cmd is one, else raw_cmd compiled """
+        shortcut = self.compiled.get(raw_cmd)
+        return shortcut if shortcut is not None else compile_cmd(raw_cmd)
+
+    def set(self, name: str, cmd: CompiledCmd) -> None:
+        self.compiled[name] = cmd
+
+    def delete(self, name: str) -> None:
+        self.compiled.pop(name, None)
+
+    def get_errors(self) -> list[Tuple[str, str]]:
+        """ (shortcut name, error) of the shortcuts that cannot run """
+        errors = []
+        for name, cmd in self.compiled.items():
+            if cmd["name"] is None:
+                errors.append((name, f"\"{cmd['text']}\" is not a command"))
+            elif cmd["error"] is not None:
+                errors.append((name, f"\"{cmd['text']}\" : {cmd['error']}"))
+        return errors
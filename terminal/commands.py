@@ -0,0 +1,222 @@
+from json_loader import JSON_CONFIG
+from history import CommandHistory
+
+from abstract.exchange import Exchange
+from abstract.scale_order_data import ScaleOrdersData
+from abstract.single_tp_order_data import SingleTpOrder
+
+from command_compiler import AutoTpArgs, CancelArgs, CompiledCmd, HistoryArgs, RecordArgs, ShortcutArgs, ShortcutCache, StatsArgs
+from command_compiler import TickerArgs, build_auto_tp_data, remove_space_and_split
+
+from typing import Any, Callable, Tuple
+
+# (cmd, result) written in the history, result None means the cmd does not exist
+HistoryLine = Tuple[str, str | None]
+# Cmds that neither change nor read the terminal state (active ticker, positions, atp, shortcuts, recorder),
+# they can run alongside the others. Every other cmd runs in submit order, ie "t ethusdt" then "tp1"
+UNORDERED_CMDS = frozenset({"cancel", "stats", "history"})
+
+
+class CommandRunner(object):
+    """ Terminal commands grammar, shared by the TUI and the headless daemon
+
+    Cmds are compiled (see command_compiler.py) then dispatched to the cmd_* method of their name,
+    every cmd returns the lines to write in the history. Exchange methods are called
+    directly (blocking REST calls), run it off the UI thread.
+    """
+
+    def __init__(self, client: Exchange, shortcuts_cfg: JSON_CONFIG, log: Callable[[str], None] = print,
+                 history: CommandHistory | None = None) -> None:
+        self.client = client
+        self.shortcuts_cfg = shortcuts_cfg
+        self.log = log
+        # searched by the history cmd, filled by the terminal showing the results
+        self.history = history
+        self.exchange_name = client.__class__.__name__
+
+        # every shortcut compiled once, here & when saved
+        self.shortcuts = ShortcutCache(shortcuts_cfg.data)
+
+        # canonical cmd name -> handler, "quit" is handled by the terminal
+        self._handlers: dict[str, Callable[[str, Any], list[HistoryLine]]] = {
+            "ticker": self.cmd_select_ticker,
+            "unsub": self.cmd_unsubscribe_ticker,
+            "scale": self.cmd_scale_limit_order,
+            "tp": self.cmd_tp_limit_order,
+            "cancel": self.cmd_cancel_orders,
+            "autotp": self.cmd_auto_tp,
+            "shortcut": self.cmd_manage_shortcuts,
+            "stats": self.cmd_stats,
+            "record": self.cmd_record_stream,
+            "history": self.cmd_search_history
+        }
+
+    def resolve(self, raw_cmd: str) -> CompiledCmd:
+        """ Compiled shortcut if raw_cmd is one, else raw_cmd compiled """
+        return self.shortcuts.resolve(raw_cmd)
+
+    def get_shortcut_errors(self) -> list[HistoryLine]:
+        """ Shortcuts of the file that cannot run (ie edited by hand), to show at startup """
+        return [(f"shortcut {name}", error) for name, error in self.shortcuts.get_errors()]
+
+    def cmd_select_ticker(self, raw_cmd: str, args: TickerArgs) -> list[HistoryLine]:
+        """ Ticker command ie ticker ethusdt"""
+        new_ticker = args["ticker"]
+
+        # Call bybit client to switch ticker
+        success, msg = self.client.terminal_cmd_switch_active_symbol(new_ticker)
+
+        return [(raw_cmd, f"Successfully switched ticker to {new_ticker}" if success is True else msg)]
+
+    def cmd_unsubscribe_ticker(self, raw_cmd: str, args: TickerArgs) -> list[HistoryLine]:
+        """ Unsubscribe command ie unsub ethusdt"""
+        ticker = args["ticker"]
+
+        success, msg = self.client.terminal_cmd_unsubscribe_symbol(ticker)
+
+        return [(raw_cmd, f"Price feed of {ticker} stopped" if success is True else msg)]
+
+    def cmd_cancel_orders(self, raw_cmd: str, args: CancelArgs) -> list[HistoryLine]:
+        """ Cancel command ie cancel all"""
+        success, msg, nb_of_order = self.client.terminal_cmd_cancel_all_orders()
+
+        if success is True:
+            return [(raw_cmd, (f"{nb_of_order} orders successfully cancelled"
+                               if nb_of_order > 0 else "No limit orders to cancel"))]
+        return [(raw_cmd, msg)]
+
+    def cmd_auto_tp(self, raw_cmd: str, args: AutoTpArgs) -> list[HistoryLine]:
+        """ AutoTakeProfit, will automatically place tp if enter a pos"""
+        match args["action"]:
+            case "OFF":
+                self.client.auto_tp_data = None
+                return [(raw_cmd, "Auto take profit is now OFF")]
+            case "STATUS":
+                status = "ON" if self.client.auto_tp_data is not None else "OFF"
+                return [(raw_cmd, f"Auto take profit status is [{status}]")]
+
+        shortcut_name = str(args["shortcut"])
+        auto_cancel_orders = args["auto_cancel_orders"]
+
+        # the shortcut was compiled when loaded or saved, nothing to parse here
+        shortcut_found = self.shortcuts.compiled.get(shortcut_name)
+
+        if shortcut_found is None:
+            raise ValueError(f"Cannot find shortcut {shortcut_name}")
+
+        history_lines: list[HistoryLine] = [("shortcut found ", shortcut_found["text"])]
+
+        self.client.auto_tp_data = build_auto_tp_data(shortcut_found, auto_cancel_orders)
+
+        if args["action"] == "ON":
+            history_lines.append((raw_cmd,
+                f"Auto take profit is now [ON] with shortcut {shortcut_name} and cancel_orders {auto_cancel_orders}"))
+        else:
+            history_lines.append((raw_cmd,
+                f"Auto take profit was updated to use shortcut {shortcut_name} and cancel_orders {auto_cancel_orders}"))
+        return history_lines
+
+    def cmd_scale_limit_order(self, raw_cmd: str, args: ScaleOrdersData) -> list[HistoryLine]:
+        """ Scale command .ie scale 10 0.1 0.4 """
+        active_symbol = self.client.get_active_symbol()
+
+        if active_symbol is None:
+            raise ValueError("No active symbol")
+
+        success, msg = self.client.terminal_cmd_set_scale_orders(args)
+
+        if success is True:
+            return [(raw_cmd, f"{args['number_of_orders']} limit orders placed from {args['scale_from']}% to {args['scale_to']}% - {msg}")]
+        return [(raw_cmd, msg)]
+
+    def cmd_tp_limit_order(self, raw_cmd: str, args: SingleTpOrder) -> list[HistoryLine]:
+        """ Take profit single order cmd ie. tp 0.4 """
+        active_symbol = self.client.get_active_symbol()
+
+        if active_symbol is None:
+            raise ValueError("No active symbol")
+
+        success, msg = self.client.terminal_cmd_send_single_tp_order(args)
+
+        return [(raw_cmd, f"Take profit limit order placed - {msg}" if success is True else msg)]
+
+    def cmd_stats(self, raw_cmd: str, args: StatsArgs) -> list[HistoryLine]:
+        """ Stats command ie stats conn, stats latency dump """
+        stats_name = args["name"]
+
+        match args["action"]:
+            case "dump":
+                dump_path = self.client.dump_stats(stats_name)
+                if dump_path is None:
+                    raise ValueError(f"Cannot dump {stats_name} stats for {self.exchange_name}")
+                return [(raw_cmd, f"{stats_name} stats written to {dump_path}")]
+            case "reset":
+                if not self.client.reset_stats(stats_name):
+                    raise ValueError(f"Cannot reset {stats_name} stats for {self.exchange_name}")
+                return [(raw_cmd, f"{stats_name} stats reset")]
+
+        stats = self.client.get_stats(stats_name)
+
+        if stats is None:
+            raise ValueError(f"No {stats_name} stats for {self.exchange_name}")
+        # an empty line would read as "Command not found"
+        if not stats:
+            return [(raw_cmd, f"No {stats_name} samples yet")]
+
+        # one line per entry when the values are themselves summaries (ie latency stages)
+        if any(isinstance(value, str) and " " in value for value in stats.values()):
+            return [(raw_cmd, f"{key}: {value}") for key, value in stats.items()]
+
+        return [(raw_cmd, " ".join(f"{key}={value}" for key, value in stats.items()))]
+
+    def cmd_record_stream(self, raw_cmd: str, args: RecordArgs) -> list[HistoryLine]:
+        """ Record command ie record on, record on my_session.rec, record off """
+        success, msg = self.client.terminal_cmd_record_stream(args["path"])
+        return [(raw_cmd, msg)]
+
+    def cmd_search_history(self, raw_cmd: str, args: HistoryArgs) -> list[HistoryLine]:
+        """ History command ie history btcusdt, searched in the whole journal (every session) """
+        if self.history is None:
+            raise ValueError("No history for this terminal")
+
+        count, matches = self.history.search(args["query"])
+
+        history_lines: list[HistoryLine] = [(raw_cmd, f"{count} matching lines" + (f", last {len(matches)}" if count > len(matches) else ""))]
+        for line in matches:
+            date, cmd, result = (line.split("\t", 2) + ["", ""])[:3]
+            history_lines.append((f"  {date} {cmd}", result))
+        return history_lines
+
+    def cmd_manage_shortcuts(self, raw_cmd: str, args: ShortcutArgs) -> list[HistoryLine]:
+        """ Shortcut command ie shortcut add btc ticker btcusdt, the value was compiled (checked) with the cmd """
+        shortcut_name = args["name"]
+        shortcut_value = args["value"]
+
+        if shortcut_value is not None:
+            if self.shortcuts_cfg.add(shortcut_name, shortcut_value["text"]):
+                self.shortcuts.set(shortcut_name, shortcut_value)
+                return [(raw_cmd, f"Shortcut {shortcut_name} is now {shortcut_value['text']}")]
+        elif self.shortcuts_cfg.delete(shortcut_name):
+            self.shortcuts.delete(shortcut_name)
+            return [(raw_cmd, f"Shortcut {shortcut_name} was deleted")]
+
+        return [(raw_cmd, f"Could not perform {args['action']} on {shortcut_name} ")]
+
+    def execute(self, cmd: CompiledCmd) -> list[HistoryLine]:
+        """ Will try to execute cmd, errors are returned as the result of the cmd """
+        if cmd["name"] is None:
+            return [(remove_space_and_split(cmd["text"])[0], None)]
+
+        if cmd["error"] is not None:
+            self.log(f'Error in {cmd["name"]} cmd : {cmd["error"]}')
+            return [(cmd["text"], cmd["error"])]
+
+        handler = self._handlers.get(cmd["name"])
+        if handler is None:
+            return [(cmd["text"], None)]
+
+        try:
+            return handler(cmd["text"], cmd["args"])
+        except Exception as e:
+            self.log(f'Error in {handler.__name__} : {str(e)}')
+            return [(cmd["text"], str(e))]
@@ -0,0 +1,203 @@
+""" Headless mode, the exchange client, auto tp & shortcuts without the TUI (textual / rich are never imported)
+
+    python terminal/daemon.py bybit                                   # cmds typed on stdin
+    python terminal/daemon.py bybit --socket /tmp/scalper.sock        # cmds sent on a local unix socket
+    python terminal/daemon.py --socket /tmp/scalper.sock --send "atp on s1"
+
+Cmds & shortcuts are the same as in the TUI, results and the exchange debug log are written on stdout.
+"""
+import os
+import signal
+import socket
+import socketserver
+import stat
+import sys
+import threading
+
+from datetime import datetime
+
+from commands import CommandRunner
+from history import CommandHistory
+from json_loader import JSON_CONFIG
+from launcher import parse_args, SHORTCUT_PATH, USAGE
+from startup_profile import STARTUP, print_startup_profile
+from abstract.exchange import Exchange
+
+# New exchange debug log entries are written on stdout this often
+DEBUG_LOG_INTERVAL_S = 1.0
+SEND_TIMEOUT_S = 30.0
+# socket created owner only (rw), anyone who can write to it can place orders
+SOCKET_UMASK = 0o177
+
+
+class Daemon(object):
+    """ Run terminal cmds from stdin or a unix socket, one line = one cmd """
+
+    def __init__(self, client: Exchange, shortcuts_cfg: JSON_CONFIG) -> None:
+        self.client = client
+        # same history journal as the TUI, the history cmd searches both
+        self.history = CommandHistory()
+        self.commands = CommandRunner(client, shortcuts_cfg, log=self.log, history=self.history)
+        self.stop_event = threading.Event()
+        self._print_lock = threading.Lock()
+
+    def log(self, message: str) -> None:
+        with self._print_lock:
+            print(f"{datetime.now().strftime('%H:%M:%S')}: {message}", flush=True)
+
+    def execute(self, raw_cmd: str) -> list[str]:
+        """ Resolve shortcut & run one cmd, return the result lines (also logged) """
+        cmd = self.commands.resolve(raw_cmd.strip())
+
+        if cmd["name"] == "quit":
+            self.stop_event.set()
+            return ["quit -> Stopping"]
+
+        lines = []
+        for text, result in self.commands.execute(cmd):
+            result = result if result else "Command not found"
+            # search results are already in the journal
+            self.history.append(text, result, journal=cmd["name"] != "history")
+            lines.append(f"{text} -> {result}")
+        for line in lines:
+            self.log(line)
+        return lines
+
+    def _debug_log_loop(self) -> None:
+        while not self.stop_event.wait(DEBUG_LOG_INTERVAL_S):
+            for line in self.client.get_error_log() or []:
+                self.log(f"[exchange] {line}")
+
+    def _serve_stdin(self) -> None:
+        for line in sys.stdin:
+            if line.strip():
+                self.execute(line)
+            if self.stop_event.is_set():
+                return
+        # stdin closed (ie started by a service manager), auto tp keeps running
+        self.log("stdin closed, still running, stop with ctrl+c or SIGTERM")
+
+    def _serve_socket(self, path: str) -> socketserver.ThreadingUnixStreamServer:
+        daemon = self
+
+        class CmdHandler(socketserver.StreamRequestHandler):
+            def handle(self) -> None:
+                for raw_line in self.rfile:
+                    line = raw_line.decode().strip()
+                    if not line:
+                        continue
+                    self.wfile.write(("\n".join(daemon.execute(line)) + "\n").encode())
+                    if daemon.stop_event.is_set():
+                        return
+
+        # socket left by a previous run, never remove anything else
+        if _is_stale_socket(path):
+            os.remove(path)
+        # created with the right mode, a chmod after bind leaves a window with the umask permissions
+        previous_umask = os.umask(SOCKET_UMASK)
+        try:
+            server = socketserver.ThreadingUnixStreamServer(path, CmdHandler)
+        finally:
+            os.umask(previous_umask)
+        server.daemon_threads = True
+        threading.Thread(target=server.serve_forever, name="daemon_socket", daemon=True).start()
+        return server
+
+    def run(self, socket_path: str | None) -> None:
+        for name, error in self.commands.get_shortcut_errors():
+            self.log(f"{name} -> {error}")
+
+        signal.signal(signal.SIGTERM, lambda signum, frame: self.stop_event.set())
+        threading.Thread(target=self._debug_log_loop, name="daemon_debug_log", daemon=True).start()
+
+        server = None
+        if socket_path is not None:
+            server = self._serve_socket(socket_path)
+            self.log(f"Listening for cmds on {socket_path}")
+        else:
+            threading.Thread(target=self._serve_stdin, name="daemon_stdin", daemon=True).start()
+            self.log("Reading cmds from stdin")
+
+        try:
+            while not self.stop_event.wait(1.0):
+                pass
+        except KeyboardInterrupt:
+            pass
+        finally:
+            if server is not None:
+                server.shutdown()
+                server.server_close()
+                os.remove(socket_path)  # type: ignore
+            self.log("Stopped")
+
+
+def send_cmd(socket_path: str, cmd: str) -> int:
+    """ Client side of --socket, send one cmd to a running daemon and print its result """
+    with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as client:
+        client.settimeout(SEND_TIMEOUT_S)
+        client.connect(socket_path)
+        client.sendall((cmd + "\n").encode())
+        client.shutdown(socket.SHUT_WR)
+        response = b""
+        while chunk := client.recv(4096):
+            response += chunk
+    print(response.decode(), end="")
+    return 0
+
+
+def _is_stale_socket(path: str) -> bool:
+    """ True if path is a socket, raise if something else is there """
+    if not os.path.lexists(path):
+        return False
+    if not stat.S_ISSOCK(os.lstat(path).st_mode):
+        raise ValueError(f"{path} exists and is not a socket, not removed")
+    return True
+
+
+def _pop_option(argv: list[str], option: str) -> str | None:
+    """ Remove `option value` from argv, return value """
+    if option not in argv:
+        return None
+    index = argv.index(option)
+    if index + 1 >= len(argv):
+        raise ValueError(f"Missing value after {option}")
+    value = argv[index + 1]
+    del argv[index:index + 2]
+    return value
+
+
+def main() -> int:
+    argv = list(sys.argv)
+    try:
+        socket_path = _pop_option(argv, "--socket")
+        cmd_to_send = _pop_option(argv, "--send")
+        # checked before the exchange client starts
+        if socket_path is not None and cmd_to_send is None:
+            _is_stale_socket(socket_path)
+    except ValueError as e:
+        print(str(e))
+        return 1
+
+    if cmd_to_send is not None:
+        if socket_path is None:
+            print("--send needs --socket")
+            return 1
+        return send_cmd(socket_path, cmd_to_send)
+
+    exchange = parse_args(argv)
+    if exchange is None:
+        print(USAGE.format(script="terminal/daemon.py") + " [--socket path]")
+        return 1
+
+    with STARTUP.stage("shortcuts config load"):
+        shortcuts_cfg = JSON_CONFIG(SHORTCUT_PATH, live=True)
+    if "--profile-startup" in argv:
+        print_startup_profile()
+        return 0
+
+    Daemon(exchange, shortcuts_cfg).run(socket_path)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
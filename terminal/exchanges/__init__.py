@@ -1,2 +1,24 @@
-from .bybit.bybit import Bybit
-from .binance.binance import Binance
\ No newline at end of file
+import importlib
+
+# Exchange class -> module, imported on first use so picking one exchange does not load the others (and pybit)
+_EXCHANGE_MODULES = {
+    "Bybit": ".bybit.bybit",
+    "Binance": ".binance.binance"
+}
+
+__all__ = list(_EXCHANGE_MODULES)
+
+
+def load_exchange_class(name: str) -> type | None:
+    """ Exchange class from its cmd line name (case insensitive), None if unknown """
+    for class_name in _EXCHANGE_MODULES:
+        if class_name.upper() == name.upper():
+            return getattr(importlib.import_module(_EXCHANGE_MODULES[class_name], __name__), class_name)
+    return None
+
+
+def __getattr__(name: str) -> type:
+    # keeps `from exchanges import Bybit` working
+    if name in _EXCHANGE_MODULES:
+        return getattr(importlib.import_module(_EXCHANGE_MODULES[name], __name__), name)
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
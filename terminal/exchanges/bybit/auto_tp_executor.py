@@ -0,0 +1,58 @@
+import threading
+
+from .position_store import PositionKey
+
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable
+
+
+class AutoTpExecutor(object):
+    """ Run auto tp jobs serialized per symbol and in parallel across symbols
+
+    Each position (symbol, side, position_idx) has a mailbox holding at most one pending job, a newer job for
+    the same position replaces the pending one (the position size it was built for is outdated). Jobs of the
+    positions of one symbol (hedge mode Buy & Sell) are all kept and run one after the other, they share the book.
+    """
+
+    def __init__(self, max_workers: int, on_error: Callable[[str], None]) -> None:
+        self.pool = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="auto_tp")
+        self.on_error = on_error
+
+        self._lock = threading.Lock()
+        # symbol -> position key -> pending job, oldest position first
+        self._pending_jobs: dict[str, dict[PositionKey, Callable[[], None]]] = {}
+        self._running_symbols: set[str] = set()
+
+        self.superseded_jobs = 0
+
+    def submit(self, position_key: PositionKey, job: Callable[[], None]) -> None:
+        """ Enqueue a job for a position and return right away """
+        symbol = position_key[0]
+        with self._lock:
+            symbol_jobs = self._pending_jobs.setdefault(symbol, {})
+            if position_key in symbol_jobs:
+                self.superseded_jobs += 1
+            symbol_jobs[position_key] = job
+
+            # A worker is already draining this symbol, it will pick the job up
+            if symbol in self._running_symbols:
+                return
+            self._running_symbols.add(symbol)
+
+        self.pool.submit(self._drain, symbol)
+
+    def _drain(self, symbol: str) -> None:
+        """ Run jobs of one symbol until its mailbox is empty """
+        while True:
+            with self._lock:
+                symbol_jobs = self._pending_jobs.get(symbol)
+                if not symbol_jobs:
+                    self._pending_jobs.pop(symbol, None)
+                    self._running_symbols.discard(symbol)
+                    return
+                position_key = next(iter(symbol_jobs))
+                job = symbol_jobs.pop(position_key)
+            try:
+                job()
+            except Exception as e:
+                self.on_error(f"Auto tp job failed for {symbol} {position_key[1]} : {str(e)}")
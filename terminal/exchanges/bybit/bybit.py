@@ -1,8 +1,27 @@
 import os
-
-from .bybit_tools import PositionStreamData, filter_postion_with_zero_size
-from .bybit_tools import ensure_http_result, build_scale_orders, ScaleOrder, build_single_tp_order, filter_postion_with_zero_size
+import threading
+import time
+
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
+
+from .bybit_tools import PositionStreamData
+from .bybit_tools import ensure_http_result, build_scale_orders, ScaleOrder, build_single_tp_order
+from .bybit_tools import OrderResult, summarize_order_results
+from .auto_tp_executor import AutoTpExecutor
+from .position_store import PositionEvent, PositionStore, get_position_key
+from .pre_trade import DEFAULT_PRICE_BAND_PERCENT, MarketPrices, parse_market_prices, validate_orders
+from .rate_limiter import DEFAULT_LIMITS_PER_MIN, RateLimitedHttp
+from .http_pool import WarmConnectionPool
+from .pybit_adapter import unsubscribe_topic, wrap_message_callback, wrap_raw_message_handler
+from .subscription_manager import PriceFeedSubscriptions
+from .tp_reconciler import LiveOrder, OrderAmend, parse_live_orders, reconcile_tp_orders
+from .symbol_catalogue import SymbolCatalogue, SymbolFilters, SYMBOLS_CACHE_TTL_S, load_cached_symbols, save_cached_symbols
+from .stream_recorder import CHANNEL_POSITION, CHANNEL_PRICE, STREAM_RECORD_PATH, StreamRecorder
 from json_loader import JSON_CONFIG
+from ring_log import format_entry
+from latency import LatencyRecorder, LatencyTrace
+from startup_profile import STARTUP
 from abstract.symbols_info import Symbol
 from abstract.single_tp_order_data import SingleTpOrder
 from abstract.symbol_price_info import SymbolPriceInfo
@@ -10,82 +29,207 @@ from abstract.positions_info import Position
 from abstract.scale_order_data import ScaleOrdersData
 from abstract.auto_take_profit_data import AutoTakeProfitScaleData, AutoTakeProfitSingleTpData
 from abstract.exchange import Exchange
-from typing import Tuple, cast
+from typing import Callable, Tuple, cast
 
 from pybit import usdt_perpetual
 
 CONFIG_PATH = os.path.join(os.path.dirname(__file__), 'api_keys.json')
+SYMBOLS_CACHE_PATH = os.path.join(os.path.dirname(__file__), 'symbols_cache.json')
 SUCCESS_RETURN = "OK"
+BYBIT_ENDPOINT = "https://api.bybit.com"
+BYBIT_WS_DOMAIN = "bytick"
+
+# Max number of orders sent in parallel, a full ladder should fit in one round trip
+# can be changed with "HttpPoolSize" in api_keys.json, also used as http connection pool size
+ORDER_POOL_SIZE = 10
+# Last price older than this is not trusted by the pre trade checks
+LAST_PRICE_MAX_AGE_S = 5.0
+# Max number of live price feeds, the least recently used ticker is unsubscribed first
+MAX_PRICE_FEEDS = 5
+PRICE_FEED_TOPIC = "instrument_info.100ms.{}"
+# Max number of symbols handled in parallel by the auto tp system
+AUTO_TP_WORKERS = 4
 
 
 class Bybit(Exchange):
-    def __init__(self) -> None:
+    def __init__(self, endpoint: str = BYBIT_ENDPOINT, domain: str = BYBIT_WS_DOMAIN) -> None:
         super().__init__()
-        self.config = JSON_CONFIG(CONFIG_PATH)
-        self.endpoint = "https://api.bybit.com"
+        self.endpoint = endpoint
+        self.domain = domain
+
+        # domain of a simulator started in this process (see simulator.py), no api keys needed
+        self.simulator = None
+        if domain != BYBIT_WS_DOMAIN:
+            # only imported off the live domain, a live start never loads the simulator (http.server, pybit internals)
+            from .simulator import SIM_API_KEY, get_simulator
+            self.simulator = get_simulator(domain)
+        if self.simulator is None:
+            with STARTUP.stage("bybit config load"):
+                self.config = JSON_CONFIG(CONFIG_PATH)
+            self.api_key = self.config.data.BybitApiKey
+            self.api_secret = self.config.data.BybitSecretApiSecret
+            self.pool_size = int(self.config.data.HttpPoolSize or ORDER_POOL_SIZE)
+            self.symbols_cache_path: str | None = SYMBOLS_CACHE_PATH
+            # ie "PriceBandPercent": 10 to refuse orders more than 10% away from the last price
+            band = self.config.data.PriceBandPercent
+            self.price_band_percent: float | None = float(band) if band else DEFAULT_PRICE_BAND_PERCENT
+        else:
+            self.api_key = self.api_secret = SIM_API_KEY  # type: ignore
+            self.pool_size = ORDER_POOL_SIZE
+            self.price_band_percent = DEFAULT_PRICE_BAND_PERCENT
+            # simulated symbols must never end up in the real cache
+            self.symbols_cache_path = None
 
         # Init class var #
         self.active_symbol_name: str | None = None
         self.active_symbol_latest_price: SymbolPriceInfo | None = None
-
-        self.current_active_positions: list[Position] = []
-        self.symbols: list[Symbol] = []
+        # symbol -> (last price & best bid / ask, time.monotonic() when received), used by pre trade checks
+        self.latest_prices: dict[str, Tuple[MarketPrices, float]] = {}
+
+        self.position_store = PositionStore()
+        # Fill to tp ack latency of the auto tp system, per stage
+        self.latency = LatencyRecorder()
+        # perf_counter_ns of the position message being handled, stamped when it left the socket
+        self._position_msg_received_ns: int | None = None
+        # Set by the record cmd, every message reaching the websocket callbacks is appended to a file
+        self.stream_recorder: StreamRecorder | None = None
+        self.symbol_catalogue = SymbolCatalogue()
         
-        self.already_subscribed_symbol_price: list[str] = []
+        self.price_feeds = PriceFeedSubscriptions(MAX_PRICE_FEEDS, self._subscribe_price_feed, self._unsubscribe_price_feed)
+        self._filtered_ws_manager = None
 
-        # Debug array #
-        self.debug_log = []
+        # Worker pool used to send orders in parallel #
+        self.order_pool = ThreadPoolExecutor(max_workers=self.pool_size, thread_name_prefix="bybit_orders")
+        self.last_order_batch: list[OrderResult] = []
+
+        # Auto tp jobs run here so the websocket thread only enqueue #
+        self.auto_tp_executor = AutoTpExecutor(AUTO_TP_WORKERS, self.debug_log.append)
 
         # Create websocket & http handler  #
-        self._create_ws_no_auth()
-        self._create_ws_auth()
-        self._create_http_auth()
+        with STARTUP.stage("bybit clients init"):
+            self._create_ws_no_auth()
+            self._create_ws_auth()
+            self._create_http_auth()
+            self._create_http_pool()
 
         #  Call methods #
-        self._load_bybit_symbol()
-        self._listen_to_position()
+        with STARTUP.stage("bybit symbols load"):
+            self._load_bybit_symbol()
+
+        # Connecting the private websocket takes a few seconds, do it in the background
+        # so the terminal is usable right away
+        threading.Thread(target=self._listen_to_position, args=(STARTUP.begin("bybit position stream connect"),),
+                         name="bybit_position_stream", daemon=True).start()
 
     # Private methods #
     def _create_ws_auth(self) -> None:
-        if self.config.data.BybitApiKey is None or self.config.data.BybitSecretApiSecret is None:
+        if self.api_key is None or self.api_secret is None:
             raise ValueError("Missing Bybit api keys or secrets in conf.json file")
+        if self.simulator is not None:
+            self.websocket_auth_client = self.simulator.create_websocket(self.api_key, self.api_secret)
+            return
         self.websocket_auth_client = usdt_perpetual.WebSocket(
             test=False,
-            api_key=self.config.data.BybitApiKey,
-            api_secret=self.config.data.BybitSecretApiSecret,
-            domain="bytick")
+            api_key=self.api_key,
+            api_secret=self.api_secret,
+            domain=self.domain)
 
     def _create_ws_no_auth(self) -> None:
+        if self.simulator is not None:
+            self.websocket_no_auth_client = self.simulator.create_websocket()
+            return
         self.websocket_no_auth_client = usdt_perpetual.WebSocket(
             test=False,
-            domain="bytick")
+            domain=self.domain)
 
     def _create_http_auth(self) -> None:
-        self.http_client = usdt_perpetual.HTTP(
+        # every REST call goes through the client side rate limiter, sized on the server limits
+        self.http_client = RateLimitedHttp(usdt_perpetual.HTTP(
             endpoint=self.endpoint,
-            api_key=self.config.data.BybitApiKey,
-            api_secret=self.config.data.BybitSecretApiSecret)
+            api_key=self.api_key,
+            api_secret=self.api_secret), self._get_rate_limits())
+
+    def _get_rate_limits(self) -> dict[str, int] | None:
+        """ Server requests per minute by endpoint class, None = Bybit default limits """
+        if self.simulator is not None:
+            limit = int(self.simulator.config.get("rate_limit_per_min") or 0)
+            return {endpoint: limit for endpoint in DEFAULT_LIMITS_PER_MIN} if limit else None
+        # ie "RateLimitsPerMin": {"create": 100, "cancel": 100, "query": 120} for an account with other limits
+        return self.config.data.RateLimitsPerMin
+
+    def _create_http_pool(self) -> None:
+        """ Keep warm connections to the REST endpoint so no order pays for a handshake """
+        self.http_pool = WarmConnectionPool(self.http_client.client, self.endpoint, self.pool_size)
+        self.http_pool.start()
+
+    def _fetch_bybit_symbol(self) -> None:
+        """ Will call API to get all instruments and refresh the cache file """
+        raw_symbols = cast(list[Symbol], (self.http_client.query_symbol()).get("result"))
+        self.symbol_catalogue = SymbolCatalogue(raw_symbols)
+
+        if self.symbols_cache_path is None:
+            return
+        try:
+            save_cached_symbols(self.symbols_cache_path, raw_symbols)
+        except OSError as e:
+            self.debug_log.append(f"Could not write symbols cache : {str(e)}", "WARNING")
+
+    def _refresh_bybit_symbol(self) -> None:
+        """ Background version of _fetch_bybit_symbol, errors go to the debug log """
+        try:
+            self._fetch_bybit_symbol()
+        except Exception as e:
+            self.debug_log.append(f"Could not refresh symbols : {str(e)}", "WARNING")
 
     def _load_bybit_symbol(self) -> None:
-        self.symbols = cast(list[Symbol], (self.http_client.query_symbol()).get("result"))
+        """ Load instruments from the cache file if possible, else from the API """
+        cached_symbols, cache_age = load_cached_symbols(self.symbols_cache_path) if self.symbols_cache_path else (None, 0.0)
+
+        # Cold start, nothing usable on disk so we have to wait for the network
+        if cached_symbols is None:
+            self._fetch_bybit_symbol()
+            return
+
+        self.symbol_catalogue = SymbolCatalogue(cached_symbols)
+
+        if cache_age > SYMBOLS_CACHE_TTL_S:
+            threading.Thread(target=self._refresh_bybit_symbol, name="bybit_symbols", daemon=True).start()
     
     def _get_current_position_for_symbol(self, new_symbol : str) -> None:
         """ Will call API get current position for this symbol """
         try:
             position_data = ensure_http_result(self.http_client.my_position(symbol=new_symbol))
 
-            open_position_list = filter_postion_with_zero_size(position_data.get("result"))
-
-            self.current_active_positions = open_position_list if open_position_list else []
+            # full snapshot of this symbol, no auto tp on those events (same as before)
+            self.position_store.replace_symbol(new_symbol, position_data.get("result") or [])
 
         except Exception as z:
             self.debug_log.append(str(z))
             return
 
-    def _send_limit_orders(self, orders: list[ScaleOrder]) -> Tuple[bool, str]:
-        """ Will call API and send scale orders """
-        for order in orders:
-            ret = self.http_client.place_active_order(
+    def _record_order_ack(self, trace: LatencyTrace | None, sent_ns: int, success: bool) -> None:
+        """ Latency of one order request, first ack of the batch is when the position got a tp """
+        if trace is None:
+            return
+        self.latency.record("order_rtt", (time.perf_counter_ns() - sent_ns) / 1000)
+        if success:
+            trace.mark("order_acked")
+            trace.mark_first("first_tp_ack")
+
+    def _place_order(self, order: ScaleOrder, trace: LatencyTrace | None = None) -> OrderResult:
+        """ Will call API and place one order, never raise so one bad order does not kill the batch """
+        result: OrderResult = {
+            "symbol": order.get("symbol"),
+            "price": order.get("price"),
+            "qty": order.get("qty"),
+            "order_id": None,
+            "error": None
+        }
+        if trace is not None:
+            trace.mark("order_sent")
+        sent_ns = time.perf_counter_ns()
+        try:
+            ret = ensure_http_result(self.http_client.place_active_order(
                 symbol=order.get("symbol"),
                 side=order.get("side"),
                 order_type=order.get("order_type"),
@@ -95,11 +239,157 @@ class Bybit(Exchange):
                 reduce_only=order.get("reduce_only"),
                 close_on_trigger=order.get("close_on_trigger"),
                 position_idx=order.get("position_idx")
-            )
-        return True, SUCCESS_RETURN
+            ))
+            result["order_id"] = dict(ret.get("result") or {}).get("order_id")
+        except Exception as e:
+            result["error"] = str(e)
+        self._record_order_ack(trace, sent_ns, result["error"] is None)
+        return result
+
+    def _amend_order(self, amend: OrderAmend, trace: LatencyTrace | None = None) -> OrderResult:
+        """ Will call API and change price and/or qty of a resting order, never raise """
+        result: OrderResult = {
+            "symbol": amend.get("symbol"),
+            "price": amend.get("price"),
+            "qty": amend.get("qty"),
+            "order_id": amend.get("order_id"),
+            "error": None
+        }
+        # only send what changed, bybit refuse an amend that change nothing
+        changes = {}
+        if amend.get("price") is not None:
+            changes["p_r_price"] = amend.get("price")
+        if amend.get("qty") is not None:
+            changes["p_r_qty"] = amend.get("qty")
+        if trace is not None:
+            trace.mark("order_sent")
+        sent_ns = time.perf_counter_ns()
+        try:
+            ensure_http_result(self.http_client.replace_active_order(
+                symbol=amend.get("symbol"),
+                order_id=amend.get("order_id"),
+                **changes))
+        except Exception as e:
+            result["error"] = str(e)
+        self._record_order_ack(trace, sent_ns, result["error"] is None)
+        return result
+
+    def _cancel_order(self, order: LiveOrder) -> OrderResult:
+        """ Will call API and cancel one resting order, never raise """
+        result: OrderResult = {
+            "symbol": order.get("symbol"),
+            "price": order.get("price"),
+            "qty": order.get("qty"),
+            "order_id": order.get("order_id"),
+            "error": None
+        }
+        try:
+            ensure_http_result(self.http_client.cancel_active_order(
+                symbol=order.get("symbol"),
+                order_id=order.get("order_id")))
+        except Exception as e:
+            result["error"] = str(e)
+        return result
+
+    def _get_fresh_market_prices(self, symbol: str) -> MarketPrices | None:
+        """ Prices received on the price feed for this symbol, None if unknown or too old """
+        market = self.latest_prices.get(symbol)
+        if market is None or time.monotonic() - market[1] > LAST_PRICE_MAX_AGE_S:
+            return None
+        return market[0]
+
+    def _pre_trade_check(self, orders: list[ScaleOrder]) -> Tuple[list[ScaleOrder], list[ScaleOrder], list[OrderResult]]:
+        """ Validate orders against the cached instrument filters before any network call
+        return (valid orders, rejected orders, results reporting the rejected orders)
+        """
+        valid_orders: list[ScaleOrder] = []
+        rejected_orders: list[ScaleOrder] = []
+        rejected_results: list[OrderResult] = []
+
+        for symbol in dict.fromkeys(order["symbol"] for order in orders):
+            symbol_orders = [order for order in orders if order["symbol"] == symbol]
+            valid, rejected = validate_orders(symbol_orders,
+                                              self.symbol_catalogue.get(symbol),
+                                              self._get_fresh_market_prices(symbol),
+                                              self.price_band_percent)
+            valid_orders += valid
+            rejected_orders += [order for order, reason in rejected]
+            rejected_results += [{
+                "symbol": order["symbol"],
+                "price": order["price"],
+                "qty": order["qty"],
+                "order_id": None,
+                "error": f"Rejected locally, {reason}"
+            } for order, reason in rejected]
+
+        return valid_orders, rejected_orders, rejected_results
+
+    def _run_order_batch(self, jobs: list[Callable[[], OrderResult]],
+                         cancel_jobs: list[Callable[[], OrderResult]] | None = None,
+                         rejected_results: list[OrderResult] | None = None,
+                         trace: LatencyTrace | None = None) -> Tuple[bool, str]:
+        """ Run order jobs in parallel on the order pool, wait for the last ack and report
+
+        cancel_jobs are run first, so the book never holds more reduce only qty than the position
+        rejected_results are orders refused by the pre trade checks, only added to the report
+        """
+        if not jobs and not cancel_jobs and not rejected_results:
+            return True, SUCCESS_RETURN
 
+        start = time.perf_counter()
+        results = list(rejected_results) if rejected_results else []
+        results += list(self.order_pool.map(lambda job: job(), cancel_jobs)) if cancel_jobs else []
+        results += list(self.order_pool.map(lambda job: job(), jobs))
+        elapsed_ms = (time.perf_counter() - start) * 1000
+        if trace is not None:
+            trace.mark("tp_batch_done")
+
+        self.last_order_batch = results
+        for result in results:
+            if result.get("error") is not None:
+                self.debug_log.append(f"Order {result.get('symbol')} {result.get('qty')}@{result.get('price')} failed : {result.get('error')}")
+
+        return summarize_order_results(results, elapsed_ms)
+
+    def _send_limit_orders(self, orders: list[ScaleOrder], trace: LatencyTrace | None = None) -> Tuple[bool, str]:
+        """ Will call API and send scale orders, all orders are sent in parallel """
+        valid_orders, _, rejected_results = self._pre_trade_check(orders)
+        return self._run_order_batch([partial(self._place_order, order, trace) for order in valid_orders],
+                                     rejected_results=rejected_results,
+                                     trace=trace)
+
+    def _reconcile_tp_orders(self, ticker: str, orders: list[ScaleOrder], trace: LatencyTrace | None = None) -> Tuple[bool, str]:
+        """ Will call API to move the live tp orders to the wanted ladder with the fewest requests """
+        valid_orders, rejected_orders, rejected_results = self._pre_trade_check(orders)
+        if not valid_orders:
+            # nothing to move the book to, the live tps (if any) are left as they are
+            self.debug_log.append(f"No valid tp order for {ticker}, live orders kept", "WARNING")
+            return self._run_order_batch([], rejected_results=rejected_results, trace=trace)
 
-    def _get_auto_tp_orders(self, new_position: Position, ticker_info: Symbol, 
+        try:
+            raw_live_orders = ensure_http_result(self.http_client.query_active_order(symbol=ticker)).get("result")
+            live_orders = parse_live_orders(cast(list[dict], raw_live_orders))
+        except Exception as e:
+            # cannot see the book, fallback on cancel all + re-place
+            self.debug_log.append(f"Could not query active orders for {ticker}, cancel all instead : {str(e)}", "WARNING")
+            try:
+                self.http_client.cancel_all_active_orders(symbol=ticker)
+            except Exception:
+                self.debug_log.append("No active orders to cancel", "INFO")
+            return self._send_limit_orders(orders, trace)
+
+        # live tps paired with a refused order are kept, never leave the position without them
+        plan = reconcile_tp_orders(valid_orders, live_orders, rejected_orders)
+
+        jobs: list[Callable[[], OrderResult]] = [partial(self._amend_order, amend, trace) for amend in plan["to_amend"]]
+        jobs += [partial(self._place_order, order, trace) for order in plan["to_create"]]
+        return self._run_order_batch(jobs,
+                                     [partial(self._cancel_order, order) for order in plan["to_cancel"]],
+                                     rejected_results,
+                                     trace)
+
+
+    def _get_auto_tp_orders(self, new_position: Position, ticker_info: SymbolFilters, 
                             auto_tp_data: AutoTakeProfitScaleData | AutoTakeProfitSingleTpData) -> list[ScaleOrder]:
                 
         # ugly check bcs python does not have type checking on dict
@@ -122,26 +412,28 @@ class Bybit(Exchange):
         raise ValueError(f"Wrong auto_tp_data_type, should never happend")
 
 
-    def _do_auto_tp_system(self, new_position: Position):
+    def _do_auto_tp_system(self, new_position: Position, trace: LatencyTrace | None = None):
         """ Will get the position info and shortcuts cmd and set the appropriate scale orders"""
+        if trace is not None:
+            trace.mark("auto_tp_start")
         try:
             ticker = new_position.get("symbol")
-            ticker_info = next((info for info in self.symbols
-                                if info["name"] == ticker), None)
+            ticker_info = self.symbol_catalogue.get(ticker)
 
             if (ticker is None) or (ticker_info is None) or (self.auto_tp_data is None):
                 raise ValueError(f"Missing data to create autotp for {ticker}")
 
 
-            if self.auto_tp_data.get('auto_cancel_orders') == True:
-                try:
-                    # cancel active orders before place tp orders
-                    self.http_client.cancel_all_active_orders(symbol=ticker)
-                except Exception as z:
-                    self.debug_log.append("No active orders to cancel")
+            # build orders based auto_tp_data type
+            orders = self._get_auto_tp_orders(new_position, ticker_info, self.auto_tp_data)
+            if trace is not None:
+                trace.mark("orders_built")
 
-            # build & send orders based auto_tp_data type
-            success, msg = self._send_limit_orders(self._get_auto_tp_orders(new_position, ticker_info, self.auto_tp_data))
+            if self.auto_tp_data.get('auto_cancel_orders') == True:
+                # amend live orders in place & only create / cancel the difference
+                success, msg = self._reconcile_tp_orders(ticker, orders, trace)
+            else:
+                success, msg = self._send_limit_orders(orders, trace)
 
             if success is False:
                 raise Exception(msg)
@@ -149,30 +441,33 @@ class Bybit(Exchange):
         except Exception as e:
             self.debug_log.append(str(e))
 
-    def _trigger_auto_tp_system(self, previous_positions: list[Position]):
+    def _trigger_auto_tp_system(self, position_events: list[PositionEvent], trace: LatencyTrace | None = None):
 
          # return if no auto tp needed
         if self.auto_tp_data is None:
-            self.debug_log.append("_handle_auto_tp_system : auto_tp_data is None")
+            self.debug_log.append("_handle_auto_tp_system : auto_tp_data is None", "DEBUG")
             return
 
-        # find new position or same position but with > size (martingale) by doing a diff with the previous list of positions
-        new_positions: dict = {}
-        for pos in self.current_active_positions:
-            pos_symbol = pos.get("symbol")
-            existing_pos = next((x for x in previous_positions if x.get("symbol") == pos_symbol), None)
-            if (existing_pos is None) or (float(pos.get("size")) > float(existing_pos.get("size"))):
-                new_positions[pos_symbol] = pos
-
-        new_positions_as_list = new_positions.items()
-
-        # do the auto tp system
-        for new_pos in new_positions_as_list:
-            self._do_auto_tp_system(new_pos[1])
+        # new position or same position but with > size (martingale)
+        # hand the auto tp work to the executor, one queue per symbol, a newer update of the same position replace a pending one
+        for event in position_events:
+            if event["kind"] == "opened" or event["kind"] == "increased":
+                event_trace = trace.fork() if trace is not None else None
+                if event_trace is not None:
+                    event_trace.mark("auto_tp_queued")
+                self.auto_tp_executor.submit(get_position_key(event["position"]), partial(self._do_auto_tp_system, event["position"], event_trace))
 
     def _callback_listen_to_position(self, exchange_msg: PositionStreamData | None) -> None:
         """ Called everytime we get into a position """
-        
+
+        # latency of this message starts when it left the socket (if stamped), else now
+        trace = self.latency.start(self._position_msg_received_ns)
+        self._position_msg_received_ns = None
+        trace.mark("ws_callback")
+
+        if self.stream_recorder is not None and exchange_msg is not None:
+            self.stream_recorder.record(CHANNEL_POSITION, cast(dict, exchange_msg))
+
         if (exchange_msg is None):
             self.debug_log.append("_callback_listen_to_position -> none exchange_msg")
             return
@@ -183,35 +478,103 @@ class Bybit(Exchange):
             self.debug_log.append("_callback_listen_to_position no exchange_msg")
             return
 
-        # filter out closed position (bybit call this event when we close a position, with a size of 0 lol)
-        open_position_list = filter_postion_with_zero_size(new_positions_from_websocket)
+        # apply the delta, closed position are sent by bybit with a size of 0 and removed by the store
+        position_events = self.position_store.apply(new_positions_from_websocket)
 
-        # save previous position
-        previous_positions = self.current_active_positions if self.current_active_positions is not None else []
+        if not position_events:
+            return
 
-        # set current position to new positions
-        self.current_active_positions = open_position_list
+        self._notify_update()
 
         # handle auto tp system
-        self._trigger_auto_tp_system(previous_positions)
+        self._trigger_auto_tp_system(position_events, trace)
+
+    def _stamp_position_message(self, on_message: Callable[[str], None], raw_message: str) -> None:
+        """ Stamp raw position messages before pybit parses them, same thread as the callback """
+        self._position_msg_received_ns = time.perf_counter_ns()
+        try:
+            on_message(raw_message)
+        finally:
+            # auth / subscribe replies never reach the callback, do not leave their stamp behind
+            self._position_msg_received_ns = None
 
-    def _listen_to_position(self) -> None:
+    def _listen_to_position(self, on_connected: Callable[[], None] | None = None) -> None:
         """ Call _callback_listen_to_position everytime user get into a position """
-        self.websocket_auth_client.position_stream(self._callback_listen_to_position)
+        try:
+            self.websocket_auth_client.position_stream(self._callback_listen_to_position)
+
+            # without the raw hook, latency is measured from the callback (parse time not counted)
+            if not wrap_raw_message_handler(self.websocket_auth_client.ws_private, self._stamp_position_message):
+                self.debug_log.append("pybit raw message hook not found, position latency starts at the callback", "WARNING")
+        except Exception as e:
+            self.debug_log.append(f"Could not connect to position stream : {str(e)}")
+        finally:
+            if on_connected is not None:
+                on_connected()
+
+    def _filter_public_ws_message(self, handle_message: Callable[[dict], None], message: dict) -> None:
+        """ pybit does not know about unsubscribe, drop the unsubscribe reply & late messages of removed feeds """
+        if message.get("request", {}).get("op") == "unsubscribe":
+            return
+
+        topic = str(message.get("topic", ""))
+        if topic.startswith(PRICE_FEED_TOPIC.format("")) and not self.price_feeds.is_live(topic.split(".")[-1]):
+            return
+
+        handle_message(message)
+
+    def _subscribe_price_feed(self, symbol: str) -> None:
+        """ Will open (first time) the public websocket & subscribe to the price feed of symbol """
+        self.websocket_no_auth_client.instrument_info_stream(self._callback_symbol_price_feed, symbol)
+
+        ws_manager = self.websocket_no_auth_client.ws_public
+        if ws_manager is not None and self._filtered_ws_manager is not ws_manager:
+            if wrap_message_callback(ws_manager, self._filter_public_ws_message):
+                self._filtered_ws_manager = ws_manager
+            else:
+                self.debug_log.append("pybit websocket callback not found, price feeds are never unsubscribed", "WARNING")
+
+    def _unsubscribe_price_feed(self, symbol: str) -> None:
+        """ Will unsubscribe from the price feed of symbol, errors go to the debug log """
+        topic = PRICE_FEED_TOPIC.format(symbol)
+        self.latest_prices.pop(symbol, None)
+
+        # the unsubscribe reply must be filtered out, else keep the feed (its messages are dropped as late ones)
+        ws_manager = self.websocket_no_auth_client.ws_public
+        if ws_manager is None or self._filtered_ws_manager is not ws_manager:
+            return
+
+        try:
+            if not unsubscribe_topic(ws_manager, topic):
+                self.debug_log.append(f"pybit websocket internals not found, {topic} stays subscribed", "WARNING")
+        except Exception as e:
+            self.debug_log.append(f"Could not unsubscribe from {topic} : {str(e)}", "WARNING")
 
     def _callback_symbol_price_feed(self, info: dict) -> None:
         """ Called every 100ms to get price feed of ticker """
+        if self.stream_recorder is not None:
+            self.stream_recorder.record(CHANNEL_PRICE, info)
+
+        symbol_price_info = cast(SymbolPriceInfo, dict(info).get("data"))
+
+        # Count messages per feed, late message of an unsubscribed feed are dropped
+        if not symbol_price_info or not self.price_feeds.record_message(str(symbol_price_info.get("symbol"))):
+            return
+
+        # Keep last price & best bid / ask of every fed symbol for the pre trade checks
+        market = parse_market_prices(symbol_price_info)
+        if market is not None:
+            self.latest_prices[symbol_price_info["symbol"]] = (market, time.monotonic())
 
         # Set data to None if wrong ticker so the UI class stop refreshing for nothing
         if not self.active_symbol_name:
             self.active_symbol_latest_price = None
             return
 
-        symbol_price_info = cast(SymbolPriceInfo, dict(info).get("data"))
-
         # Set active_symbol_latest_price if symbol 
         if symbol_price_info and symbol_price_info.get("symbol") == self.active_symbol_name:
             self.active_symbol_latest_price = symbol_price_info
+            self._notify_update()
 
     # Public methods #
     def get_active_symbol(self):
@@ -219,14 +582,46 @@ class Bybit(Exchange):
 
     def get_current_positions(self) -> list[Position]:
         """ Get current active position """
-        return self.current_active_positions
+        return self.position_store.positions()
+
+    def get_position_for_symbol(self, symbol: str | None) -> Position | None:
+        return self.position_store.get(symbol)
+
+    def get_price_scale(self, symbol: str) -> int | None:
+        symbol_filters = self.symbol_catalogue.get(symbol)
+        return symbol_filters["price_scale"] if symbol_filters is not None else None
 
     def get_error_log(self, flush: bool = True) -> list:
-        if flush:
-            copy = self.debug_log.copy()
-            self.debug_log = []
-            return copy
-        return self.debug_log
+        return [format_entry(entry) for entry in self.debug_log.read(only_new=flush)]
+
+    def get_stats(self, name: str) -> dict | None:
+        match name:
+            case "conn":
+                return self.http_pool.get_stats()
+            case "rate":
+                return self.http_client.get_stats()
+            case "log":
+                return self.debug_log.get_stats()
+            case "feeds":
+                return self.price_feeds.get_stats()
+            case "sim":
+                return self.simulator.get_stats() if self.simulator is not None else None
+            case "latency":
+                return self.latency.get_stats()
+            case "record":
+                return self.stream_recorder.get_stats() if self.stream_recorder is not None else None
+        return None
+
+    def dump_stats(self, name: str) -> str | None:
+        if name == "latency":
+            return self.latency.dump()
+        return None
+
+    def reset_stats(self, name: str) -> bool:
+        if name == "latency":
+            self.latency.reset()
+            return True
+        return False
 
     def get_latest_price_info_for_active_symbol(self) -> SymbolPriceInfo | None:
         """ Get price info for active symbol """
@@ -236,11 +631,8 @@ class Bybit(Exchange):
     def terminal_cmd_switch_active_symbol(self, new_symbol: str) -> Tuple[bool, str]:
         """ Cmd to switch active symbol """
         try:
-            # Check if ticker exist
-            symbol_info = next((info for info in self.symbols
-                                if info["name"] == new_symbol), None)
-            # If not, leave
-            if symbol_info is None:
+            # Check if ticker exist, if not, leave
+            if new_symbol not in self.symbol_catalogue:
                 raise ValueError(f"Symbol {new_symbol} not supported by Bybit")
 
             self.active_symbol_name = new_symbol
@@ -248,15 +640,8 @@ class Bybit(Exchange):
             # Load current position for this symbol
             self._get_current_position_for_symbol(new_symbol)
 
-            # Check if ticker already subscribed
-            symbol_already_subscribed = next((ticker for ticker in self.already_subscribed_symbol_price
-                                if ticker == new_symbol), None)
-
-            # connect to price feed
-            if symbol_already_subscribed is None:
-                self.websocket_no_auth_client.instrument_info_stream(self._callback_symbol_price_feed,
-                                                                 self.active_symbol_name)
-                self.already_subscribed_symbol_price.append(self.active_symbol_name)
+            # connect to price feed (if not already), least recently used feeds over the limit are unsubscribed
+            self.price_feeds.touch(new_symbol)
 
             return True, SUCCESS_RETURN
         except Exception as e:
@@ -264,6 +649,35 @@ class Bybit(Exchange):
             self.active_symbol_info = None
             return False, str(e)
 
+    def terminal_cmd_unsubscribe_symbol(self, symbol: str) -> Tuple[bool, str]:
+        """ Cmd to stop the price feed of a symbol """
+        try:
+            if not self.price_feeds.unsubscribe(symbol):
+                raise ValueError(f"No price feed for {symbol}")
+
+            if symbol == self.active_symbol_name:
+                self.active_symbol_latest_price = None
+            return True, SUCCESS_RETURN
+        except Exception as e:
+            return False, str(e)
+
+    def terminal_cmd_record_stream(self, path: str | None) -> Tuple[bool, str]:
+        """ Cmd to start recording websocket messages to path, stop if path is None """
+        try:
+            if path is None:
+                if self.stream_recorder is None:
+                    raise ValueError("Not recording")
+                recorder, self.stream_recorder = self.stream_recorder, None
+                recorder.close()
+                return True, f"{recorder.frames} messages recorded to {recorder.path}"
+
+            if self.stream_recorder is not None:
+                raise ValueError(f"Already recording to {self.stream_recorder.path}")
+            self.stream_recorder = StreamRecorder(path or STREAM_RECORD_PATH)
+            return True, f"Recording to {self.stream_recorder.path}"
+        except Exception as e:
+            return False, str(e)
+
     def terminal_cmd_cancel_all_orders(self) -> Tuple[bool, str, int]:
         """ Will cancel all limit orders for current ticker """
         try:
@@ -288,8 +702,7 @@ class Bybit(Exchange):
     def terminal_cmd_set_scale_orders(self, scale_order_data: ScaleOrdersData) -> Tuple[bool, str]:
         """ Place multiple orders based on parameters """
         try:
-            ticker_info = next((info for info in self.symbols
-                                if info["name"] == self.active_symbol_name), None)
+            ticker_info = self.symbol_catalogue.get(self.active_symbol_name)
 
             if ticker_info is None:
                 raise ValueError(f"Missing ticker info to put scale orders")
@@ -299,8 +712,8 @@ class Bybit(Exchange):
             scale_to = scale_order_data.get("scale_to")
 
             return self._send_limit_orders(build_scale_orders(
-                self.current_active_positions,
-                cast(Symbol, ticker_info),
+                self.position_store.positions_for_symbol(self.active_symbol_name),
+                ticker_info,
                 number_of_orders,
                 scale_from,
                 scale_to))
@@ -311,8 +724,7 @@ class Bybit(Exchange):
     def terminal_cmd_send_single_tp_order(self, single_tp_data: SingleTpOrder) -> Tuple[bool, str]:
         """ Place one tp order based on parameters """
         try:
-            ticker_info = next((info for info in self.symbols
-                                if info["name"] == self.active_symbol_name), None)
+            ticker_info = self.symbol_catalogue.get(self.active_symbol_name)
 
             if ticker_info is None:
                 raise ValueError(f"Missing ticker info to single tp order")
@@ -320,8 +732,8 @@ class Bybit(Exchange):
             percent_away = single_tp_data.get("percent_away")
     
             return self._send_limit_orders([build_single_tp_order(
-                self.current_active_positions,
-                cast(Symbol, ticker_info),
+                self.position_store.positions_for_symbol(self.active_symbol_name),
+                ticker_info,
                 percent_away)])
         except Exception as e:
             self.debug_log.append("Error in terminal_cmd_set_single_tp_order" + str(e))
@@ -1,7 +1,13 @@
 import math
 from abstract.positions_info import Position
-from abstract.symbols_info import Symbol
-from typing import Literal, TypedDict
+from .symbol_catalogue import SymbolFilters
+from typing import Literal, Tuple, TypedDict
+
+# Guard against float noise, value / step can land on 1234.0000000001 when it is exactly 1234 steps
+STEP_EPSILON = 1e-9
+# Failed orders listed in a cmd result, the others are counted
+MAX_REPORTED_ERRORS = 5
+
 
 class PositionStreamData(TypedDict):
     topic: str
@@ -27,6 +33,14 @@ class ScaleOrder(TypedDict):
     position_idx: int
 
 
+class OrderResult(TypedDict):
+    symbol: str
+    price: float
+    qty: float
+    order_id: str | None
+    error: str | None
+
+
 def filter_postion_with_zero_size(raw_postion: list[Position]):
     return list(filter(lambda position: position.get("size") > 0.0, raw_postion))
 
@@ -48,19 +62,71 @@ def ensure_http_result(http_result: HttpResult) -> HttpResult:
     return http_result
 
 
-def remove_space_and_split(string: str) -> list[str]:
-    return " ".join(string.split()).split(" ")
+def summarize_order_results(results: list[OrderResult], elapsed_ms: float) -> Tuple[bool, str]:
+    """ Turn a batch of order results into the (success, msg) tuple used by terminal cmds """
+    failed = [result for result in results if result.get("error") is not None]
+
+    if not failed:
+        return True, f"{len(results)} orders acked in {elapsed_ms:.0f}ms"
+
+    # Each failed order with its reason, capped so a whole ladder does not flood the line (all are in the debug log)
+    errors = [f"{result.get('qty')}@{result.get('price')} {result.get('error')}" for result in failed[:MAX_REPORTED_ERRORS]]
+    if len(failed) > MAX_REPORTED_ERRORS:
+        errors.append(f"+{len(failed) - MAX_REPORTED_ERRORS} more")
+    return False, (f"{len(failed)}/{len(results)} orders failed (last ack after {elapsed_ms:.0f}ms) : "
+                   + " | ".join(errors))
+
+
+def price_to_ticks(price: float, tick_size: float) -> int:
+    """ Price to an integer number of ticks, rounded up like the builders always did """
+    return math.ceil(price / tick_size - STEP_EPSILON)
+
+
+def ticks_to_prices(ticks: list[int], tick_size: float, price_scale: int) -> list[float]:
+    """ Integer ticks to prices, integer math then one division by the scale (exact decimal rounding) """
+    scale_factor = 10 ** price_scale
+    tick_units = round(tick_size * scale_factor)
+    return [(tick * tick_units) / scale_factor for tick in ticks]
+
+
+def ticks_to_price(ticks: int, tick_size: float, price_scale: int) -> float:
+    return ticks_to_prices([ticks], tick_size, price_scale)[0]
+
+
+def qty_to_lots(qty: float, qty_step: float) -> int:
+    """ Qty to an integer number of lots, rounded down so we never go above the position """
+    return math.floor(qty / qty_step + STEP_EPSILON)
+
+
+def lots_to_qty(lots: int, qty_step: float, qty_scale: int) -> float:
+    return round(lots * qty_step, qty_scale)
 
 
 def round_to_tick(value: float, tick_size: float) -> float:
-    return math.ceil(value / tick_size) * tick_size
+    return price_to_ticks(value, tick_size) * tick_size
+
+
+def spread_ticks(from_tick: int, to_tick: int, number_of_orders: int) -> list[int]:
+    """ Spread orders evenly on integer ticks, first and last order land exactly on from / to """
+    if number_of_orders == 1:
+        return [from_tick]
 
+    span = abs(to_tick - from_tick)
+    direction = 1 if to_tick >= from_tick else -1
+    return [from_tick + direction * ((i * span) // (number_of_orders - 1)) for i in range(number_of_orders)]
 
-def _get_current_position_data(current_positions: list[Position], ticker_info: Symbol):
+
+def split_lots(total_lots: int, number_of_orders: int) -> list[int]:
+    """ Split lots between orders, the remainder goes one lot each to the first orders (closest to entry) """
+    base_lots, remainder = divmod(total_lots, number_of_orders)
+    return [base_lots + 1 if i < remainder else base_lots for i in range(number_of_orders)]
+
+
+def _get_current_position_data(current_positions: list[Position], ticker_info: SymbolFilters):
     return next((pos for pos in current_positions
                                   if pos["symbol"] == ticker_info["name"] and pos["size"] > 0.0), None)
 
-def _guard_ticker_and_position_info(current_positions: list[Position] | None, ticker_info: Symbol):
+def _guard_ticker_and_position_info(current_positions: list[Position] | None, ticker_info: SymbolFilters):
     if current_positions is None:
         raise ValueError("You don't have any position opened")
     elif ticker_info is None:
@@ -68,7 +134,7 @@ def _guard_ticker_and_position_info(current_positions: list[Position] | None, ti
 
 def build_single_tp_order(
         current_positions: list[Position] | None,
-        ticker_info: Symbol,
+        ticker_info: SymbolFilters,
         percent_away: float) -> ScaleOrder:
     
     _guard_ticker_and_position_info(current_positions, ticker_info)
@@ -81,27 +147,28 @@ def build_single_tp_order(
         raise ValueError("No parameter given for single tp order")
 
     # Extract data from ticker info
-    ticker_tick_size = float(ticker_info["price_filter"]["tick_size"])
-    ticker_price_scale = int(ticker_info["price_scale"])
+    ticker_tick_size = ticker_info["tick_size"]
+    ticker_price_scale = ticker_info["price_scale"]
 
     # Extract data from current position
     side = str(current_position_data.get("side"))
     entry_price = float(current_position_data.get("entry_price"))
     pos_size = float(current_position_data.get("size"))
 
-    entry_price = float(current_position_data.get("entry_price"))
-    # Calculate starting and ending price of the range (scale)
-
+    # Calculate the tp price, on an integer number of ticks
     entry_to_percent = (entry_price / 100)
     limit_value = entry_to_percent * percent_away if side == "Buy" else entry_to_percent * -percent_away 
-    limit_price = round_to_tick(entry_price + limit_value, ticker_tick_size)
+    limit_tick = price_to_ticks(entry_price + limit_value, ticker_tick_size)
+
+    # Whole position on an integer number of lots
+    pos_lots = qty_to_lots(pos_size, ticker_info["qty_step"])
 
     take_profit_order: ScaleOrder = {
             "symbol": ticker_info["name"],
             "side": "Buy" if side == "Sell" else "Sell",
             "order_type": "Limit",
-            "qty": pos_size,
-            "price": round(limit_price, ticker_price_scale),
+            "qty": lots_to_qty(pos_lots, ticker_info["qty_step"], ticker_info["qty_scale"]),
+            "price": ticks_to_price(limit_tick, ticker_tick_size, ticker_price_scale),
             "time_in_force": "PostOnly",
             "reduce_only": True,
             "close_on_trigger": False,
@@ -113,7 +180,7 @@ def build_single_tp_order(
 
 def build_scale_orders(
         current_positions: list[Position] | None,
-        ticker_info: Symbol,
+        ticker_info: SymbolFilters,
         number_of_orders: int,
         scale_from: float,
         scale_to: float) -> list[ScaleOrder]:
@@ -128,59 +195,57 @@ def build_scale_orders(
     if current_position_data is None:
         raise ValueError("No current position found")
 
+    if number_of_orders <= 0:
+        raise ValueError("Need at least one scale order")
+
     # Extract data from ticker info
-    ticker_tick_size = float(ticker_info["price_filter"]["tick_size"])
-    ticker_price_scale = int(ticker_info["price_scale"])
-    min_trad_quant = float(ticker_info["lot_size_filter"]["min_trading_qty"])
-    max_trad_quant = float(ticker_info["lot_size_filter"]["post_only_max_trading_qty"])
+    ticker_tick_size = ticker_info["tick_size"]
+    ticker_price_scale = ticker_info["price_scale"]
+    qty_step = ticker_info["qty_step"]
+    qty_scale = ticker_info["qty_scale"]
+    min_trad_quant = ticker_info["min_qty"]
+    max_trad_quant = ticker_info["post_only_max_qty"]
 
     # Extract data from current position
     side = str(current_position_data.get("side"))
     entry_price = float(current_position_data.get("entry_price"))
     pos_size = float(current_position_data.get("size"))
 
-    # Calculate qty of token per order
-    amount_per_order = pos_size / number_of_orders
+    # Split the position on integer lots, sum of all orders is exactly the position
+    lots_per_order = split_lots(qty_to_lots(pos_size, qty_step), number_of_orders)
+    smallest_amount = lots_to_qty(lots_per_order[-1], qty_step, qty_scale)
+    biggest_amount = lots_to_qty(lots_per_order[0], qty_step, qty_scale)
 
     # Guards based on Bybit orderbook
-    if amount_per_order < min_trad_quant:
+    if smallest_amount < min_trad_quant:
         raise ValueError(f"Scaling too big, min size per limit order : {min_trad_quant}")
-    elif amount_per_order > max_trad_quant:
+    elif biggest_amount > max_trad_quant:
         raise ValueError(f"Scaling too small, max size per limit order : {max_trad_quant}")
     
-    # Calculate starting and ending price of the range (scale)
+    # Calculate starting and ending price of the range (scale), on integer ticks
     entry_to_percent = (entry_price / 100)
     from_value = entry_to_percent * scale_from if side == "Buy" else entry_to_percent * -scale_from 
     to_value = entry_to_percent * scale_to if side == "Buy" else entry_to_percent * -scale_to 
     
-    from_price = round_to_tick(entry_price + from_value, ticker_tick_size)
-    to_price = round_to_tick( entry_price + to_value, ticker_tick_size)
-
-    # Calculate step between each scale order
-    positive_diff = to_price - from_price if side == "Buy" else from_price - to_price
-    raw_step = round_to_tick(positive_diff / (number_of_orders - 1), ticker_tick_size)
-    step = raw_step * 1 if side == "Buy" else raw_step * -1
-    
-    # Create scale order array
-    i = 0
-    orders: list[ScaleOrder] = []
-    while i < number_of_orders:
-        orders.append({
-            "symbol": ticker_info["name"],
-            "side": "Buy" if side == "Sell" else "Sell",
+    from_tick = price_to_ticks(entry_price + from_value, ticker_tick_size)
+    to_tick = price_to_ticks(entry_price + to_value, ticker_tick_size)
+
+    # Create the whole ladder in one pass, lots only have 2 possible values so qty are converted once
+    prices = ticks_to_prices(spread_ticks(from_tick, to_tick, number_of_orders), ticker_tick_size, ticker_price_scale)
+    qty_by_lots = {lots: lots_to_qty(lots, qty_step, qty_scale) for lots in set(lots_per_order)}
+    symbol = ticker_info["name"]
+    order_side = "Buy" if side == "Sell" else "Sell"
+    orders: list[ScaleOrder] = [{
+            "symbol": symbol,
+            "side": order_side,
             "order_type": "Limit",
-            "qty": amount_per_order,
-            "price": round(from_price + i * step, ticker_price_scale),
+            "qty": qty_by_lots[lots],
+            "price": price,
             "time_in_force": "PostOnly",
             "reduce_only": True,
             "close_on_trigger": False,
             "position_idx": 0
-        })
-        i = i + 1
-
-    # Guard so price never goes above range
-    if orders[number_of_orders - 1]["price"] != to_price:
-        orders[number_of_orders - 1]["price"] = round(to_price, ticker_price_scale)
+        } for price, lots in zip(prices, lots_per_order)]
 
     # Return list of dict
     return orders
@@ -0,0 +1,102 @@
+import threading
+
+from concurrent.futures import ThreadPoolExecutor
+from requests import Request, Session
+from requests.adapters import HTTPAdapter
+
+# Bybit closes idle keep-alive connections, ping a bit more often than that
+KEEPALIVE_INTERVAL_S = 20.0
+# Cheapest public endpoint, no auth & no rate limit on the private buckets
+KEEPALIVE_PATH = "/v2/public/time"
+KEEPALIVE_TIMEOUT_S = 5.0
+# Pools (one per pool key) kept by the adapter, a request with other connection settings
+# (ie verify / cert) gets its own pool instead of evicting the warm one
+POOL_KEYS = 4
+
+
+class WarmConnectionPool(object):
+    """ Keep a pool of warm keep-alive connections to the REST endpoint
+
+    The first order after idle would otherwise pay for DNS + TCP + TLS setup.
+    Connections are opened at start and pinged every KEEPALIVE_INTERVAL_S, all in parallel
+    so the whole pool stays warm for an order burst.
+    """
+
+    def __init__(self, session: Session, endpoint: str, pool_size: int) -> None:
+        self.session = session
+        self.endpoint = endpoint
+        self.pool_size = pool_size
+
+        self.adapter = HTTPAdapter(pool_connections=POOL_KEYS, pool_maxsize=pool_size)
+        self.session.mount(endpoint, self.adapter)
+
+        self.keepalive_requests = 0
+        self.keepalive_errors = 0
+
+        # evicted pools close their connections, counted so churn shows in the stats
+        self.evicted_pools = 0
+        self._evicted_requests = 0
+        self._evicted_connections = 0
+        pools = self.adapter.poolmanager.pools
+        self._dispose_pool = pools.dispose_func
+        pools.dispose_func = self._on_pool_evicted
+
+        self._stop_event = threading.Event()
+        self._thread: threading.Thread | None = None
+
+    def _on_pool_evicted(self, pool) -> None:
+        self.evicted_pools += 1
+        self._evicted_requests += pool.num_requests
+        self._evicted_connections += pool.num_connections
+        if self._dispose_pool is not None:
+            self._dispose_pool(pool)
+
+    def _ping(self) -> None:
+        try:
+            # sent like pybit sends orders (send, no env merge of verify / proxies),
+            # same pool key so the orders get the connections warmed here
+            request = self.session.prepare_request(Request("GET", self.endpoint + KEEPALIVE_PATH))
+            self.session.send(request, timeout=KEEPALIVE_TIMEOUT_S).close()
+            self.keepalive_requests += 1
+        except Exception:
+            self.keepalive_errors += 1
+
+    def warm_up(self) -> None:
+        """ Ping with pool_size requests at once, forces the pool to open / keep pool_size connections """
+        with ThreadPoolExecutor(max_workers=self.pool_size, thread_name_prefix="http_warm_up") as executor:
+            for _ in range(self.pool_size):
+                executor.submit(self._ping)
+
+    def _keepalive_loop(self) -> None:
+        self.warm_up()
+        while not self._stop_event.wait(KEEPALIVE_INTERVAL_S):
+            self.warm_up()
+
+    def start(self) -> None:
+        self._thread = threading.Thread(target=self._keepalive_loop, name="http_keepalive", daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        self._stop_event.set()
+
+    def get_stats(self) -> dict:
+        """ Connection reuse stats, opened_connections should stay at pool size while requests grow
+
+        Counts include the pools evicted since start, evicted_pools > 0 means connections were thrown away.
+        """
+        pools = self.adapter.poolmanager.pools
+        connection_pools = [pools.get(key) for key in pools.keys()]
+
+        requests = self._evicted_requests + sum(pool.num_requests for pool in connection_pools if pool is not None)
+        opened_connections = self._evicted_connections + sum(pool.num_connections for pool in connection_pools
+                                                             if pool is not None)
+        return {
+            "pool_size": self.pool_size,
+            "pools": len(connection_pools),
+            "evicted_pools": self.evicted_pools,
+            "requests": requests,
+            "opened_connections": opened_connections,
+            "reused_connections": max(0, requests - opened_connections),
+            "keepalive_requests": self.keepalive_requests,
+            "keepalive_errors": self.keepalive_errors
+        }
@@ -0,0 +1,99 @@
+import threading
+
+from abstract.positions_info import Position
+from typing import Literal, Tuple, TypedDict
+
+# (symbol, side, position_idx), one-way mode uses position_idx 0 for both sides
+PositionKey = Tuple[str, str, int]
+
+
+class PositionEvent(TypedDict):
+    kind: Literal["opened", "increased", "reduced", "closed"]
+    symbol: str
+    position: Position
+    previous_size: float
+
+
+def get_position_key(position: Position) -> PositionKey:
+    return (str(position.get("symbol")), str(position.get("side")), int(position.get("position_idx", 0) or 0))  # type: ignore
+
+
+class PositionStore(object):
+    """ Open positions keyed by (symbol, side, position_idx), updated with websocket deltas
+
+    Every update returns typed events instead of making the caller diff position lists,
+    cost only depends on the number of positions in the message.
+    """
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self.by_key: dict[PositionKey, Position] = {}
+        self.by_symbol: dict[str, dict[PositionKey, Position]] = {}
+
+    def _remove(self, key: PositionKey) -> None:
+        self.by_key.pop(key, None)
+        symbol_positions = self.by_symbol.get(key[0])
+        if symbol_positions is not None:
+            symbol_positions.pop(key, None)
+            if not symbol_positions:
+                del self.by_symbol[key[0]]
+
+    def _apply_one(self, position: Position) -> PositionEvent | None:
+        key = get_position_key(position)
+        size = float(position.get("size") or 0.0)
+        previous = self.by_key.get(key)
+        previous_size = float(previous.get("size")) if previous is not None else 0.0
+
+        # bybit send closed positions with a size of 0
+        if size <= 0.0:
+            if previous is None:
+                return None
+            self._remove(key)
+            return {"kind": "closed", "symbol": key[0], "position": position, "previous_size": previous_size}
+
+        self.by_key[key] = position
+        self.by_symbol.setdefault(key[0], {})[key] = position
+
+        if previous is None:
+            kind = "opened"
+        elif size > previous_size:
+            kind = "increased"
+        elif size < previous_size:
+            kind = "reduced"
+        else:
+            # same size, only other fields changed (entry price, pnl..)
+            return None
+        return {"kind": kind, "symbol": key[0], "position": position, "previous_size": previous_size}  # type: ignore
+
+    def apply(self, positions: list[Position]) -> list[PositionEvent]:
+        """ Apply positions from a websocket message, return what changed """
+        with self._lock:
+            events = [self._apply_one(position) for position in positions]
+        return [event for event in events if event is not None]
+
+    def replace_symbol(self, symbol: str, positions: list[Position]) -> list[PositionEvent]:
+        """ Apply a full snapshot of one symbol (REST), positions missing from it are closed """
+        with self._lock:
+            snapshot_keys = {get_position_key(position) for position in positions}
+            events: list[PositionEvent] = []
+            for key, position in list(self.by_symbol.get(symbol, {}).items()):
+                if key not in snapshot_keys:
+                    self._remove(key)
+                    events.append({"kind": "closed", "symbol": symbol, "position": position,
+                                   "previous_size": float(position.get("size"))})
+            events += [event for event in (self._apply_one(position) for position in positions) if event is not None]
+        return events
+
+    def positions(self) -> list[Position]:
+        with self._lock:
+            return list(self.by_key.values())
+
+    def positions_for_symbol(self, symbol: str | None) -> list[Position]:
+        with self._lock:
+            return list(self.by_symbol.get(symbol, {}).values()) if symbol else []
+
+    def get(self, symbol: str | None) -> Position | None:
+        """ First open position for this symbol """
+        with self._lock:
+            symbol_positions = self.by_symbol.get(symbol, {}) if symbol else {}
+            return next(iter(symbol_positions.values()), None)
@@ -0,0 +1,118 @@
+from .bybit_tools import ScaleOrder, STEP_EPSILON, lots_to_qty, qty_to_lots, ticks_to_price
+from .symbol_catalogue import SymbolFilters
+from typing import Tuple, TypedDict
+import math
+
+# Orders further than this % from the last price are refused (fat finger guard), None = no band.
+# Off by default, a wide tp ladder on a volatile symbol is a valid order for Bybit
+DEFAULT_PRICE_BAND_PERCENT: float | None = None
+
+
+class MarketPrices(TypedDict):
+    last_price: float
+    # best bid / ask of the price feed, None if not sent
+    best_bid: float | None
+    best_ask: float | None
+
+
+def parse_market_prices(price_info: dict) -> MarketPrices | None:
+    """ Prices of an instrument_info message (pybit merges deltas, bid1 / ask1 are kept), None without a last price """
+    try:
+        last_price = float(price_info["last_price"])
+    except (KeyError, TypeError, ValueError):
+        return None
+
+    def optional_price(key: str) -> float | None:
+        try:
+            price = float(price_info[key])
+        except (KeyError, TypeError, ValueError):
+            return None
+        return price if price > 0.0 else None
+
+    return {"last_price": last_price, "best_bid": optional_price("bid1_price"), "best_ask": optional_price("ask1_price")}
+
+
+def _is_multiple_of(value: float, step: float) -> bool:
+    steps = value / step
+    return abs(steps - round(steps)) < STEP_EPSILON * max(1.0, abs(steps))
+
+
+def validate_order(order: ScaleOrder, filters: SymbolFilters, market: MarketPrices | None,
+                   price_band_percent: float | None = DEFAULT_PRICE_BAND_PERCENT,
+                   auto_fix: bool = True) -> Tuple[ScaleOrder | None, str | None]:
+    """ Check one order against the instrument filters and the market prices
+
+    Return the order to send (maybe fixed) and None, or None and the reason it was rejected
+    """
+    fixed_order = order.copy()
+    side = order["side"]
+    price = float(order["price"])
+    qty = float(order["qty"])
+
+    if order["symbol"] != filters["name"]:
+        return None, f"order symbol {order['symbol']} does not match {filters['name']}"
+
+    # Tick alignment, snap away from the market so a fixed order stays passive
+    if not _is_multiple_of(price, filters["tick_size"]):
+        if not auto_fix:
+            return None, f"price {price} is not a multiple of tick size {filters['tick_size']}"
+        steps = price / filters["tick_size"]
+        ticks = math.ceil(steps - STEP_EPSILON) if side == "Sell" else math.floor(steps + STEP_EPSILON)
+        price = ticks_to_price(ticks, filters["tick_size"], filters["price_scale"])
+        fixed_order["price"] = price
+
+    # Qty step, round down so a reduce only order never asks for more than the position
+    if not _is_multiple_of(qty, filters["qty_step"]):
+        if not auto_fix:
+            return None, f"qty {qty} is not a multiple of qty step {filters['qty_step']}"
+        qty = lots_to_qty(qty_to_lots(qty, filters["qty_step"]), filters["qty_step"], filters["qty_scale"])
+        fixed_order["qty"] = qty
+
+    # Min / max qty
+    max_qty = filters["post_only_max_qty"] if order["time_in_force"] == "PostOnly" else filters["max_qty"]
+    if qty < filters["min_qty"]:
+        return None, f"qty {qty} below min qty {filters['min_qty']}"
+    if qty > max_qty:
+        return None, f"qty {qty} above max qty {max_qty}"
+
+    # Exchange price limits
+    if price < filters["min_price"] or price > filters["max_price"]:
+        return None, f"price {price} outside of [{filters['min_price']}, {filters['max_price']}]"
+
+    # Checks against the market, only when we know the prices
+    if market is not None and market["last_price"] > 0.0:
+        last_price = market["last_price"]
+        if price_band_percent and abs(price - last_price) / last_price * 100 > price_band_percent:
+            return None, f"price {price} more than {price_band_percent}% away from last price {last_price}"
+
+        # A PostOnly order that would take liquidity is cancelled by Bybit anyway, compared to the
+        # other side of the book, a resting order at the last price is fine
+        if order["time_in_force"] == "PostOnly":
+            if side == "Sell":
+                crossed_price, crosses = ((market["best_bid"], price <= market["best_bid"]) if market["best_bid"] is not None
+                                          else (last_price, price < last_price))
+            else:
+                crossed_price, crosses = ((market["best_ask"], price >= market["best_ask"]) if market["best_ask"] is not None
+                                          else (last_price, price > last_price))
+            if crosses:
+                return None, f"PostOnly {side} at {price} would cross {crossed_price}"
+
+    return fixed_order, None
+
+
+def validate_orders(orders: list[ScaleOrder], filters: SymbolFilters | None, market: MarketPrices | None,
+                    price_band_percent: float | None = DEFAULT_PRICE_BAND_PERCENT,
+                    auto_fix: bool = True) -> Tuple[list[ScaleOrder], list[Tuple[ScaleOrder, str]]]:
+    """ Split orders in the ones to send and the rejected ones with their reason, no network involved """
+    if filters is None:
+        return [], [(order, "no instrument filters for this symbol") for order in orders]
+
+    valid_orders: list[ScaleOrder] = []
+    rejected_orders: list[Tuple[ScaleOrder, str]] = []
+    for order in orders:
+        checked_order, error = validate_order(order, filters, market, price_band_percent, auto_fix)
+        if checked_order is None:
+            rejected_orders.append((order, str(error)))
+        else:
+            valid_orders.append(checked_order)
+    return valid_orders, rejected_orders
@@ -0,0 +1,56 @@
+import json
+
+from typing import Any, Callable
+
+# Every access to pybit private websocket internals is in this file, checked against pybit 2.4.1
+# (pinned in requirements.txt). Each hook checks what it touches first and reports False when the
+# internals are not there, the caller then keeps pybit's default behaviour.
+
+
+def _has_callable(obj: Any, name: str) -> bool:
+    return callable(getattr(obj, name, None))
+
+
+def wrap_raw_message_handler(ws_manager: Any, wrapper: Callable[[Callable[[str], None], str], None]) -> bool:
+    """ Call wrapper(on_message, raw_message) for each raw socket message, before pybit parses it
+
+    pybit's WebSocketApp calls self._on_message(msg) through a lambda, so it can be replaced on the instance
+    """
+    if ws_manager is None or not _has_callable(ws_manager, "_on_message"):
+        return False
+    on_message = ws_manager._on_message
+    ws_manager._on_message = lambda raw_message: wrapper(on_message, raw_message)
+    return True
+
+
+def wrap_message_callback(ws_manager: Any, wrapper: Callable[[Callable[[dict], None], dict], None]) -> bool:
+    """ Call wrapper(callback, message) for each parsed message, before pybit dispatches it to the topic callbacks """
+    if ws_manager is None or not _has_callable(ws_manager, "callback"):
+        return False
+    callback = ws_manager.callback
+    ws_manager.callback = lambda message: wrapper(callback, message)
+    return True
+
+
+def can_unsubscribe(ws_manager: Any) -> bool:
+    """ pybit 2.4 has no unsubscribe, unsubscribe_topic needs the socket & the topic bookkeeping """
+    return (ws_manager is not None
+            and _has_callable(getattr(ws_manager, "ws", None), "send")
+            and isinstance(getattr(ws_manager, "subscriptions", None), list)
+            and isinstance(getattr(ws_manager, "data", None), dict))
+
+
+def unsubscribe_topic(ws_manager: Any, topic: str) -> bool:
+    """ Send the unsubscribe op & forget the topic, False (still subscribed) if the internals are not there
+
+    pybit replays its subscribe messages on reconnect & keeps the last snapshot of the topic, both are cleaned.
+    The unsubscribe reply is unknown to pybit, drop it with wrap_message_callback first.
+    """
+    if not can_unsubscribe(ws_manager):
+        return False
+
+    ws_manager.ws.send(json.dumps({"op": "unsubscribe", "args": [topic]}))
+    ws_manager.subscriptions = [message for message in ws_manager.subscriptions
+                                if topic not in json.loads(message).get("args", [])]
+    ws_manager.data.pop(topic, None)
+    return True
@@ -0,0 +1,140 @@
+import heapq
+import itertools
+import threading
+import time
+
+from typing import Any, Callable
+
+# Endpoint classes, each one has its own token bucket
+ENDPOINT_CREATE = "create"
+ENDPOINT_CANCEL = "cancel"
+ENDPOINT_QUERY = "query"
+
+# Requests per minute allowed by Bybit for each endpoint class
+DEFAULT_LIMITS_PER_MIN = {
+    ENDPOINT_CREATE: 100,
+    ENDPOINT_CANCEL: 100,
+    ENDPOINT_QUERY: 120,
+}
+# Stay a bit under the official limit, the exchange and our clock never agree exactly
+SAFETY_MARGIN = 0.9
+
+# Lower value goes first when the tokens of a bucket are scarce. Bybit limits each endpoint class
+# on its own, so a priority only orders the waiters of one bucket: in the query bucket, the open orders
+# query of the auto tp goes before position / symbols refreshes
+PRIORITY_ORDER_PATH = 0
+PRIORITY_REFRESH = 1
+
+# pybit method -> (endpoint class, priority in its bucket)
+METHOD_LANES: dict[str, tuple[str, int]] = {
+    "cancel_active_order": (ENDPOINT_CANCEL, PRIORITY_ORDER_PATH),
+    "cancel_all_active_orders": (ENDPOINT_CANCEL, PRIORITY_ORDER_PATH),
+    "place_active_order": (ENDPOINT_CREATE, PRIORITY_ORDER_PATH),
+    "replace_active_order": (ENDPOINT_CREATE, PRIORITY_ORDER_PATH),
+    "query_active_order": (ENDPOINT_QUERY, PRIORITY_ORDER_PATH),
+    "my_position": (ENDPOINT_QUERY, PRIORITY_REFRESH),
+    "query_symbol": (ENDPOINT_QUERY, PRIORITY_REFRESH),
+}
+
+
+class TokenBucket(object):
+    """ Thread safe token bucket, waiters are served by priority then arrival order
+
+    Starts full with the server limit (minus the safety margin) so the first burst can never go over it.
+    """
+
+    def __init__(self, limit_per_min: int) -> None:
+        self.capacity = max(1.0, limit_per_min * SAFETY_MARGIN)
+        self.refill_per_s = self.capacity / 60.0
+        self.tokens = self.capacity
+        self.updated_at = time.monotonic()
+
+        self._cond = threading.Condition()
+        self._waiters: list[tuple[int, int]] = []
+        self._seq = itertools.count()
+
+        self.waited_requests = 0
+
+    def _refill(self) -> None:
+        now = time.monotonic()
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated_at) * self.refill_per_s)
+        self.updated_at = now
+
+    def acquire(self, priority: int) -> None:
+        """ Block until a token is available and this waiter is the most urgent one """
+        with self._cond:
+            ticket = (priority, next(self._seq))
+            heapq.heappush(self._waiters, ticket)
+            waited = False
+            try:
+                while True:
+                    self._refill()
+                    if self._waiters[0] == ticket and self.tokens >= 1.0:
+                        self.tokens -= 1.0
+                        return
+                    waited = True
+                    missing = max(0.0, 1.0 - self.tokens)
+                    self._cond.wait(timeout=max(0.001, missing / self.refill_per_s))
+            finally:
+                self._waiters.remove(ticket)
+                heapq.heapify(self._waiters)
+                if waited:
+                    self.waited_requests += 1
+                self._cond.notify_all()
+
+    def sync(self, remaining: int, limit: int, reset_ms: int | None) -> None:
+        """ Align the bucket with the rate limit status sent back by Bybit """
+        with self._cond:
+            self._refill()
+            capacity = max(1.0, limit * SAFETY_MARGIN)
+            if capacity != self.capacity:
+                self.capacity = capacity
+                self.refill_per_s = capacity / 60.0
+            # the exchange is the source of truth, never believe we have more than it says
+            self.tokens = min(self.tokens, max(0.0, remaining - limit * (1 - SAFETY_MARGIN)))
+            if remaining <= 0 and reset_ms:
+                # nothing left until reset, refill starts at reset time
+                wait_s = max(0.0, reset_ms / 1000 - time.time())
+                self.tokens = -wait_s * self.refill_per_s
+            self._cond.notify_all()
+
+
+class RateLimitedHttp(object):
+    """ Wrap a pybit HTTP client, every call of a known endpoint takes a token of its bucket first
+
+    limits_per_min is the limit of the server per endpoint class, missing classes get Bybit's default limit.
+    """
+
+    def __init__(self, http_client: Any, limits_per_min: dict[str, int] | None = None) -> None:
+        self.http_client = http_client
+        limits = {**DEFAULT_LIMITS_PER_MIN, **(limits_per_min or {})}
+        self.buckets = {endpoint: TokenBucket(limit) for endpoint, limit in limits.items()}
+
+    def _call(self, method_name: str, method: Callable[..., Any], *args: Any, **kwargs: Any) -> Any:
+        endpoint, priority = METHOD_LANES[method_name]
+        bucket = self.buckets[endpoint]
+        bucket.acquire(priority)
+
+        result = method(*args, **kwargs)
+
+        # Bybit send back its own view of the limit with every private call
+        if isinstance(result, dict) and result.get("rate_limit") is not None:
+            try:
+                bucket.sync(int(result["rate_limit_status"]), int(result["rate_limit"]),
+                            int(result.get("rate_limit_reset_ms") or 0))
+            except (KeyError, TypeError, ValueError):
+                pass
+        return result
+
+    def __getattr__(self, name: str) -> Any:
+        attribute = getattr(self.http_client, name)
+        if name not in METHOD_LANES or not callable(attribute):
+            return attribute
+
+        def rate_limited(*args: Any, **kwargs: Any) -> Any:
+            return self._call(name, attribute, *args, **kwargs)
+        return rate_limited
+
+    def get_stats(self) -> dict:
+        return {endpoint: {"tokens": round(bucket.tokens, 2), "capacity": bucket.capacity, "waited": bucket.waited_requests}
+                for endpoint, bucket in self.buckets.items()}
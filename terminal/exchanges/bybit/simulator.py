@@ -0,0 +1,537 @@
+import json
+import random
+import threading
+import time
+import uuid
+
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from queue import Queue
+from typing import Any, Tuple, TypedDict
+from urllib.parse import parse_qsl, urlsplit
+
+from abstract.symbols_info import Symbol
+
+from pybit import usdt_perpetual
+from pybit._websocket_stream import _FuturesWebSocketManager
+
+# Bybit(domain=SIM_DOMAIN) talks to the simulator started in this process
+SIM_DOMAIN = "sim"
+# The simulator does not check signatures, any non empty key works
+SIM_API_KEY = "sim"
+
+# Endpoint classes share the names used by the client side rate limiter
+ENDPOINT_CREATE = "create"
+ENDPOINT_CANCEL = "cancel"
+ENDPOINT_QUERY = "query"
+
+# Bybit error codes sent back by the simulator
+RET_PARAMS_ERROR = 10001
+RET_RATE_LIMIT = 10006
+RET_ORDER_NOT_FOUND = 130010
+RET_ORDER_REJECTED = 130021
+
+
+class SimConfig(TypedDict, total=False):
+    latency_ms: float           # added to every REST response & websocket frame
+    jitter_ms: float            # random 0..jitter_ms added on top of latency
+    reject_rate: float          # 0..1, part of create / replace calls rejected
+    rate_limit_per_min: int     # per endpoint class, 0 = no limit
+    price_interval_ms: float    # price tick period of the instrument_info stream, 0 = prices only move with set_price
+    price_step_ticks: int       # max ticks the price moves on each tick
+    seed: int
+    symbols: list[Symbol]
+    prices: dict[str, float]
+    script: list[dict]          # steps, see run_script
+
+
+DEFAULT_SIM_CONFIG: SimConfig = {
+    "latency_ms": 0.0,
+    "jitter_ms": 0.0,
+    "reject_rate": 0.0,
+    "rate_limit_per_min": 0,
+    "price_interval_ms": 100.0,
+    "price_step_ticks": 2,
+    "seed": 0
+}
+
+
+def _make_symbol(name: str, price_scale: int, tick_size: str, qty_step: str, max_qty: int) -> Symbol:
+    return {
+        "name": name,
+        "price_scale": price_scale,
+        "price_filter": {"min_price": tick_size, "max_price": "1999999", "tick_size": tick_size},
+        "lot_size_filter": {"max_trading_qty": max_qty, "min_trading_qty": float(qty_step),  # type: ignore
+                            "qty_step": float(qty_step), "post_only_max_trading_qty": str(max_qty)}  # type: ignore
+    }
+
+
+DEFAULT_SIM_SYMBOLS: list[Symbol] = [
+    _make_symbol("BTCUSDT", 2, "0.50", "0.001", 100),
+    _make_symbol("ETHUSDT", 2, "0.05", "0.01", 1500),
+    _make_symbol("SOLUSDT", 3, "0.005", "0.1", 10000),
+]
+DEFAULT_SIM_PRICES = {"BTCUSDT": 20000.0, "ETHUSDT": 1500.0, "SOLUSDT": 30.0}
+
+_SIMULATORS: dict[str, "BybitSimulator"] = {}
+
+
+def get_simulator(domain: str | None) -> "BybitSimulator | None":
+    """ Running simulator registered under this websocket domain, None for the real exchange """
+    return _SIMULATORS.get(domain) if domain else None
+
+
+def load_sim_config(path: str | None) -> SimConfig:
+    """ Default config updated with the json file at path, if any """
+    config = dict(DEFAULT_SIM_CONFIG)
+    if path is not None:
+        with open(path, "r") as f:
+            config.update(json.load(f))
+    return config  # type: ignore
+
+
+class SimRequestError(Exception):
+    """ Bybit error response, ret_code != 0 """
+
+    def __init__(self, ret_code: int, ret_msg: str) -> None:
+        super().__init__(ret_msg)
+        self.ret_code = ret_code
+        self.ret_msg = ret_msg
+
+
+class SimSocket(object):
+    """ Stand-in for the websocket-client app of a pybit manager
+
+    Frames are delivered in order by one thread per connection, like the real socket thread,
+    so a slow callback slows down every topic of the connection.
+    """
+
+    def __init__(self, simulator: "BybitSimulator", manager: _FuturesWebSocketManager) -> None:
+        self.simulator = simulator
+        self.manager = manager
+        # pybit only checks this attribute to know if it is connected
+        self.sock = True
+        self.topics: set[str] = set()
+        self.snapshot_topics: set[str] = set()
+        self.frames_sent = 0
+
+        self._frames: Queue[Tuple[float, str] | None] = Queue()
+        self._last_due = 0.0
+        threading.Thread(target=self._deliver_loop, name="sim_ws", daemon=True).start()
+
+    def send(self, message: str) -> None:
+        """ Message sent by pybit (auth, subscribe, unsubscribe) """
+        self.simulator._handle_ws_request(self, json.loads(message))
+
+    def push(self, message: dict) -> None:
+        """ Queue a frame for the client, delivered after the simulated latency """
+        # a stream never reorders frames, jitter only delays
+        self._last_due = max(self._last_due, time.monotonic() + self.simulator._draw_latency_s())
+        self._frames.put((self._last_due, json.dumps(message)))
+
+    def close(self) -> None:
+        self.sock = False  # type: ignore
+        self._frames.put(None)
+
+    def _deliver_loop(self) -> None:
+        while True:
+            frame = self._frames.get()
+            if frame is None:
+                return
+            due, raw_message = frame
+            delay = due - time.monotonic()
+            if delay > 0:
+                time.sleep(delay)
+            self.frames_sent += 1
+            try:
+                self.manager._on_message(raw_message)
+            except Exception:
+                # the real socket thread dies here, stop delivering the same way
+                self.simulator.ws_errors += 1
+                return
+
+
+class SimWebSocket(usdt_perpetual.WebSocket):
+    """ pybit usdt_perpetual.WebSocket, connected to the simulator instead of the network
+
+    Only the socket is replaced, messages go through the pybit managers like live ones.
+    """
+
+    def __init__(self, simulator: "BybitSimulator", **kwargs: Any) -> None:
+        super().__init__(test=False, domain=SIM_DOMAIN, **kwargs)
+        self.simulator = simulator
+
+    def _sim_connect(self, manager: _FuturesWebSocketManager) -> _FuturesWebSocketManager:
+        manager.ws = SimSocket(self.simulator, manager)
+        manager.endpoint = SIM_DOMAIN
+        if manager.api_key and manager.api_secret:
+            manager._auth()
+        self.active_connections.append(manager)
+        return manager
+
+    def _ws_public_subscribe(self, topic: str, callback: Any, symbol: str) -> None:
+        if not self.ws_public:
+            self.ws_public = self._sim_connect(_FuturesWebSocketManager(usdt_perpetual.ws_name, **self.public_kwargs))
+        self.ws_public.subscribe(topic, callback, symbol)
+
+    def _ws_private_subscribe(self, topic: str, callback: Any) -> None:
+        if not self.ws_private:
+            self.ws_private = self._sim_connect(_FuturesWebSocketManager(usdt_perpetual.ws_name, **self.kwargs))
+        self.ws_private.subscribe(topic, callback)
+
+
+class _SimRequestHandler(BaseHTTPRequestHandler):
+    # keep-alive, so the client connection pool is exercised like with the real endpoint
+    protocol_version = "HTTP/1.1"
+    server: "_SimHttpServer"
+
+    def log_message(self, format: str, *args: Any) -> None:
+        pass
+
+    def _reply(self, params: dict) -> None:
+        body = json.dumps(self.server.simulator._handle_rest(self.command, urlsplit(self.path).path, params)).encode()
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_GET(self) -> None:
+        self._reply(dict(parse_qsl(urlsplit(self.path).query)))
+
+    def do_POST(self) -> None:
+        length = int(self.headers.get("Content-Length") or 0)
+        raw_body = self.rfile.read(length) if length else b""
+        self._reply(json.loads(raw_body) if raw_body else {})
+
+
+class _SimHttpServer(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(self, simulator: "BybitSimulator") -> None:
+        super().__init__(("127.0.0.1", 0), _SimRequestHandler)
+        self.simulator = simulator
+
+
+class BybitSimulator(object):
+    """ Local fake Bybit usdt perpetual exchange, to run and benchmark the Bybit class without network
+
+    REST is served on a localhost http server speaking the pybit usdt_perpetual protocol,
+    point Bybit at it with endpoint=simulator.endpoint & domain=simulator.domain.
+    Latency, jitter, rate limits and rejects are injected from the config.
+    Orders rest on the book until cancelled, positions only change with set_position or a script.
+    """
+
+    def __init__(self, config: SimConfig | None = None, domain: str = SIM_DOMAIN) -> None:
+        self.config: SimConfig = config if config is not None else dict(DEFAULT_SIM_CONFIG)  # type: ignore
+        self.domain = domain
+        self.random = random.Random(self.config.get("seed", 0))
+
+        symbols = self.config.get("symbols") or DEFAULT_SIM_SYMBOLS
+        self.symbols: dict[str, Symbol] = {symbol["name"]: symbol for symbol in symbols}
+        self.prices: dict[str, float] = dict(DEFAULT_SIM_PRICES)
+        self.prices.update(self.config.get("prices") or {})
+
+        self.orders: dict[str, dict] = {}
+        # (symbol, side) -> position
+        self.positions: dict[Tuple[str, str], dict] = {}
+        self.sockets: list[SimSocket] = []
+
+        # endpoint class -> (window start, requests in window)
+        self._rate_windows: dict[str, Tuple[float, int]] = {}
+        self._lock = threading.RLock()
+        self._stop_event = threading.Event()
+        self._server: _SimHttpServer | None = None
+        self.endpoint = ""
+
+        # counters shown by get_stats
+        self.requests = 0
+        self.rejected = 0
+        self.rate_limited = 0
+        self.ws_errors = 0
+
+    # Lifecycle #
+    def start(self) -> "BybitSimulator":
+        self._server = _SimHttpServer(self)
+        host, port = self._server.server_address[:2]
+        self.endpoint = f"http://{host}:{port}"
+        threading.Thread(target=self._server.serve_forever, name="sim_http", daemon=True).start()
+        threading.Thread(target=self._price_loop, name="sim_prices", daemon=True).start()
+        if self.config.get("script"):
+            self.run_script(self.config["script"])
+        _SIMULATORS[self.domain] = self
+        return self
+
+    def stop(self) -> None:
+        self._stop_event.set()
+        _SIMULATORS.pop(self.domain, None)
+        if self._server is not None:
+            self._server.shutdown()
+            self._server.server_close()
+        for socket in list(self.sockets):
+            socket.close()
+
+    def create_websocket(self, api_key: str | None = None, api_secret: str | None = None) -> SimWebSocket:
+        """ pybit websocket client connected to this simulator """
+        if api_key is None:
+            return SimWebSocket(self)
+        return SimWebSocket(self, api_key=api_key, api_secret=api_secret)
+
+    # Injection #
+    def _draw_latency_s(self) -> float:
+        latency_ms = float(self.config.get("latency_ms") or 0.0)
+        jitter_ms = float(self.config.get("jitter_ms") or 0.0)
+        with self._lock:
+            jitter = self.random.uniform(0.0, jitter_ms) if jitter_ms > 0 else 0.0
+        return (latency_ms + jitter) / 1000
+
+    def _take_rate_limit(self, endpoint: str, response: dict) -> None:
+        """ Count the request in the minute window of its endpoint class, add the limit status to response
+
+        Raise when over the limit, pybit reads rate_limit_reset_ms of the error to wait for the reset.
+        """
+        limit = int(self.config.get("rate_limit_per_min") or 0)
+        now = time.time()
+        with self._lock:
+            window_start, count = self._rate_windows.get(endpoint, (now, 0))
+            if now - window_start >= 60:
+                window_start, count = now, 0
+            response.update({
+                "rate_limit_status": max(0, limit - count - 1) if limit else 100,
+                "rate_limit": limit if limit else 100,
+                "rate_limit_reset_ms": int((window_start + 60) * 1000)
+            })
+            if limit and count >= limit:
+                self.rate_limited += 1
+                raise SimRequestError(RET_RATE_LIMIT, "Too many visits!")
+            self._rate_windows[endpoint] = (window_start, count + 1)
+
+    def _maybe_reject(self) -> None:
+        reject_rate = float(self.config.get("reject_rate") or 0.0)
+        with self._lock:
+            rejected = reject_rate > 0 and self.random.random() < reject_rate
+            if rejected:
+                self.rejected += 1
+        if rejected:
+            raise SimRequestError(RET_ORDER_REJECTED, "order cost not available (simulated reject)")
+
+    # REST #
+    def _handle_rest(self, method: str, path: str, params: dict) -> dict:
+        """ Route a pybit request, return the Bybit response body """
+        routes = {
+            "/v2/public/time": (None, lambda _: {}),
+            "/v2/public/symbols": (None, lambda _: list(self.symbols.values())),
+            "/private/linear/position/list": (ENDPOINT_QUERY, self._rest_my_position),
+            "/private/linear/order/search": (ENDPOINT_QUERY, self._rest_query_active_order),
+            "/private/linear/order/create": (ENDPOINT_CREATE, self._rest_place_active_order),
+            "/private/linear/order/replace": (ENDPOINT_CREATE, self._rest_replace_active_order),
+            "/private/linear/order/cancel": (ENDPOINT_CANCEL, self._rest_cancel_active_order),
+            "/private/linear/order/cancel-all": (ENDPOINT_CANCEL, self._rest_cancel_all_active_orders),
+        }
+        delay = self._draw_latency_s()
+        if delay > 0:
+            time.sleep(delay)
+
+        with self._lock:
+            self.requests += 1
+        response: dict = {"ret_code": 0, "ret_msg": "OK", "ext_code": "", "ext_info": "", "result": None,
+                          "time_now": f"{time.time():.6f}"}
+        try:
+            if path not in routes:
+                raise SimRequestError(RET_PARAMS_ERROR, f"{method} {path} not supported by the simulator")
+            endpoint, handler = routes[path]
+            if endpoint is not None:
+                self._take_rate_limit(endpoint, response)
+            response["result"] = handler(params)
+        except SimRequestError as e:
+            response["ret_code"] = e.ret_code
+            response["ret_msg"] = e.ret_msg
+        return response
+
+    def _get_symbol(self, params: dict) -> str:
+        symbol = str(params.get("symbol"))
+        if symbol not in self.symbols:
+            raise SimRequestError(RET_PARAMS_ERROR, f"unknown symbol {symbol}")
+        return symbol
+
+    def _empty_position(self, symbol: str, side: str) -> dict:
+        return {"symbol": symbol, "side": side, "size": 0.0, "entry_price": 0.0,
+                "position_idx": 0, "mode": "MergedSingle", "leverage": 10, "position_value": 0.0}
+
+    def _rest_my_position(self, params: dict) -> list[dict]:
+        symbol = self._get_symbol(params)
+        with self._lock:
+            return [dict(self.positions.get((symbol, side)) or self._empty_position(symbol, side))
+                    for side in ("Buy", "Sell")]
+
+    def _rest_query_active_order(self, params: dict) -> list[dict]:
+        symbol = self._get_symbol(params)
+        with self._lock:
+            return [dict(order) for order in self.orders.values() if order["symbol"] == symbol]
+
+    def _rest_place_active_order(self, params: dict) -> dict:
+        symbol = self._get_symbol(params)
+        qty = float(params.get("qty") or 0.0)
+        price = float(params.get("price") or 0.0)
+        if qty <= 0.0 or (params.get("order_type") == "Limit" and price <= 0.0):
+            raise SimRequestError(RET_PARAMS_ERROR, "params error: qty or price")
+        self._maybe_reject()
+
+        order = {
+            "order_id": str(uuid.uuid4()),
+            "symbol": symbol,
+            "side": params.get("side"),
+            "order_type": params.get("order_type"),
+            "price": price,
+            "qty": qty,
+            "time_in_force": params.get("time_in_force"),
+            "order_status": "New",
+            "reduce_only": bool(params.get("reduce_only")),
+            "close_on_trigger": bool(params.get("close_on_trigger")),
+            "position_idx": int(params.get("position_idx") or 0),
+            "created_time": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime())
+        }
+        with self._lock:
+            self.orders[order["order_id"]] = order
+        return dict(order)
+
+    def _rest_replace_active_order(self, params: dict) -> dict:
+        self._get_symbol(params)
+        self._maybe_reject()
+        with self._lock:
+            order = self.orders.get(str(params.get("order_id")))
+            if order is None:
+                raise SimRequestError(RET_ORDER_NOT_FOUND, "order not exists or too late to replace")
+            if params.get("p_r_price") is not None:
+                order["price"] = float(params["p_r_price"])
+            if params.get("p_r_qty") is not None:
+                order["qty"] = float(params["p_r_qty"])
+            return {"order_id": order["order_id"]}
+
+    def _rest_cancel_active_order(self, params: dict) -> dict:
+        self._get_symbol(params)
+        with self._lock:
+            order = self.orders.pop(str(params.get("order_id")), None)
+        if order is None:
+            raise SimRequestError(RET_ORDER_NOT_FOUND, "order not exists or too late to cancel")
+        return {"order_id": order["order_id"]}
+
+    def _rest_cancel_all_active_orders(self, params: dict) -> list[str]:
+        symbol = self._get_symbol(params)
+        with self._lock:
+            order_ids = [order_id for order_id, order in self.orders.items() if order["symbol"] == symbol]
+            for order_id in order_ids:
+                del self.orders[order_id]
+        return order_ids
+
+    # Websocket #
+    def _handle_ws_request(self, socket: SimSocket, request: dict) -> None:
+        op = request.get("op")
+        args = [str(arg) for arg in request.get("args", [])]
+        reply = {"success": True, "ret_msg": "", "conn_id": str(id(socket)), "request": request}
+
+        with self._lock:
+            if socket not in self.sockets:
+                self.sockets.append(socket)
+            if op == "subscribe":
+                socket.topics.update(args)
+            elif op == "unsubscribe":
+                socket.topics.difference_update(args)
+                socket.snapshot_topics.difference_update(args)
+        socket.push(reply)
+
+    def _publish(self, topic: str, message: dict) -> None:
+        with self._lock:
+            sockets = [socket for socket in self.sockets if topic in socket.topics]
+        for socket in sockets:
+            socket.push(message)
+
+    def _publish_price(self, symbol: str) -> None:
+        """ Send the price to every socket subscribed to the symbol """
+        topic = f"instrument_info.100ms.{symbol}"
+        with self._lock:
+            price = self.prices.get(symbol)
+            sockets = [socket for socket in self.sockets if topic in socket.topics]
+        if price is None or not sockets:
+            return
+        price_scale = int(self.symbols[symbol]["price_scale"]) if symbol in self.symbols else 2
+        update = {"id": 1, "symbol": symbol, "last_price": f"{price:.{price_scale}f}"}
+
+        for socket in sockets:
+            message: dict = {"topic": topic, "cross_seq": int(time.time() * 1000), "timestamp_e6": int(time.time() * 1e6)}
+            # first message of a subscription is a full snapshot, next ones are deltas
+            # (sent on the next tick, never before pybit registered the topic callback)
+            if topic in socket.snapshot_topics:
+                message.update({"type": "delta", "data": {"update": [update]}})
+            else:
+                socket.snapshot_topics.add(topic)
+                message.update({"type": "snapshot", "data": update})
+            socket.push(message)
+
+    def _price_loop(self) -> None:
+        """ Random walk of the subscribed symbols, one delta per symbol every price_interval_ms """
+        interval_s = float(self.config.get("price_interval_ms", 100.0)) / 1000
+        step_ticks = int(self.config.get("price_step_ticks") or 0)
+        if interval_s <= 0:
+            return
+
+        while not self._stop_event.wait(interval_s):
+            with self._lock:
+                subscribed = {topic.split(".")[-1] for socket in self.sockets for topic in socket.topics
+                              if topic.startswith("instrument_info.")}
+                for symbol in subscribed:
+                    if symbol in self.prices and symbol in self.symbols and step_ticks > 0:
+                        tick_size = float(self.symbols[symbol]["price_filter"]["tick_size"])
+                        move = self.random.randint(-step_ticks, step_ticks) * tick_size
+                        self.prices[symbol] = max(tick_size, self.prices[symbol] + move)
+            for symbol in subscribed:
+                self._publish_price(symbol)
+
+    # Scripted streams #
+    def set_price(self, symbol: str, last_price: float) -> None:
+        with self._lock:
+            self.prices[symbol] = float(last_price)
+        self._publish_price(symbol)
+
+    def set_position(self, symbol: str, side: str, size: float, entry_price: float | None = None) -> None:
+        """ Open / resize / close (size 0) a position, pushed on the position stream like a fill """
+        with self._lock:
+            position = self.positions.get((symbol, side)) or self._empty_position(symbol, side)
+            position = dict(position, size=float(size),
+                            entry_price=float(entry_price if entry_price is not None else self.prices.get(symbol, 0.0)))
+            if size > 0:
+                self.positions[(symbol, side)] = position
+            else:
+                self.positions.pop((symbol, side), None)
+        self._publish("position", {"topic": "position", "action": "update", "data": [position]})
+
+    def run_script(self, steps: list[dict]) -> threading.Thread:
+        """ Play steps in a background thread, each step waits `after_ms` after the previous one
+
+        ex: {"after_ms": 500, "position": {"symbol": "BTCUSDT", "side": "Buy", "size": 0.01, "entry_price": 20000}}
+            {"after_ms": 100, "price": {"symbol": "BTCUSDT", "last_price": 20010}}
+        """
+        def play() -> None:
+            for step in steps:
+                if self._stop_event.wait(float(step.get("after_ms") or 0.0) / 1000):
+                    return
+                if step.get("price") is not None:
+                    self.set_price(step["price"]["symbol"], step["price"]["last_price"])
+                if step.get("position") is not None:
+                    position = step["position"]
+                    self.set_position(position["symbol"], position["side"], position["size"], position.get("entry_price"))
+
+        thread = threading.Thread(target=play, name="sim_script", daemon=True)
+        thread.start()
+        return thread
+
+    def get_stats(self) -> dict:
+        with self._lock:
+            return {
+                "requests": self.requests,
+                "rejected": self.rejected,
+                "rate_limited": self.rate_limited,
+                "open_orders": len(self.orders),
+                "positions": len(self.positions),
+                "ws_frames": sum(socket.frames_sent for socket in self.sockets),
+                "ws_errors": self.ws_errors
+            }
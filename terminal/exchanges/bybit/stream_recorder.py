@@ -0,0 +1,138 @@
+import atexit
+import json
+import struct
+import threading
+import time
+
+from typing import Callable, Iterator, Tuple, TypedDict
+
+from latency import LatencyRecorder
+
+# File = MAGIC then frames, frame = FRAME_HEADER (channel, time.time_ns(), payload size) + json payload
+MAGIC = b"NWSTREAM1\n"
+FRAME_HEADER = struct.Struct("<BqI")
+
+CHANNEL_POSITION = 1
+CHANNEL_PRICE = 2
+CHANNEL_NAMES = {CHANNEL_POSITION: "position", CHANNEL_PRICE: "price"}
+
+# The writer thread flushes the file this often, a crash loses at most this much
+FLUSH_INTERVAL_S = 1.0
+# Replay never waits longer than this between 2 frames (recordings of several sessions are appended)
+DEFAULT_MAX_GAP_S = 5.0
+STREAM_RECORD_PATH = "scalper_stream.rec"
+
+Frame = Tuple[int, int, dict]
+
+
+class ReplayReport(TypedDict):
+    messages: int
+    elapsed_s: float
+    callback_s: float
+    msgs_per_s: float
+    callback_msgs_per_s: float
+
+
+class StreamRecorder(object):
+    """ Append websocket messages to a compact length-prefixed file, cheap enough for the callbacks """
+
+    def __init__(self, path: str = STREAM_RECORD_PATH) -> None:
+        self.path = path
+        self.frames = 0
+        self.bytes = 0
+
+        self._lock = threading.Lock()
+        self._file = open(path, "ab")
+        if self._file.tell() == 0:
+            self._file.write(MAGIC)
+
+        self._stop_event = threading.Event()
+        threading.Thread(target=self._flush_loop, name="stream_recorder", daemon=True).start()
+        atexit.register(self.close)
+
+    def record(self, channel: int, message: dict) -> None:
+        payload = json.dumps(message, separators=(",", ":")).encode()
+        frame = FRAME_HEADER.pack(channel, time.time_ns(), len(payload)) + payload
+        with self._lock:
+            if self._file.closed:
+                return
+            self._file.write(frame)
+            self.frames += 1
+            self.bytes += len(frame)
+
+    def _flush_loop(self) -> None:
+        while not self._stop_event.wait(FLUSH_INTERVAL_S):
+            with self._lock:
+                if self._file.closed:
+                    return
+                self._file.flush()
+
+    def close(self) -> None:
+        self._stop_event.set()
+        with self._lock:
+            if not self._file.closed:
+                self._file.close()
+
+    def get_stats(self) -> dict:
+        return {"path": self.path, "frames": self.frames, "bytes": self.bytes}
+
+
+def read_frames(path: str) -> Iterator[Frame]:
+    """ Yield (channel, time_ns, message) from a recording, a truncated last frame (crash) is ignored """
+    with open(path, "rb") as f:
+        if f.read(len(MAGIC)) != MAGIC:
+            raise ValueError(f"{path} is not a stream recording")
+        while True:
+            header = f.read(FRAME_HEADER.size)
+            if len(header) < FRAME_HEADER.size:
+                return
+            channel, time_ns, size = FRAME_HEADER.unpack(header)
+            payload = f.read(size)
+            if len(payload) < size:
+                return
+            yield channel, time_ns, json.loads(payload)
+
+
+def replay_frames(frames: list[Frame], handlers: dict[int, Callable[[dict], None]], speed: float | None = 1.0,
+                  latency: LatencyRecorder | None = None, max_gap_s: float = DEFAULT_MAX_GAP_S) -> ReplayReport:
+    """ Push recorded messages to the handlers of their channel, in order, from the calling thread
+
+    speed 1 = recorded pace, N = N times faster, None = as fast as possible.
+    Time spent in each handler goes to latency (stage "replay_<channel>") if given.
+    """
+    start = time.perf_counter()
+    callback_s = 0.0
+    messages = 0
+    # wall time offset of the current frame, gaps over max_gap_s are shortened
+    due_s = 0.0
+    previous_ns = frames[0][1] if frames else 0
+
+    for channel, time_ns, message in frames:
+        handler = handlers.get(channel)
+        if handler is None:
+            continue
+
+        if speed:
+            due_s += min(max(0.0, (time_ns - previous_ns) / 1e9), max_gap_s) / speed
+            delay = start + due_s - time.perf_counter()
+            if delay > 0:
+                time.sleep(delay)
+        previous_ns = time_ns
+
+        callback_start = time.perf_counter()
+        handler(message)
+        callback_elapsed = time.perf_counter() - callback_start
+
+        callback_s += callback_elapsed
+        messages += 1
+        if latency is not None:
+            latency.record(f"replay_{CHANNEL_NAMES.get(channel, channel)}", callback_elapsed * 1e6)
+
+    elapsed_s = time.perf_counter() - start
+    return {
+        "messages": messages,
+        "elapsed_s": round(elapsed_s, 3),
+        "callback_s": round(callback_s, 3),
+        "msgs_per_s": round(messages / elapsed_s, 1) if elapsed_s > 0 else 0.0,
+        "callback_msgs_per_s": round(messages / callback_s, 1) if callback_s > 0 else 0.0
+    }
@@ -0,0 +1,77 @@
+import threading
+
+from collections import OrderedDict
+from typing import Callable
+
+
+class PriceFeedSubscriptions(object):
+    """ Live price feed topics, at most max_topics, the least recently used one is unsubscribed first
+
+    Also counts messages received per topic, so bandwidth can be checked with the stats.
+    """
+
+    def __init__(self, max_topics: int, subscribe: Callable[[str], None], unsubscribe: Callable[[str], None]) -> None:
+        self.max_topics = max_topics
+        self.subscribe_fn = subscribe
+        self.unsubscribe_fn = unsubscribe
+
+        # symbol -> number of messages received, oldest used first
+        self.live: OrderedDict[str, int] = OrderedDict()
+        self.evicted = 0
+
+        self._lock = threading.Lock()
+        # subscribe / unsubscribe are network calls, only one at a time
+        self._subscribe_lock = threading.Lock()
+
+    def is_live(self, symbol: str) -> bool:
+        return symbol in self.live
+
+    def touch(self, symbol: str) -> list[str]:
+        """ Mark symbol as used, subscribe if needed and evict the LRU topics over the limit, return evicted symbols """
+        with self._subscribe_lock:
+            with self._lock:
+                if symbol in self.live:
+                    self.live.move_to_end(symbol)
+                    return []
+                # live before subscribing so the first message is not taken for a late one
+                self.live[symbol] = 0
+
+            try:
+                self.subscribe_fn(symbol)
+            except Exception:
+                with self._lock:
+                    self.live.pop(symbol, None)
+                raise
+
+            with self._lock:
+                evicted: list[str] = []
+                while len(self.live) > self.max_topics:
+                    evicted.append(self.live.popitem(last=False)[0])
+                self.evicted += len(evicted)
+
+            for evicted_symbol in evicted:
+                self.unsubscribe_fn(evicted_symbol)
+            return evicted
+
+    def unsubscribe(self, symbol: str) -> bool:
+        """ Explicit unsubscribe, False if the symbol was not live """
+        with self._subscribe_lock:
+            with self._lock:
+                if self.live.pop(symbol, None) is None:
+                    return False
+            self.unsubscribe_fn(symbol)
+            return True
+
+    def record_message(self, symbol: str) -> bool:
+        """ Count a message, False if the topic is not live anymore (late message after unsubscribe) """
+        with self._lock:
+            if symbol not in self.live:
+                return False
+            self.live[symbol] += 1
+            return True
+
+    def get_stats(self) -> dict:
+        with self._lock:
+            stats: dict = dict(self.live)
+        stats["evicted"] = self.evicted
+        return stats
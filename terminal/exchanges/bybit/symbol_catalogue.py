@@ -0,0 +1,106 @@
+import json
+import os
+import time
+
+from decimal import Decimal, InvalidOperation
+
+from abstract.symbols_info import Symbol
+from typing import Tuple, TypedDict
+
+# Instruments filters almost never change, no need to hit the API at every start
+SYMBOLS_CACHE_TTL_S = 6 * 60 * 60
+
+
+class SymbolFilters(TypedDict):
+    name: str
+    price_scale: int
+    tick_size: float
+    min_price: float
+    max_price: float
+    qty_step: float
+    qty_scale: int
+    min_qty: float
+    max_qty: float
+    post_only_max_qty: float
+
+
+def _step_decimals(step: str | float | int) -> int:
+    """ Number of decimals of a step, ie 0.001 -> 3, 0.5 -> 1, 1 -> 0 """
+    try:
+        exponent = Decimal(str(step)).normalize().as_tuple().exponent
+    except InvalidOperation:
+        raise ValueError(f"Wrong step {step}")
+    return max(0, -int(exponent))
+
+
+def parse_symbol_filters(raw_symbol: Symbol) -> SymbolFilters:
+    """ Parse the string / number mix returned by query_symbol into numeric filters """
+    price_filter = raw_symbol["price_filter"]
+    lot_size_filter = raw_symbol["lot_size_filter"]
+
+    max_qty = float(lot_size_filter["max_trading_qty"])
+    # post_only_max_trading_qty is not always sent, fallback on max qty
+    post_only_max_qty = lot_size_filter.get("post_only_max_trading_qty")
+
+    return {
+        "name": raw_symbol["name"],
+        "price_scale": int(raw_symbol["price_scale"]),
+        "tick_size": float(price_filter["tick_size"]),
+        "min_price": float(price_filter["min_price"]),
+        "max_price": float(price_filter["max_price"]),
+        "qty_step": float(lot_size_filter["qty_step"]),
+        "qty_scale": _step_decimals(lot_size_filter["qty_step"]),
+        "min_qty": float(lot_size_filter["min_trading_qty"]),
+        "max_qty": max_qty,
+        "post_only_max_qty": float(post_only_max_qty) if post_only_max_qty is not None else max_qty
+    }
+
+
+class SymbolCatalogue(object):
+    """ Instruments of the exchange indexed by name, parsed once when loaded """
+
+    def __init__(self, raw_symbols: list[Symbol] | None = None) -> None:
+        self.raw_symbols: list[Symbol] = raw_symbols if raw_symbols else []
+        self.by_name: dict[str, SymbolFilters] = {}
+
+        for raw_symbol in self.raw_symbols:
+            try:
+                filters = parse_symbol_filters(raw_symbol)
+            except (KeyError, TypeError, ValueError):
+                # Skip instruments with missing / weird filters instead of failing the whole load
+                continue
+            self.by_name[filters["name"]] = filters
+
+    def get(self, name: str | None) -> SymbolFilters | None:
+        if name is None:
+            return None
+        return self.by_name.get(name)
+
+    def __contains__(self, name: object) -> bool:
+        return name in self.by_name
+
+    def __len__(self) -> int:
+        return len(self.by_name)
+
+
+def load_cached_symbols(cache_path: str) -> Tuple[list[Symbol] | None, float]:
+    """ Read the instruments cache file, return the raw symbols (None if unusable) and the cache age in seconds """
+    try:
+        with open(cache_path, 'r') as f:
+            cache = json.load(f)
+        symbols = cache["symbols"]
+        saved_at = float(cache["saved_at"])
+    except (OSError, ValueError, KeyError, TypeError):
+        return None, 0.0
+
+    if not isinstance(symbols, list) or len(symbols) == 0:
+        return None, 0.0
+    return symbols, time.time() - saved_at
+
+
+def save_cached_symbols(cache_path: str, raw_symbols: list[Symbol]) -> None:
+    """ Write the instruments cache file, write + rename so a crash never leaves half a file """
+    tmp_path = cache_path + ".tmp"
+    with open(tmp_path, 'w') as f:
+        json.dump({"saved_at": time.time(), "symbols": raw_symbols}, f)
+    os.replace(tmp_path, cache_path)
@@ -0,0 +1,110 @@
+from .bybit_tools import ScaleOrder
+from typing import Tuple, TypedDict
+
+# Bybit status of orders still resting on the book
+OPEN_ORDER_STATUS = ["Created", "New", "PartiallyFilled"]
+
+
+class LiveOrder(TypedDict):
+    order_id: str
+    symbol: str
+    side: str
+    price: float
+    qty: float
+    reduce_only: bool
+
+
+class OrderAmend(TypedDict):
+    order_id: str
+    symbol: str
+    price: float | None
+    qty: float | None
+
+
+class ReconcilePlan(TypedDict):
+    to_amend: list[OrderAmend]
+    to_create: list[ScaleOrder]
+    to_cancel: list[LiveOrder]
+    unchanged: int
+    # live orders left as they are because their wanted order was refused locally
+    held: int
+
+
+def _same_value(a: float, b: float) -> bool:
+    return abs(a - b) < 1e-9
+
+
+def parse_live_orders(raw_orders: list[dict] | None) -> list[LiveOrder]:
+    """ Keep open orders from query_active_order and parse their numbers """
+    live_orders: list[LiveOrder] = []
+    for raw_order in raw_orders if raw_orders else []:
+        if raw_order.get("order_status", "New") not in OPEN_ORDER_STATUS:
+            continue
+        live_orders.append({
+            "order_id": str(raw_order.get("order_id")),
+            "symbol": str(raw_order.get("symbol")),
+            "side": str(raw_order.get("side")),
+            "price": float(raw_order.get("price", 0.0)),
+            "qty": float(raw_order.get("qty", 0.0)),
+            "reduce_only": bool(raw_order.get("reduce_only"))
+        })
+    return live_orders
+
+
+def reconcile_tp_orders(desired_orders: list[ScaleOrder], live_orders: list[LiveOrder],
+                        held_orders: list[ScaleOrder] | None = None) -> ReconcilePlan:
+    """ Diff the wanted tp ladder with the orders on the book
+
+    Live reduce only orders on the tp side are reused: untouched when they already match,
+    amended otherwise. Only the difference is created or cancelled. Every other live order
+    is cancelled, same end result as the previous cancel all + re-place.
+    held_orders are wanted orders that cannot be sent (refused by the pre trade checks), the live
+    order they pair with is left as it is instead of being cancelled, so the position keeps a tp.
+    """
+    held_orders = held_orders if held_orders else []
+    wanted = [(order, False) for order in desired_orders] + [(order, True) for order in held_orders]
+    tp_side = wanted[0][0]["side"] if wanted else None
+
+    reusable = [order for order in live_orders if order["reduce_only"] and order["side"] == tp_side]
+    to_cancel = [order for order in live_orders if not (order["reduce_only"] and order["side"] == tp_side)]
+
+    # Exact matches first, those cost nothing
+    remaining_wanted: list[Tuple[ScaleOrder, bool]] = []
+    unchanged = 0
+    held = 0
+    for desired, is_held in wanted:
+        match = next((live for live in reusable
+                      if _same_value(live["price"], desired["price"]) and _same_value(live["qty"], desired["qty"])), None)
+        if match is None:
+            remaining_wanted.append((desired, is_held))
+        else:
+            reusable.remove(match)
+            if is_held:
+                held += 1
+            else:
+                unchanged += 1
+
+    # Pair what is left by price so amends move orders as little as possible
+    remaining_wanted.sort(key=lambda item: item[0]["price"])
+    reusable.sort(key=lambda order: order["price"])
+
+    to_amend: list[OrderAmend] = []
+    for (desired, is_held), live in zip(remaining_wanted, reusable):
+        if is_held:
+            held += 1
+            continue
+        to_amend.append({
+            "order_id": live["order_id"],
+            "symbol": live["symbol"],
+            "price": None if _same_value(live["price"], desired["price"]) else desired["price"],
+            "qty": None if _same_value(live["qty"], desired["qty"]) else desired["qty"]
+        })
+
+    nb_paired = min(len(remaining_wanted), len(reusable))
+    return {
+        "to_amend": to_amend,
+        "to_create": [desired for desired, is_held in remaining_wanted[nb_paired:] if not is_held],
+        "to_cancel": to_cancel + reusable[nb_paired:],
+        "unchanged": unchanged,
+        "held": held
+    }
@@ -0,0 +1,48 @@
+import atexit
+import threading
+
+from typing import Callable
+
+# The writer thread batches everything added during this time in one write
+FLUSH_INTERVAL_S = 0.5
+
+
+class BatchedFileSink(object):
+    """ Background writer appending text lines to a file, one write per FLUSH_INTERVAL_S
+
+    The owner keeps its entries in memory and gives `collect`, called at each flush, it returns
+    the lines not written yet and marks them written. Adding an entry never waits on the disk.
+    Whatever is left is written at exit.
+    """
+
+    def __init__(self, path: str, collect: Callable[[], list[str]], thread_name: str,
+                 flush_interval_s: float = FLUSH_INTERVAL_S) -> None:
+        self.path = path
+        self.collect = collect
+        self.flush_interval_s = flush_interval_s
+
+        # one write at a time (writer thread, explicit flush, atexit), lines stay in order
+        self._write_lock = threading.Lock()
+        self._stop_event = threading.Event()
+        threading.Thread(target=self._writer_loop, name=thread_name, daemon=True).start()
+        atexit.register(self.flush)
+
+    def flush(self) -> None:
+        """ Append the collected lines to the file, in one write, disk errors are ignored """
+        with self._write_lock:
+            lines = self.collect()
+            if not lines:
+                return
+            try:
+                with open(self.path, "a") as f:
+                    f.write("\n".join(lines) + "\n")
+            except OSError:
+                pass
+
+    def _writer_loop(self) -> None:
+        while not self._stop_event.wait(self.flush_interval_s):
+            self.flush()
+
+    def stop(self) -> None:
+        self._stop_event.set()
+        self.flush()
@@ -0,0 +1,242 @@
+import asyncio
+import time
+
+from textual.app import App
+from textual.widgets import Header, Footer
+from textual_inputs import TextInput
+from textual import events
+from textual.reactive import Reactive
+from textual.message import Message
+
+from utils import HistoryView, ShortCutSideBar
+from terminal_title import TerminalTitle
+from history import CommandHistory
+from commands import CommandRunner, UNORDERED_CMDS
+from command_compiler import CompiledCmd
+from json_loader import JSON_CONFIG
+
+from launcher import SHORTCUT_PATH
+
+from abstract.exchange import Exchange
+
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
+from typing import Any, Callable
+
+SHORTCUTS_SIDEBAR_SIZE = 80
+# Number of unordered exchange commands (see UNORDERED_CMDS) that can be in flight at the same time
+EXCHANGE_CMD_WORKERS = 4
+# Exchange updates are pushed to the UI, bursts are coalesced to this max refresh rate
+UI_MAX_FPS = 20
+
+
+class Frontend(App):
+    def __init__(self, exchange_client: Exchange, *args, **kwargs) -> None:
+        super().__init__(*args, **kwargs)
+
+        # Set shortcut cfg handler
+        self.shortcuts_cfg = JSON_CONFIG(SHORTCUT_PATH, live=True)
+
+        # Check if client inherit Exchange
+        is_instance = issubclass(type(exchange_client), Exchange)
+        if (is_instance == False):
+            raise Exception("Exchange is not type of Exchange()")
+
+        self.client: Exchange = exchange_client
+        # Last cmds in memory, all of them in the history journal (searched by the history cmd)
+        self.history = CommandHistory()
+        # Cmds grammar, shared with the headless daemon
+        self.commands = CommandRunner(exchange_client, self.shortcuts_cfg, log=self.log, history=self.history)
+        self.display_title = 'Nawwa\'s Scalping Tool'
+        self.exchange_name = exchange_client.__class__.__name__
+        # Title fields (symbol, price, position, atp), markup rebuilt only when one changes
+        self.terminal_title = TerminalTitle(self.exchange_name, exchange_client.get_price_scale)
+
+        # Exchange methods are blocking (REST calls), they run in these pools so the UI never freezes
+        # one worker lane keeps the cmds depending on the terminal state in submit order
+        self.ordered_cmd_pool = ThreadPoolExecutor(max_workers=1, thread_name_prefix="exchange_cmd_ordered")
+        self.exchange_cmd_pool = ThreadPoolExecutor(max_workers=EXCHANGE_CMD_WORKERS, thread_name_prefix="exchange_cmd")
+        self.pending_cmds: set[asyncio.Task] = set()
+
+        # Exchange -> UI push channel state
+        self.ui_update_pending = False
+        self.last_ui_update = 0.0
+
+    show_shortcuts_bar = Reactive(False)
+
+    async def on_load(self, event: events.Load) -> None:
+        """ Register keybindings """
+
+        await self.bind("enter", "submit", "Send command")
+        await self.bind("l", "toggle_shortcuts_sidebar", "Shortcuts")
+        await self.bind("pagedown", "scroll_page_down", show=False)
+        await self.bind("pageup", "scroll_page_up", show=False)
+        await self.bind("q", "quit", "Quit")
+        await self.bind("ctrl+q", "quit", show=False)
+
+    async def on_mount(self) -> None:
+        if (self.client is None):
+            raise Exception("Exchange client is None, init the frontend with a proper client")
+
+        # Setup widgets
+        self.terminal_cmd = TextInput(
+            name="cmd",
+            title=self.terminal_title.title,
+            placeholder="> "
+        )
+        self.history_view = HistoryView(name="History", history=self.history)
+        self.footer = Footer()
+        self.header = Header(style="white")
+        self.shortcuts_sidebar = ShortCutSideBar(name="Shortcuts", shortcut_cfg=self.shortcuts_cfg)
+        self.shortcuts_sidebar.layout_offset_x = -SHORTCUTS_SIDEBAR_SIZE
+
+        # add widgets to dock
+        await self.view.dock(self.header, edge="top")
+        await self.view.dock(self.footer, edge="bottom")
+        await self.view.dock(self.terminal_cmd, edge='top', size=4)
+        await self.view.dock(self.history_view)
+        await self.view.dock(self.shortcuts_sidebar, edge="left", size=SHORTCUTS_SIDEBAR_SIZE, z=1)
+
+        # Exchange push updates (price, positions..) from its own threads, no polling
+        loop = asyncio.get_running_loop()
+        self.client.set_update_listener(lambda: self._on_exchange_update(loop))
+        self._check_exchange_updates()
+
+        # shortcuts edited by hand in the file are checked at startup, not when used
+        for cmd, result in self.commands.get_shortcut_errors():
+            await self.add_text_to_history_list(cmd, result)
+        self.refresh()
+
+
+    def watch_show_shortcuts_bar(self, show_shortcuts_bar: bool) -> None:
+        """Show/hide shortcuts sidebar"""
+
+        # the cmd being typed filters the shortcuts while the sidebar is open
+        self.shortcuts_sidebar.set_filter(self.terminal_cmd.value if show_shortcuts_bar else "")
+        self.shortcuts_sidebar.animate("layout_offset_x", 0 if show_shortcuts_bar else -SHORTCUTS_SIDEBAR_SIZE)
+
+    def action_toggle_shortcuts_sidebar(self) -> None:
+        """Trigger show/hide mirror sidebar"""
+
+        self.show_shortcuts_bar = not self.show_shortcuts_bar
+
+    def action_scroll_page_down(self) -> None:
+        """ Scroll the shortcuts sidebar if open, else the history """
+        (self.shortcuts_sidebar if self.show_shortcuts_bar else self.history_view).scroll_page(1)
+
+    def action_scroll_page_up(self) -> None:
+        (self.shortcuts_sidebar if self.show_shortcuts_bar else self.history_view).scroll_page(-1)
+
+    async def handle_input_on_change(self, message: Message) -> None:
+        """ Cmd input changed, fuzzy filter the shortcuts sidebar if open """
+        if self.show_shortcuts_bar:
+            self.shortcuts_sidebar.set_filter(self.terminal_cmd.value)
+
+    def _handle_terminal_title_info(self):
+        """ Called on exchange updates, the title widget is refreshed only if a shown field changed """
+        symbol_info = self.client.get_latest_price_info_for_active_symbol()
+        auto_tp_used = self.client.auto_tp_data is not None
+
+        if not symbol_info:
+            title = self.terminal_title.update(None, None, None, auto_tp_used)
+        else:
+            symbol = symbol_info.get('symbol')
+            try:
+                # Get position data (if any)
+                position = self.client.get_position_for_symbol(symbol)
+            except Exception:
+                position = None
+            title = self.terminal_title.update(symbol, symbol_info.get('last_price'), position, auto_tp_used)
+
+        if title is not None:
+            self.terminal_cmd.title = title
+            self.terminal_cmd.refresh()
+
+    def _on_exchange_update(self, loop: asyncio.AbstractEventLoop) -> None:
+        """ Called by the exchange from any thread, only wake up the event loop once per pending update """
+        if self.ui_update_pending:
+            return
+        self.ui_update_pending = True
+        loop.call_soon_threadsafe(self._schedule_exchange_update)
+
+    def _schedule_exchange_update(self) -> None:
+        """ Run the pending update as soon as the max frame rate allows it """
+        delay = max(0.0, self.last_ui_update + 1 / UI_MAX_FPS - time.monotonic())
+        asyncio.get_running_loop().call_later(delay, self._run_exchange_update)
+
+    def _run_exchange_update(self) -> None:
+        # reset first, an update arriving while we refresh schedules the next frame
+        self.ui_update_pending = False
+        self.last_ui_update = time.monotonic()
+        self._check_exchange_updates()
+
+    def _check_exchange_updates(self):
+        """ Look in exchange class if we got some new data to print """
+
+        # If no exchange client, return
+        if not self.client:
+            return
+
+        # Update terminal title #
+        self._handle_terminal_title_info()
+
+    def _submit_exchange_cmd(self, ordered: bool, exchange_method: Callable[..., Any], *args: Any) -> asyncio.Future:
+        """ Queue a blocking exchange method right away, await the future without blocking the event loop """
+        pool = self.ordered_cmd_pool if ordered else self.exchange_cmd_pool
+        return asyncio.get_running_loop().run_in_executor(pool, partial(exchange_method, *args))
+
+    async def add_text_to_history_list(self, cmd: str, result: str | None, journal: bool = True) -> None:
+        """Add text to the history list on the UI, journal=False to keep it out of the history journal"""
+
+        actual_result = result if result else "Command not found"
+
+        # Add to screen, only the visible lines are rendered
+        self.history_view.add_line(cmd, actual_result, journal)
+
+    async def execute_terminal_cmd(self, cmd: CompiledCmd, pending_lines: asyncio.Future | None = None) -> None:
+        """ Will try to execute cmd, pending_lines = the cmd already queued in a cmd pool """
+        if cmd["name"] == "quit":
+            await self.app.action_quit()
+            return
+
+        # cmds call the exchange (blocking), run them in the cmd pools
+        if pending_lines is None:
+            pending_lines = self._submit_exchange_cmd(cmd["name"] not in UNORDERED_CMDS, self.commands.execute, cmd)
+        history_lines = await pending_lines
+
+        # newest line goes on top, keep the lines of one cmd in reading order
+        # search results are already in the journal, not written twice
+        journal = cmd["name"] != "history"
+        for line_cmd, result in reversed(history_lines):
+            await self.add_text_to_history_list(line_cmd, result, journal)
+
+    async def _execute_terminal_cmd_in_background(self, cmd: CompiledCmd, pending_lines: asyncio.Future | None) -> None:
+        """ Wrapper so a failing background cmd ends up in the history instead of being lost """
+        try:
+            await self.execute_terminal_cmd(cmd, pending_lines)
+        except Exception as e:
+            self.log(f'Error in execute_terminal_cmd : {str(e)}')
+            await self.add_text_to_history_list(cmd["text"], str(e))
+        finally:
+            # a cmd can change what the title shows (ticker, atp..) or the shortcuts
+            self._on_exchange_update(asyncio.get_running_loop())
+            self.shortcuts_sidebar.refresh_if_changed()
+
+    async def action_submit(self) -> None:
+        """ Command input submit event """
+        # compiled shortcut if the cmd is a shortcut (dict lookup), else the cmd compiled
+        cmd = self.commands.resolve(self.terminal_cmd.value)
+
+        self.log(f'cmd to execute "{cmd["text"]}"')
+
+        # queued now so cmds keep the order they were typed in (ticker before the orders using it),
+        # the input is free for the next cmd right away and the result is written in the history when it completes
+        pending_lines = (None if cmd["name"] == "quit"
+                         else self._submit_exchange_cmd(cmd["name"] not in UNORDERED_CMDS, self.commands.execute, cmd))
+        task = asyncio.create_task(self._execute_terminal_cmd_in_background(cmd, pending_lines))
+        self.pending_cmds.add(task)
+        task.add_done_callback(self.pending_cmds.discard)
+
+        self.terminal_cmd.value = ""
+        self.terminal_cmd.refresh()
+        self.shortcuts_sidebar.set_filter("")
@@ -0,0 +1,97 @@
+import itertools
+import threading
+import time
+
+from collections import deque
+from datetime import datetime
+from typing import TypedDict
+
+from file_sink import BatchedFileSink
+
+# Lines kept in memory for the history view, older ones are only in the journal
+HISTORY_CAPACITY = 1000
+HISTORY_JOURNAL_PATH = "scalper_history.log"
+# Max number of lines returned by a search, the most recent ones
+SEARCH_LIMIT = 20
+
+
+class HistoryEntry(TypedDict):
+    seq: int
+    timestamp: float
+    cmd: str
+    result: str
+
+
+def _journal_field(text: str) -> str:
+    # journal line = date \t cmd \t result
+    return text.replace("\t", " ").replace("\n", " ")
+
+
+class CommandHistory(object):
+    """ History of the cmds & their results, fixed memory whatever the session length
+
+    The last `capacity` lines are kept in a ring buffer (what the history view shows), every line
+    is also appended to `journal_path` by a BatchedFileSink so the whole history can be searched.
+    """
+
+    def __init__(self, capacity: int = HISTORY_CAPACITY, journal_path: str | None = HISTORY_JOURNAL_PATH) -> None:
+        self.entries: deque[HistoryEntry] = deque(maxlen=capacity)
+
+        self._lock = threading.Lock()
+        self._seq = itertools.count(1)
+        self.last_seq = 0
+        self._unwritten: list[HistoryEntry] = []
+
+        self.journal_path = journal_path
+        self.sink = BatchedFileSink(journal_path, self._collect_unwritten, "history_writer") if journal_path is not None else None
+
+    def append(self, cmd: str, result: str, journal: bool = True) -> HistoryEntry:
+        """ Add a line, written to the journal later, journal=False for lines that should not be searched (ie search results) """
+        entry: HistoryEntry = {"seq": 0, "timestamp": time.time(), "cmd": cmd, "result": result}
+        with self._lock:
+            entry["seq"] = self.last_seq = next(self._seq)
+            self.entries.append(entry)
+            if journal and self.journal_path is not None:
+                self._unwritten.append(entry)
+        return entry
+
+    def latest(self, count: int, skip: int = 0) -> list[HistoryEntry]:
+        """ Newest first, `count` lines after the `skip` newest ones """
+        with self._lock:
+            end = max(0, len(self.entries) - skip)
+            start = max(0, end - count)
+            return [self.entries[index] for index in range(end - 1, start - 1, -1)]
+
+    def __len__(self) -> int:
+        return len(self.entries)
+
+    def _collect_unwritten(self) -> list[str]:
+        """ Journal lines of the entries not written yet, marked written """
+        with self._lock:
+            to_write, self._unwritten = self._unwritten, []
+        return [f"{datetime.fromtimestamp(entry['timestamp']).strftime('%Y-%m-%d %H:%M:%S')}\t"
+                f"{_journal_field(entry['cmd'])}\t{_journal_field(entry['result'])}" for entry in to_write]
+
+    def flush(self) -> None:
+        """ Append the lines not written yet to the journal, in one write """
+        if self.sink is not None:
+            self.sink.flush()
+
+    def search(self, query: str, limit: int = SEARCH_LIMIT) -> tuple[int, list[str]]:
+        """ (number of matches, last `limit` matching journal lines), case insensitive, every session of the journal """
+        if self.journal_path is None:
+            raise ValueError("History is not written to disk, cannot search it")
+
+        self.flush()
+        query = query.lower()
+        matches: deque[str] = deque(maxlen=limit)
+        count = 0
+        try:
+            with open(self.journal_path, "r", errors="replace") as f:
+                for line in f:
+                    if query in line.lower():
+                        matches.append(line.rstrip("\n"))
+                        count += 1
+        except FileNotFoundError:
+            pass
+        return count, list(matches)
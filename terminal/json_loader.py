@@ -1,5 +1,15 @@
 from __future__ import annotations
+import atexit
 import json
+import os
+import threading
+import time
+
+
+# Changes made within this delay are written in one file rewrite
+FLUSH_DELAY_S = 0.5
+JOURNAL_SUFFIX = ".journal"
+TMP_SUFFIX = ".tmp"
 
 
 class Dict(dict):
@@ -10,34 +20,153 @@ class Dict(dict):
     __delattr__ = dict.__delitem__  # type: ignore
 
 
+def _write_atomic(path: str, data: dict) -> None:
+    """ Write the whole file next to path then rename it over, a crash leaves the old or the new file, never half """
+    tmp_path = path + TMP_SUFFIX
+    with open(tmp_path, 'w') as f:
+        json.dump(data, f, indent=4)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp_path, path)
+
+
+def _read_journal(journal_path: str) -> list[dict]:
+    """ Changes not written to the file yet, a torn last line (crash while appending) is ignored """
+    if not os.path.exists(journal_path):
+        return []
+    changes = []
+    with open(journal_path, 'r') as f:
+        for line in f:
+            try:
+                changes.append(json.loads(line))
+            except ValueError:
+                break
+    return changes
+
+
 class JSON_CONFIG(object):
-    """JSON configuration object"""
+    """JSON configuration object
+
+    `data` is the primary copy, add/delete only touch memory and append the change to a journal file.
+    When live, a background thread rewrites the file FLUSH_DELAY_S after the first pending change
+    (atomic rename) then empties the journal. On load, journal changes missing from the file are replayed.
+    """
 
-    def __init__(self, file_path: str, live=True) -> None:
+    def __init__(self, file_path: str, live=True, flush_delay_s: float = FLUSH_DELAY_S) -> None:
         self.path = file_path
+        self.journal_path = file_path + JOURNAL_SUFFIX
         with open(self.path, 'r') as f:
             self.data = Dict(json.load(f))
         self.live = live
+        self.flush_delay_s = flush_delay_s
+
+        self.flushes = 0
+        self.last_flush_error: str | None = None
+
+        self._lock = threading.Lock()
+        # One writer at a time (background thread, atexit, write()), they share the tmp file
+        self._flush_lock = threading.Lock()
+        # Number of changes made / number of changes in the file
+        self._seq = 0
+        self._flushed_seq = 0
+        self._journal = None
+        self._dirty_event = threading.Event()
+        self._writer: threading.Thread | None = None
+
+        self._recover_journal()
+
+    def _recover_journal(self) -> None:
+        changes = _read_journal(self.journal_path)
+        for change in changes:
+            match change:
+                case {"op": "add", "key": key, "value": value}:
+                    self.data[key] = value
+                case {"op": "delete", "key": key}:
+                    self.data.pop(key, None)
+        if changes:
+            # the file has the journal changes now, start with an empty journal
+            _write_atomic(self.path, self.data)
+            os.remove(self.journal_path)
 
     def add(self, key: str, value: str) -> bool:
         try:
-            self.data[key] = value
-            if self.live: self.__update()
+            with self._lock:
+                self.data[key] = value
+                self._changed({"op": "add", "key": key, "value": value})
             return True
-        except:
+        except Exception:
             return False
 
     def delete(self, key: str) -> bool:
         try:
-            del self.data[key]
-            if self.live: self.__update()
+            with self._lock:
+                del self.data[key]
+                self._changed({"op": "delete", "key": key})
             return True
-        except:
+        except Exception:
             return False
 
-    def __update(self) -> None:
-        with open(self.path, 'w') as f:
-            json.dump(self.data, f, indent=4)
+    def _changed(self, change: dict) -> None:
+        """ To call with the lock held, journal the change & wake the writer """
+        self._seq += 1
+        if not self.live:
+            return
+        if self._journal is None:
+            self._journal = open(self.journal_path, 'a')
+        self._journal.write(json.dumps(change) + "\n")
+        self._journal.flush()
+
+        if self._writer is None:
+            self._writer = threading.Thread(target=self._writer_loop, name="json_config_writer", daemon=True)
+            self._writer.start()
+            atexit.register(self.flush)
+        self._dirty_event.set()
+
+    def _writer_loop(self) -> None:
+        while True:
+            self._dirty_event.wait()
+            # let the changes of the same burst (ie bulk edits) pile up, one rewrite for all of them
+            time.sleep(self.flush_delay_s)
+            self._dirty_event.clear()
+            if not self.flush():
+                self._dirty_event.set()
+
+    def flush(self) -> bool:
+        """ Rewrite the file if there are pending changes, False if the write failed """
+        with self._flush_lock:
+            with self._lock:
+                if self._seq == self._flushed_seq:
+                    return True
+                snapshot = dict(self.data)
+                seq = self._seq
+
+            try:
+                _write_atomic(self.path, snapshot)
+            except OSError as e:
+                self.last_flush_error = str(e)
+                return False
+
+            with self._lock:
+                self._flushed_seq = seq
+                self.flushes += 1
+                # changes made while writing stay in the journal until the next flush
+                if self._seq == seq and self._journal is not None:
+                    self._journal.close()
+                    self._journal = None
+                    os.remove(self.journal_path)
+            return True
+
+    @property
+    def version(self) -> int:
+        """ Bumped by every change, readers (ie the shortcuts sidebar) cache what they built from data on it """
+        return self._seq
 
     def write(self):
-        self.__update()
\ No newline at end of file
+        with self._lock:
+            self._seq += 1
+        self.flush()
+
+    def get_stats(self) -> dict:
+        with self._lock:
+            return {"pending_changes": self._seq - self._flushed_seq, "flushes": self.flushes,
+                    "last_flush_error": self.last_flush_error}
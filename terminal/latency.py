@@ -0,0 +1,125 @@
+import json
+import math
+import threading
+import time
+
+# Log scale buckets, 16 per power of 2 = ~4.4% resolution on every percentile
+BUCKETS_PER_OCTAVE = 16
+LATENCY_DUMP_PATH = "scalper_latency.json"
+
+
+def _bucket_index(value_us: float) -> int:
+    return 0 if value_us < 1.0 else int(math.log2(value_us) * BUCKETS_PER_OCTAVE) + 1
+
+
+def _bucket_upper_us(index: int) -> float:
+    return 1.0 if index == 0 else 2 ** (index / BUCKETS_PER_OCTAVE)
+
+
+class LatencyHistogram(object):
+    """ Fixed memory histogram of durations in microseconds, O(1) record """
+
+    def __init__(self) -> None:
+        self.buckets: dict[int, int] = {}
+        self.count = 0
+        self.total_us = 0.0
+        self.min_us = math.inf
+        self.max_us = 0.0
+
+    def record(self, value_us: float) -> None:
+        index = _bucket_index(value_us)
+        self.buckets[index] = self.buckets.get(index, 0) + 1
+        self.count += 1
+        self.total_us += value_us
+        self.min_us = min(self.min_us, value_us)
+        self.max_us = max(self.max_us, value_us)
+
+    def percentile(self, percent: float) -> float:
+        """ Upper bound of the bucket holding the percentile, never above the max seen """
+        if self.count == 0:
+            return 0.0
+        rank = max(1, math.ceil(self.count * percent / 100))
+        seen = 0
+        for index in sorted(self.buckets):
+            seen += self.buckets[index]
+            if seen >= rank:
+                return min(_bucket_upper_us(index), self.max_us)
+        return self.max_us
+
+    def summary(self) -> dict:
+        return {
+            "count": self.count,
+            "min_ms": round(self.min_us / 1000, 3) if self.count else 0.0,
+            "mean_ms": round(self.total_us / self.count / 1000, 3) if self.count else 0.0,
+            "p50_ms": round(self.percentile(50) / 1000, 3),
+            "p95_ms": round(self.percentile(95) / 1000, 3),
+            "p99_ms": round(self.percentile(99) / 1000, 3),
+            "max_ms": round(self.max_us / 1000, 3)
+        }
+
+
+class LatencyRecorder(object):
+    """ Per stage latency histograms, stages are recorded as time elapsed since the start of a trace """
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self.stages: dict[str, LatencyHistogram] = {}
+
+    def start(self, start_ns: int | None = None) -> "LatencyTrace":
+        """ New trace starting now, or at start_ns (time.perf_counter_ns) if the event was stamped earlier """
+        return LatencyTrace(self, start_ns if start_ns is not None else time.perf_counter_ns())
+
+    def record(self, stage: str, value_us: float) -> None:
+        with self._lock:
+            histogram = self.stages.get(stage)
+            if histogram is None:
+                histogram = self.stages[stage] = LatencyHistogram()
+            histogram.record(value_us)
+
+    def reset(self) -> None:
+        with self._lock:
+            self.stages = {}
+
+    def get_stats(self) -> dict:
+        """ One line per stage, stages in the order they were first seen (pipeline order) """
+        with self._lock:
+            summaries = {stage: histogram.summary() for stage, histogram in self.stages.items()}
+        return {stage: f"n={s['count']} p50={s['p50_ms']}ms p95={s['p95_ms']}ms p99={s['p99_ms']}ms max={s['max_ms']}ms"
+                for stage, s in summaries.items()}
+
+    def dump(self, path: str = LATENCY_DUMP_PATH) -> str:
+        """ Write summaries & raw buckets (upper bound us -> count) as json, return the path """
+        with self._lock:
+            data = {stage: dict(histogram.summary(),
+                                buckets_us={round(_bucket_upper_us(index), 1): count
+                                            for index, count in sorted(histogram.buckets.items())})
+                    for stage, histogram in self.stages.items()}
+        with open(path, "w") as f:
+            json.dump({"timestamp": time.time(), "stages": data}, f, indent=4)
+        return path
+
+
+class LatencyTrace(object):
+    """ Timestamps of one event going through the pipeline, every mark is recorded right away """
+
+    def __init__(self, recorder: LatencyRecorder, start_ns: int) -> None:
+        self.recorder = recorder
+        self.start_ns = start_ns
+        self._first_marks: set[str] = set()
+        self._lock = threading.Lock()
+
+    def mark(self, stage: str) -> None:
+        """ Record the time elapsed since the start of the trace for this stage """
+        self.recorder.record(stage, (time.perf_counter_ns() - self.start_ns) / 1000)
+
+    def mark_first(self, stage: str) -> None:
+        """ Same as mark but only the first call counts, ie first ack of an order batch """
+        with self._lock:
+            if stage in self._first_marks:
+                return
+            self._first_marks.add(stage)
+        self.mark(stage)
+
+    def fork(self) -> "LatencyTrace":
+        """ Trace sharing the start time, for each event of a message """
+        return LatencyTrace(self.recorder, self.start_ns)
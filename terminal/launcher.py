@@ -0,0 +1,38 @@
+import os
+
+from abstract.exchange import Exchange
+from exchanges import load_exchange_class
+from startup_profile import STARTUP
+
+SHORTCUT_PATH = os.path.join(os.path.dirname(__file__), 'shortcuts/shortcuts.json')
+USAGE = "usage: python3 {script} <exchange_name> [--sim [sim_config.json]] [--profile-startup]"
+
+
+def _start_bybit_simulator(exchange_class: type, argv: list[str]) -> Exchange:
+    """ bybit --sim [sim_config.json], run against a local fake Bybit, no network & no api keys """
+    from exchanges.bybit.simulator import BybitSimulator, load_sim_config
+
+    sim_index = argv.index("--sim")
+    config_path = argv[sim_index + 1] if len(argv) > sim_index + 1 and not argv[sim_index + 1].startswith("--") else None
+    with STARTUP.stage("simulator start"):
+        simulator = BybitSimulator(load_sim_config(config_path)).start()
+    return exchange_class(endpoint=simulator.endpoint, domain=simulator.domain)
+
+
+def parse_args(argv: list[str]) -> Exchange | None: 
+    """ Exchange client from the cmd line, shared by the TUI (app.py) and the headless daemon (daemon.py)
+
+    Only the selected exchange module is imported.
+    """
+    if (len(argv) == 1):
+        return None
+
+    with STARTUP.stage(f"import exchange {argv[1].lower()}", imports=True):
+        exchange_class = load_exchange_class(argv[1])
+    if exchange_class is None:
+        return None
+
+    with STARTUP.stage(f"{exchange_class.__name__} init"):
+        if exchange_class.__name__ == "Bybit" and "--sim" in argv:
+            return _start_bybit_simulator(exchange_class, argv)
+        return exchange_class()
@@ -0,0 +1,81 @@
+""" Replay a websocket recording (see the record cmd) through the Bybit callbacks, against the offline simulator
+
+    python terminal/replay.py scalper_stream.rec                         # recorded pace
+    python terminal/replay.py scalper_stream.rec --speed 10              # 10 times faster
+    python terminal/replay.py scalper_stream.rec --max --atp "scale 5 0.1 0.5"
+
+Auto tp orders triggered by the recorded positions are sent to the simulator, nothing reaches Bybit.
+"""
+import argparse
+import sys
+
+from command_compiler import build_auto_tp_data, compile_cmd
+from exchanges import Bybit
+from exchanges.bybit.bybit import SYMBOLS_CACHE_PATH
+from exchanges.bybit.simulator import BybitSimulator, load_sim_config
+from exchanges.bybit.stream_recorder import CHANNEL_POSITION, CHANNEL_PRICE, read_frames, replay_frames
+from exchanges.bybit.symbol_catalogue import load_cached_symbols
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Replay a websocket recording through the Bybit callbacks")
+    parser.add_argument("recording")
+    parser.add_argument("--speed", type=float, default=1.0, help="replay speed, 1 = recorded pace")
+    parser.add_argument("--max", action="store_true", help="replay as fast as possible")
+    parser.add_argument("--atp", default=None, help="auto tp shortcut value to turn on, ex: \"scale 5 0.1 0.5\"")
+    parser.add_argument("--cancel-off", action="store_true", help="auto tp without reconciling the live orders")
+    parser.add_argument("--latency-ms", type=float, default=0.0, help="simulated exchange latency")
+    args = parser.parse_args()
+
+    frames = list(read_frames(args.recording))
+    if not frames:
+        print(f"No messages in {args.recording}")
+        return 1
+
+    # Real instruments if the cache is there, recorded symbols are rarely all in the simulator defaults
+    # no simulated price stream, prices only come from the recording
+    sim_config = load_sim_config(None)
+    sim_config.update({"price_interval_ms": 0, "latency_ms": args.latency_ms})
+    cached_symbols, _ = load_cached_symbols(SYMBOLS_CACHE_PATH)
+    if cached_symbols:
+        sim_config["symbols"] = cached_symbols
+    simulator = BybitSimulator(sim_config).start()
+    bybit = Bybit(endpoint=simulator.endpoint, domain=simulator.domain)
+
+    if args.atp is not None:
+        # same syntax as the shortcuts of the autotp cmd
+        bybit.auto_tp_data = build_auto_tp_data(compile_cmd(args.atp), not args.cancel_off)
+
+    price_symbols = [str(dict(message.get("data") or {}).get("symbol")) for channel, _, message in frames
+                     if channel == CHANNEL_PRICE]
+    if price_symbols:
+        bybit.terminal_cmd_switch_active_symbol(price_symbols[0])
+
+    def replay_price(message: dict) -> None:
+        # recorded feeds are live feeds, least recently used ones are dropped like in a session
+        symbol = str(dict(message.get("data") or {}).get("symbol"))
+        if not bybit.price_feeds.is_live(symbol):
+            bybit.price_feeds.touch(symbol)
+        bybit._callback_symbol_price_feed(message)
+
+    report = replay_frames(frames,
+                           {CHANNEL_POSITION: bybit._callback_listen_to_position, CHANNEL_PRICE: replay_price},  # type: ignore
+                           None if args.max else args.speed,
+                           bybit.latency)
+
+    # let the auto tp jobs still running finish
+    bybit.auto_tp_executor.pool.shutdown(wait=True)
+
+    print(" ".join(f"{key}={value}" for key, value in report.items()))
+    for stage, summary in bybit.latency.get_stats().items():
+        print(f"{stage}: {summary}")
+    print("sim: " + " ".join(f"{key}={value}" for key, value in simulator.get_stats().items()))
+    for line in bybit.get_error_log():
+        print(line)
+
+    simulator.stop()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
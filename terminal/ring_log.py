@@ -0,0 +1,97 @@
+import itertools
+import threading
+import time
+
+from collections import deque
+from datetime import datetime
+from typing import Literal, TypedDict
+
+from file_sink import BatchedFileSink
+
+Severity = Literal["DEBUG", "INFO", "WARNING", "ERROR"]
+
+DEFAULT_CAPACITY = 2000
+LOG_PATH = "scalper_log.log"
+
+
+class LogEntry(TypedDict):
+    seq: int
+    timestamp: float
+    severity: Severity
+    message: str
+
+
+def format_entry(entry: LogEntry) -> str:
+    time_text = datetime.fromtimestamp(entry["timestamp"]).strftime("%H:%M:%S.%f")[:-3]
+    return f"{time_text} [{entry['severity']}] {entry['message']}"
+
+
+class RingLog(object):
+    """ Bounded log for the exchange classes
+
+    Keeps the last `capacity` entries, when full the oldest entry is overwritten.
+    A BatchedFileSink appends entries to `sink_path`, entries overwritten
+    before the writer got to them are counted in `dropped`.
+    """
+
+    def __init__(self, capacity: int = DEFAULT_CAPACITY, sink_path: str | None = None) -> None:
+        self.entries: deque[LogEntry] = deque(maxlen=capacity)
+        self.dropped = 0
+        self._reported_dropped = 0
+
+        self._lock = threading.Lock()
+        self._seq = itertools.count(1)
+        self._written_seq = 0
+        self._read_seq = 0
+
+        self.sink_path = sink_path
+        self.sink = BatchedFileSink(sink_path, self._collect_unwritten, "ring_log_writer") if sink_path is not None else None
+
+    def append(self, message: str, severity: Severity = "ERROR") -> None:
+        """ Cheap, safe from any thread, never touch the disk """
+        entry: LogEntry = {"seq": 0, "timestamp": time.time(), "severity": severity, "message": message}
+        with self._lock:
+            entry["seq"] = next(self._seq)
+            if len(self.entries) == self.entries.maxlen and self.entries[0]["seq"] > self._written_seq:
+                self.dropped += 1
+            self.entries.append(entry)
+
+    def read(self, only_new: bool = True) -> list[LogEntry]:
+        """ Entries still in the ring, only the ones not read yet if only_new """
+        with self._lock:
+            entries = [entry for entry in self.entries if not only_new or entry["seq"] > self._read_seq]
+            if only_new and entries:
+                self._read_seq = entries[-1]["seq"]
+        return entries
+
+    def _collect_unwritten(self) -> list[str]:
+        """ Lines of the entries not written yet (& a dropped warning), marked written """
+        with self._lock:
+            to_write = [entry for entry in self.entries if entry["seq"] > self._written_seq]
+            dropped = self.dropped - self._reported_dropped
+            self._reported_dropped = self.dropped
+            if to_write:
+                self._written_seq = to_write[-1]["seq"]
+
+        lines = [format_entry(entry) for entry in to_write]
+        if dropped:
+            lines.insert(0, f"{datetime.now().strftime('%H:%M:%S.%f')[:-3]} [WARNING] {dropped} log entries dropped, ring log full")
+        return lines
+
+    def flush(self) -> None:
+        """ Write every entry not written yet to the sink, in one write """
+        if self.sink is not None:
+            self.sink.flush()
+
+    def stop(self) -> None:
+        if self.sink is not None:
+            self.sink.stop()
+
+    def get_stats(self) -> dict:
+        with self._lock:
+            return {
+                "entries": len(self.entries),
+                "capacity": self.entries.maxlen,
+                "unwritten": sum(1 for entry in self.entries if entry["seq"] > self._written_seq),
+                "dropped": self.dropped
+            }
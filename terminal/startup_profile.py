@@ -0,0 +1,91 @@
+import sys
+import threading
+import time
+
+from contextlib import contextmanager
+from typing import Callable, Iterator, TypedDict
+
+# --profile-startup waits this long for the stages running in the background (ie websocket connect)
+BACKGROUND_STAGES_TIMEOUT_S = 15.0
+# Max number of newly imported packages listed per import stage
+MAX_LISTED_PACKAGES = 6
+
+
+class StartupStage(TypedDict):
+    name: str
+    start_ms: float
+    duration_ms: float
+    thread: str
+    new_packages: list[str]
+
+
+class StartupProfile(object):
+    """ Wall time of each startup stage (imports, config load, symbol fetch, websocket connect..)
+
+    Always on, a stage costs 2 perf_counter calls, only printed with --profile-startup.
+    """
+
+    def __init__(self) -> None:
+        self.origin = time.perf_counter()
+        self.stages: list[StartupStage] = []
+        self._pending = 0
+        self._condition = threading.Condition()
+
+    def begin(self, name: str, imports: bool = False) -> Callable[[], None]:
+        """ Start a stage, returns the function ending it, for stages ending in another thread """
+        with self._condition:
+            self._pending += 1
+        modules_before = set(sys.modules) if imports else set()
+        start = time.perf_counter()
+
+        def end() -> None:
+            duration = time.perf_counter() - start
+            new_packages = sorted({module.split(".")[0] for module in set(sys.modules) - modules_before
+                                   if not module.startswith("_")} - sys.stdlib_module_names) if imports else []
+            with self._condition:
+                self.stages.append({
+                    "name": name,
+                    "start_ms": (start - self.origin) * 1e3,
+                    "duration_ms": duration * 1e3,
+                    "thread": threading.current_thread().name,
+                    "new_packages": new_packages
+                })
+                self._pending -= 1
+                self._condition.notify_all()
+        return end
+
+    @contextmanager
+    def stage(self, name: str, imports: bool = False) -> Iterator[None]:
+        """ Time the block, imports=True also lists the top level packages it imported (stdlib left out) """
+        end = self.begin(name, imports)
+        try:
+            yield
+        finally:
+            end()
+
+    def wait_background_stages(self, timeout: float = BACKGROUND_STAGES_TIMEOUT_S) -> bool:
+        """ Wait for the stages still running in other threads, False on timeout """
+        with self._condition:
+            return self._condition.wait_for(lambda: self._pending == 0, timeout)
+
+    def report(self) -> list[str]:
+        lines = [f"{'stage':<42} {'start':>9} {'duration':>10}  thread"]
+        for stage in sorted(self.stages, key=lambda s: s["start_ms"]):
+            packages = stage["new_packages"]
+            listed = ", ".join(packages[:MAX_LISTED_PACKAGES]) + (", .." if len(packages) > MAX_LISTED_PACKAGES else "")
+            lines.append(f"{stage['name']:<42} {stage['start_ms']:>7.1f}ms {stage['duration_ms']:>8.1f}ms  "
+                         f"{stage['thread']}{f'  (+{listed})' if listed else ''}")
+        lines.append(f"{'total':<42} {(time.perf_counter() - self.origin) * 1e3:>7.1f}ms")
+        return lines
+
+
+# Shared by the entry points & the exchanges, started when the entry point imports it
+STARTUP = StartupProfile()
+
+
+def print_startup_profile() -> None:
+    if not STARTUP.wait_background_stages():
+        print(f"Some background stages did not finish within {BACKGROUND_STAGES_TIMEOUT_S}s")
+    for line in STARTUP.report():
+        print(line)
+    print("Interpreter startup is not included, see python -X importtime for a per module breakdown")
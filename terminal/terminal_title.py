@@ -0,0 +1,79 @@
+from abstract.positions_info import Position
+
+from typing import Callable, Tuple
+
+# (symbol, last price, position side, position size, auto tp on)
+TitleState = Tuple[str | None, str | float | None, str | None, float | None, bool]
+
+
+class TerminalTitle(object):
+    """ Terminal title view-model, the markup is rebuilt only from the fields that changed
+
+    Each field has its own markup fragment, an update compares the new state tuple with the last one,
+    re-renders the changed fragments and returns None when the title is the same (nothing to refresh).
+    Prices are formatted with the price scale of their symbol, the format is built once per symbol.
+    """
+
+    def __init__(self, exchange_name: str, get_price_scale: Callable[[str], int | None]) -> None:
+        self.exchange_name = exchange_name
+        self.get_price_scale = get_price_scale
+
+        self.state: TitleState = (None, None, None, None, False)
+        self.title = self.get_default_title(False)
+
+        # symbol -> price format ie "{:.2f}", None = price shown as received
+        self._price_formats: dict[str, str | None] = {}
+        self._symbol_text = ""
+        self._price_text = ""
+        self._size_text = ""
+
+    def get_default_title(self, auto_tp_on: bool) -> str:
+        return f"[red]{self.exchange_name}[/red] [white]-[/white] [No ticker selected]" + self._get_atp_text(auto_tp_on)
+
+    def _get_atp_text(self, auto_tp_on: bool) -> str:
+        return f" - [white]{'[ATP ON]' if auto_tp_on else '[ATP OFF]'}[/white]"
+
+    def _format_price(self, symbol: str, price: str | float) -> str:
+        if symbol not in self._price_formats:
+            price_scale = self.get_price_scale(symbol)
+            self._price_formats[symbol] = f"{{:.{price_scale}f}}" if price_scale is not None else None
+
+        price_format = self._price_formats[symbol]
+        if price_format is None:
+            return str(price)
+        try:
+            return price_format.format(float(price))
+        except ValueError:
+            return str(price)
+
+    def update(self, symbol: str | None, price: str | float | None, position: Position | None, auto_tp_on: bool) -> str | None:
+        """ New title markup, None if it did not change """
+        side = str(position["side"]) if position else None
+        size = float(position["size"]) if position else None
+        state: TitleState = (symbol, price, side, size, auto_tp_on)
+
+        previous = self.state
+        if state == previous:
+            return None
+        self.state = state
+
+        if symbol != previous[0]:
+            self._symbol_text = f"[gold1]{symbol}[/gold1] [white]-[/white]"
+        if price is not None and symbol is not None and (price != previous[1] or symbol != previous[0]):
+            self._price_text = f"[gold1]${self._format_price(symbol, price)}[/gold1]"
+        if (side, size) != previous[2:4] and size is not None:
+            self._size_text = (f"[dark_turquoise]{size}[/dark_turquoise]"
+                               if side == "Buy" else f"[deep_pink3]{size}[/deep_pink3]")
+
+        if not symbol:
+            title = self.get_default_title(auto_tp_on)
+        else:
+            title = f"[red]{self.exchange_name}[/red] [white]-[/white] {self._symbol_text}"
+            if price is not None:
+                title += f" {self._price_text}"
+                if size is not None:
+                    title += f" [white]-[/white] {self._size_text}"
+            title += self._get_atp_text(auto_tp_on)
+
+        self.title = title
+        return title
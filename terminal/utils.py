@@ -1,30 +1,201 @@
+import time
 
-from textual.widget import Widget
+from textual.widget import RenderCache, Widget
+from textual import events
 from rich.console import RenderableType
-from rich.align import Align
 from rich.panel import Panel
+from rich.markup import escape
+from rich.text import Text
 
 from json_loader import JSON_CONFIG
+from history import CommandHistory
+
+from typing import Any, Tuple
+
+# Rows scrolled by one mouse wheel step
+SCROLL_STEP = 3
+
+
+def fuzzy_score(query: str, text: str) -> int | None:
+    """ 0 prefix, 1 substring, 2 letters of query in order (ie "bt" in "btcusdt"), None no match """
+    if text.startswith(query):
+        return 0
+    if query in text:
+        return 1
+    position = 0
+    for char in query:
+        position = text.find(char, position) + 1
+        if position == 0:
+            return None
+    return 2
 
 
 class ShortCutSideBar(Widget):
-    """ Display shortcuts sidebar """
+    """ Display shortcuts sidebar
+
+    The filtered shortcut list is rebuilt only when the shortcuts (JSON_CONFIG.version) or the filter change,
+    a frame only renders the visible rows and is reused while nothing shown changed (ie slide animation).
+    """
 
     def __init__(self, *, name: str | None = None, shortcut_cfg: JSON_CONFIG, height: int | None = None) -> None:
         super().__init__(name=name)
         self.shortcuts_cfg = shortcut_cfg
         self.log(str(self.shortcuts_cfg.data))
 
+        self.filter = ""
+        self.scroll_offset = 0
+
+        # (shortcuts version, filter) -> matching (name, value)
+        self._matches_key: Tuple[int, str] | None = None
+        self._matches: list[Tuple[str, str]] = []
+        # (matches key, scroll, rows, size) of the last rendered frame & its lines
+        self._frame_key: Tuple[Any, ...] | None = None
+        self._frame_cache: RenderCache | None = None
+
+    def set_filter(self, query: str) -> None:
+        query = query.strip().lower()
+        if query != self.filter:
+            self.filter = query
+            self.scroll_offset = 0
+            self.refresh()
+
+    def scroll(self, rows: int) -> None:
+        scroll_offset = max(0, min(self.scroll_offset + rows, len(self._get_matches()) - self._visible_rows()))
+        if scroll_offset != self.scroll_offset:
+            self.scroll_offset = scroll_offset
+            self.refresh()
+
+    def scroll_page(self, pages: int) -> None:
+        self.scroll(pages * self._visible_rows())
+
+    def refresh_if_changed(self) -> None:
+        """ Repaint only if shortcuts were added / deleted since the last frame """
+        if self._matches_key is None or self._matches_key[0] != self.shortcuts_cfg.version:
+            self.refresh()
+
+    async def on_mouse_scroll_down(self, event: events.MouseScrollDown) -> None:
+        self.scroll(SCROLL_STEP)
+
+    async def on_mouse_scroll_up(self, event: events.MouseScrollUp) -> None:
+        self.scroll(-SCROLL_STEP)
+
+    def _visible_rows(self) -> int:
+        # panel border top & bottom
+        return max(1, self.size.height - 2)
+
+    def _get_matches(self) -> list[Tuple[str, str]]:
+        key = (self.shortcuts_cfg.version, self.filter)
+        if key == self._matches_key:
+            return self._matches
+
+        # list() copies in one go, shortcuts can be saved from the cmd threads meanwhile
+        shortcuts = [(str(name), str(value)) for name, value in list(self.shortcuts_cfg.data.items())]
+        if self.filter:
+            scored = [(score, name, value) for name, value in shortcuts
+                      if (score := fuzzy_score(self.filter, f"{name} {value}".lower())) is not None]
+            # best score first, file order within a score (sort is stable)
+            scored.sort(key=lambda match: match[0])
+            shortcuts = [(name, value) for _, name, value in scored]
+
+        self._matches_key = key
+        self._matches = shortcuts
+        return shortcuts
+
     def render(self) -> RenderableType:
-        self.shortcuts = ""
-        for f in self.shortcuts_cfg.data:
-            self.shortcuts += f"[bold magenta]{str(f)}[/] --> [blue]{self.shortcuts_cfg.data[f]}[/]\n"
+        matches = self._get_matches()
+        rows = self._visible_rows()
+        # shortcuts deleted or window resized since the last scroll
+        self.scroll_offset = max(0, min(self.scroll_offset, len(matches) - rows))
+
+        visible = matches[self.scroll_offset:self.scroll_offset + rows]
+        # Text, not markup, a "[" in a shortcut value is shown as is
+        shortcuts = Text("\n").join(Text.assemble((name, "bold magenta"), " --> ", (value, "blue"))
+                                    for name, value in visible)
+
+        title = "[bold blue]Shortcuts[/]"
+        if self.filter:
+            title += f" [blue]({len(matches)}/{len(self.shortcuts_cfg.data)} matching {escape(self.filter)})[/]"
+        subtitle = None
+        if len(matches) > rows:
+            subtitle = f"[blue]{self.scroll_offset + 1}-{self.scroll_offset + len(visible)} of {len(matches)}[/]"
 
         return Panel(
-            Align.left(self.shortcuts),
-            title=f"[bold blue]Shortcuts[/]",
+            shortcuts,
+            title=title,
+            subtitle=subtitle,
             border_style="blue",
         )
-        
-def remove_space_and_split(string: str) -> list[str]:
-    return " ".join(string.split()).split(" ")
\ No newline at end of file
+
+    def _get_frame_key(self) -> Tuple[Any, ...]:
+        return (self._matches_key, self.scroll_offset, self._visible_rows(), self.size)
+
+    def render_lines(self) -> None:
+        """ Widget.render_lines, the last frame is reused while nothing shown changed (ie slide animation) """
+        self._get_matches()
+        if self._frame_cache is None or self._get_frame_key() != self._frame_key:
+            super().render_lines()
+            # render() clamps the scroll, key taken after
+            self._frame_key = self._get_frame_key()
+            self._frame_cache = self.render_cache
+        self.render_cache = self._frame_cache
+
+
+class HistoryView(Widget):
+    """ Display the cmds history, newest on top
+
+    Only the visible rows of the history ring buffer are rendered, a frame costs the same after
+    10 or 100k cmds. The frame is reused until a line is added, scrolled or resized.
+    """
+
+    def __init__(self, *, name: str | None = None, history: CommandHistory) -> None:
+        super().__init__(name=name)
+        self.history = history
+        # rows hidden above the view, 0 = newest line on top
+        self.scroll_offset = 0
+
+        # (last history line, scroll, rows, size) of the last rendered frame & its lines
+        self._frame_key: Tuple[Any, ...] | None = None
+        self._frame_cache: RenderCache | None = None
+
+    def add_line(self, cmd: str, result: str, journal: bool = True) -> None:
+        self.history.append(cmd, result, journal)
+        # scrolled back, keep showing the same lines
+        if self.scroll_offset > 0:
+            self.scroll_offset = min(self.scroll_offset + 1, self._max_scroll())
+        self.refresh()
+
+    def scroll(self, rows: int) -> None:
+        scroll_offset = max(0, min(self.scroll_offset + rows, self._max_scroll()))
+        if scroll_offset != self.scroll_offset:
+            self.scroll_offset = scroll_offset
+            self.refresh()
+
+    def scroll_page(self, pages: int) -> None:
+        self.scroll(pages * self.size.height)
+
+    async def on_mouse_scroll_down(self, event: events.MouseScrollDown) -> None:
+        self.scroll(SCROLL_STEP)
+
+    async def on_mouse_scroll_up(self, event: events.MouseScrollUp) -> None:
+        self.scroll(-SCROLL_STEP)
+
+    def _max_scroll(self) -> int:
+        return max(0, len(self.history) - self.size.height)
+
+    def render(self) -> RenderableType:
+        visible = self.history.latest(max(1, self.size.height), skip=self.scroll_offset)
+        return Text("\n", no_wrap=True, justify="left").join(
+            Text.assemble(time.strftime("%H:%M:%S", time.localtime(entry["timestamp"])), ": ",
+                          (entry["cmd"], "bold magenta"), " -> ", (entry["result"], "blue"))
+            for entry in visible)
+
+    def _get_frame_key(self) -> Tuple[Any, ...]:
+        return (self.history.last_seq, self.scroll_offset, self.size)
+
+    def render_lines(self) -> None:
+        """ Widget.render_lines, the last frame is reused while nothing shown changed """
+        if self._frame_cache is None or self._get_frame_key() != self._frame_key:
+            super().render_lines()
+            self._frame_key = self._get_frame_key()
+            self._frame_cache = self.render_cache
+        self.render_cache = self._frame_cache
@@ -0,0 +1,226 @@
+""" Randomized checks of the integer tick / lot TP builders against the float builders they replaced
+
+    python -m pytest tests
+    python -m unittest discover tests
+"""
+import math
+import os
+import random
+import sys
+import unittest
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "terminal"))
+
+from exchanges.bybit.bybit_tools import build_scale_orders, build_single_tp_order, split_lots, spread_ticks
+from exchanges.bybit.symbol_catalogue import SymbolFilters, parse_symbol_filters
+
+RUNS = 2000
+SEED = 7
+
+
+def _filters(name: str, price_scale: int, tick_size: str, qty_step: str, min_qty: str) -> SymbolFilters:
+    return parse_symbol_filters({
+        "name": name,
+        "price_scale": price_scale,
+        "price_filter": {"min_price": tick_size, "max_price": "1999999", "tick_size": tick_size},
+        "lot_size_filter": {"max_trading_qty": 1000000, "min_trading_qty": min_qty, "qty_step": qty_step,
+                            "post_only_max_trading_qty": "5000000"}
+    })  # type: ignore
+
+
+# (filters, entry price range) of a few typical instruments
+PROFILES = [
+    (_filters("BTCUSDT", 2, "0.50", "0.001", "0.001"), (15000.0, 70000.0)),
+    (_filters("ETHUSDT", 2, "0.05", "0.01", "0.01"), (800.0, 5000.0)),
+    (_filters("XRPUSDT", 4, "0.0001", "1", "1"), (0.2, 2.0)),
+    (_filters("SHIB1000USDT", 6, "0.000005", "10", "10"), (0.005, 0.05)),
+]
+
+
+# Float builders as they were before the integer rewrite, the reference of these checks #
+def _legacy_round_to_tick(value: float, tick_size: float) -> float:
+    return math.ceil(value / tick_size) * tick_size
+
+
+def _legacy_build_scale_orders(position: dict, ticker_info: SymbolFilters, number_of_orders: int,
+                               scale_from: float, scale_to: float) -> list[dict]:
+    tick_size = ticker_info["tick_size"]
+    price_scale = ticker_info["price_scale"]
+    side = position["side"]
+    entry_price = float(position["entry_price"])
+    amount_per_order = float(position["size"]) / number_of_orders
+
+    if amount_per_order < ticker_info["min_qty"]:
+        raise ValueError("min qty")
+    elif amount_per_order > ticker_info["post_only_max_qty"]:
+        raise ValueError("max qty")
+
+    entry_to_percent = entry_price / 100
+    from_value = entry_to_percent * scale_from if side == "Buy" else entry_to_percent * -scale_from
+    to_value = entry_to_percent * scale_to if side == "Buy" else entry_to_percent * -scale_to
+    from_price = _legacy_round_to_tick(entry_price + from_value, tick_size)
+    to_price = _legacy_round_to_tick(entry_price + to_value, tick_size)
+
+    positive_diff = to_price - from_price if side == "Buy" else from_price - to_price
+    raw_step = _legacy_round_to_tick(positive_diff / (number_of_orders - 1), tick_size)
+    step = raw_step if side == "Buy" else -raw_step
+
+    orders = [{"side": "Buy" if side == "Sell" else "Sell", "qty": amount_per_order,
+               "price": round(from_price + i * step, price_scale)} for i in range(number_of_orders)]
+    if orders[-1]["price"] != to_price:
+        orders[-1]["price"] = round(to_price, price_scale)
+    return orders
+
+
+def _legacy_single_tp_price(position: dict, ticker_info: SymbolFilters, percent_away: float) -> float:
+    entry_price = float(position["entry_price"])
+    entry_to_percent = entry_price / 100
+    limit_value = entry_to_percent * percent_away if position["side"] == "Buy" else entry_to_percent * -percent_away
+    return round(_legacy_round_to_tick(entry_price + limit_value, ticker_info["tick_size"]), ticker_info["price_scale"])
+
+
+def _random_position(rng: random.Random, ticker_info: SymbolFilters, price_range: tuple[float, float]) -> dict:
+    tick_size = ticker_info["tick_size"]
+    entry_price = round(rng.randint(int(price_range[0] / tick_size), int(price_range[1] / tick_size)) * tick_size,
+                        ticker_info["price_scale"])
+    # sizes from a few lots to a lot of lots, not always on qty_step (average entry of partial fills)
+    size = rng.uniform(1, 5000) * ticker_info["qty_step"]
+    if rng.random() < 0.5:
+        size = round(size / ticker_info["qty_step"]) * ticker_info["qty_step"]
+    return {"symbol": ticker_info["name"], "side": rng.choice(["Buy", "Sell"]), "size": size,
+            "entry_price": entry_price, "position_idx": 0}
+
+
+def _is_on_step(value: float, step: float) -> bool:
+    steps = value / step
+    return abs(steps - round(steps)) < 1e-6
+
+
+class ScaleOrdersTest(unittest.TestCase):
+
+    def test_ladder_matches_float_builder(self) -> None:
+        rng = random.Random(SEED)
+        for _ in range(RUNS):
+            ticker_info, price_range = rng.choice(PROFILES)
+            position = _random_position(rng, ticker_info, price_range)
+            number_of_orders = rng.randint(2, 50)
+            scale_from = round(rng.uniform(0.01, 3.0), 2)
+            scale_to = round(scale_from + rng.uniform(0.01, 5.0), 2)
+            case = f"{position} x{number_of_orders} {scale_from}-{scale_to}"
+
+            try:
+                legacy = _legacy_build_scale_orders(position, ticker_info, number_of_orders, scale_from, scale_to)
+            except ValueError:
+                # never place an order the float builder refused (min / max qty guards)
+                with self.assertRaises(ValueError, msg=case):
+                    build_scale_orders([position], ticker_info, number_of_orders, scale_from, scale_to)  # type: ignore
+                continue
+
+            try:
+                orders = build_scale_orders([position], ticker_info, number_of_orders, scale_from, scale_to)  # type: ignore
+            except ValueError:
+                # stricter only when whole lots cannot give min_qty to every order
+                total_lots = math.floor(position["size"] / ticker_info["qty_step"] + 1e-9)
+                smallest = split_lots(total_lots, number_of_orders)[-1] * ticker_info["qty_step"]
+                self.assertLess(smallest, ticker_info["min_qty"] + 1e-12, case)
+                continue
+
+            self.assertEqual(len(orders), number_of_orders, case)
+            tick_size = ticker_info["tick_size"]
+            qty_step = ticker_info["qty_step"]
+            prices = [order["price"] for order in orders]
+
+            # same range ends as the float builder
+            self.assertTrue(math.isclose(prices[0], legacy[0]["price"], abs_tol=tick_size * 1e-6), case)
+            self.assertTrue(math.isclose(prices[-1], legacy[-1]["price"], abs_tol=tick_size * 1e-6), case)
+
+            # every price on tick & inside the range
+            low, high = min(prices[0], prices[-1]), max(prices[0], prices[-1])
+            for price in prices:
+                self.assertTrue(_is_on_step(price, tick_size), f"{price} not on tick {tick_size} {case}")
+                self.assertTrue(low - tick_size * 1e-6 <= price <= high + tick_size * 1e-6, case)
+
+            # close a long with sells going up, a short with buys going down
+            expected_side = "Sell" if position["side"] == "Buy" else "Buy"
+            self.assertTrue(all(order["side"] == expected_side for order in orders), case)
+            self.assertTrue(all(order["side"] == legacy_order["side"] for order, legacy_order in zip(orders, legacy)), case)
+            # prices are rounded up (both builders), a short tp under one tick away can land on the entry
+            if position["side"] == "Buy":
+                self.assertEqual(prices, sorted(prices), case)
+                self.assertGreater(prices[0], position["entry_price"], case)
+            else:
+                self.assertEqual(prices, sorted(prices, reverse=True), case)
+                self.assertLessEqual(prices[0], position["entry_price"], case)
+
+            # qty on step, whole position kept to qty_step, every order over min qty
+            total = sum(order["qty"] for order in orders)
+            self.assertLessEqual(total, position["size"] + qty_step * 1e-6, case)
+            self.assertLess(position["size"] - total, qty_step * (1 + 1e-6), case)
+            for order in orders:
+                self.assertTrue(_is_on_step(order["qty"], qty_step), case)
+                self.assertGreaterEqual(order["qty"], ticker_info["min_qty"] - qty_step * 1e-6, case)
+
+    def test_min_qty_guard(self) -> None:
+        ticker_info = PROFILES[0][0]
+        # 3 lots for 5 orders, some orders would get nothing
+        position = {"symbol": "BTCUSDT", "side": "Buy", "size": 0.003, "entry_price": 20000.0, "position_idx": 0}
+        with self.assertRaises(ValueError):
+            build_scale_orders([position], ticker_info, 5, 0.1, 0.5)  # type: ignore
+        with self.assertRaises(ValueError):
+            _legacy_build_scale_orders(position, ticker_info, 5, 0.1, 0.5)
+
+
+class SingleTpOrderTest(unittest.TestCase):
+
+    def test_single_tp_matches_float_builder(self) -> None:
+        rng = random.Random(SEED)
+        for _ in range(RUNS):
+            ticker_info, price_range = rng.choice(PROFILES)
+            position = _random_position(rng, ticker_info, price_range)
+            percent_away = round(rng.uniform(0.01, 5.0), 2)
+            case = f"{position} {percent_away}"
+
+            order = build_single_tp_order([position], ticker_info, percent_away)  # type: ignore
+
+            self.assertTrue(math.isclose(order["price"], _legacy_single_tp_price(position, ticker_info, percent_away),
+                                         abs_tol=ticker_info["tick_size"] * 1e-6), case)
+            self.assertTrue(_is_on_step(order["price"], ticker_info["tick_size"]), case)
+            self.assertEqual(order["side"], "Sell" if position["side"] == "Buy" else "Buy", case)
+            self.assertTrue(_is_on_step(order["qty"], ticker_info["qty_step"]), case)
+            self.assertLess(position["size"] - order["qty"], ticker_info["qty_step"] * (1 + 1e-6), case)
+
+
+class IntegerHelpersTest(unittest.TestCase):
+
+    def test_spread_ticks(self) -> None:
+        rng = random.Random(SEED)
+        for _ in range(RUNS):
+            from_tick = rng.randint(0, 10 ** 7)
+            to_tick = from_tick + rng.randint(-10 ** 4, 10 ** 4)
+            number_of_orders = rng.randint(1, 200)
+            ticks = spread_ticks(from_tick, to_tick, number_of_orders)
+
+            self.assertEqual(len(ticks), number_of_orders)
+            self.assertEqual(ticks[0], from_tick)
+            if number_of_orders > 1:
+                self.assertEqual(ticks[-1], to_tick)
+            steps = [b - a for a, b in zip(ticks, ticks[1:])]
+            # monotonic & even, steps differ by one tick at most
+            self.assertTrue(all(step * (to_tick - from_tick) >= 0 for step in steps))
+            if steps:
+                self.assertLessEqual(max(map(abs, steps)) - min(map(abs, steps)), 1)
+
+    def test_split_lots(self) -> None:
+        rng = random.Random(SEED)
+        for _ in range(RUNS):
+            total_lots = rng.randint(0, 10 ** 6)
+            number_of_orders = rng.randint(1, 500)
+            lots = split_lots(total_lots, number_of_orders)
+
+            self.assertEqual(sum(lots), total_lots)
+            self.assertEqual(lots, sorted(lots, reverse=True))
+            self.assertLessEqual(lots[0] - lots[-1], 1)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,149 @@
+""" Checks of the cmd grammar, what every cmd compiles to and every syntax error it reports
+
+    python -m pytest tests
+    python -m unittest discover tests
+"""
+import os
+import sys
+import unittest
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "terminal"))
+
+from command_compiler import ShortcutCache, build_auto_tp_data, compile_cmd, remove_space_and_split
+
+# (cmd, canonical name, args)
+VALID_CMDS = [
+    ("ticker ethusdt", "ticker", {"ticker": "ETHUSDT"}),
+    ("t  btcusdt ", "ticker", {"ticker": "BTCUSDT"}),
+    ("unsub ethusdt", "unsub", {"ticker": "ETHUSDT"}),
+    ("scale 10 0.1 0.4", "scale", {"number_of_orders": 10, "scale_from": 0.1, "scale_to": 0.4}),
+    ("s 3 1 2", "scale", {"number_of_orders": 3, "scale_from": 1.0, "scale_to": 2.0}),
+    ("tp 0.4", "tp", {"percent_away": 0.4}),
+    ("cancel all", "cancel", {"target": "ALL"}),
+    ("c ALL", "cancel", {"target": "ALL"}),
+    ("autotp off", "autotp", {"action": "OFF", "shortcut": None, "auto_cancel_orders": True}),
+    ("atp status", "autotp", {"action": "STATUS", "shortcut": None, "auto_cancel_orders": True}),
+    ("atp st", "autotp", {"action": "STATUS", "shortcut": None, "auto_cancel_orders": True}),
+    ("atp on tp1", "autotp", {"action": "ON", "shortcut": "tp1", "auto_cancel_orders": True}),
+    ("atp on tp1 cancel_off", "autotp", {"action": "ON", "shortcut": "tp1", "auto_cancel_orders": False}),
+    ("atp update tp2", "autotp", {"action": "UPDATE", "shortcut": "tp2", "auto_cancel_orders": True}),
+    ("atp up tp2", "autotp", {"action": "UPDATE", "shortcut": "tp2", "auto_cancel_orders": True}),
+    ("shortcut del btc", "shortcut", {"action": "DEL", "name": "btc", "value": None}),
+    ("stats conn", "stats", {"name": "conn", "action": None}),
+    ("stats Latency DUMP", "stats", {"name": "latency", "action": "dump"}),
+    ("stats latency reset", "stats", {"name": "latency", "action": "reset"}),
+    ("record on", "record", {"path": ""}),
+    ("record on my_session.rec", "record", {"path": "my_session.rec"}),
+    ("record off", "record", {"path": None}),
+    ("history scale 5", "history", {"query": "scale 5"}),
+    ("h btcusdt", "history", {"query": "btcusdt"}),
+    ("quit", "quit", None),
+]
+
+# (cmd, canonical name, error)
+INVALID_CMDS = [
+    ("ticker", "ticker", "Wrong command syntax"),
+    ("ticker btcusdt ethusdt", "ticker", "Wrong command syntax"),
+    ("ticker usdtbtc", "ticker", "Only accept USDT ticker"),
+    ("unsub", "unsub", "Wrong command syntax"),
+    ("scale 10 0.1", "scale", "Wrong scale syntax"),
+    ("scale 10 0.5 0.1", "scale", "Wrong data for scale order"),
+    ("scale 0 0.1 0.5", "scale", "Wrong data for scale order"),
+    ("scale 10 0 0.5", "scale", "Wrong data for scale order"),
+    ("scale x 0.1 0.5", "scale", "invalid literal for int() with base 10: 'x'"),
+    ("tp", "tp", "Wrong tp syntax"),
+    ("tp -1", "tp", "Wrong data for tp command"),
+    ("cancel", "cancel", "Wrong syntax"),
+    ("cancel some", "cancel", "No command matching some"),
+    ("atp", "autotp", "Wrong syntax"),
+    ("atp on", "autotp", "Cannot set autotp to ON without a following shortcut"),
+    ("atp update", "autotp", "Cannot set autotp to UPDATE without a following shortcut"),
+    ("atp up", "autotp", "Cannot set autotp to UP without a following shortcut"),
+    ("atp pause", "autotp", "Auto tp action pause not supported"),
+    ("shortcut add", "shortcut", "Wrong syntax, ex: shortcut add/del/up btc ticker btcusdt"),
+    ("shortcut add btc", "shortcut", "Shortcut value \"\" is not a command"),
+    ("sc add btc nope btcusdt", "shortcut", "Shortcut value \"nope btcusdt\" is not a command"),
+    ("sc add s1 scale 1", "shortcut", "Shortcut value \"scale 1\" : Wrong scale syntax"),
+    ("sc move btc eth", "shortcut", "Shortcut action MOVE not supported"),
+    ("stats", "stats", "Wrong syntax, ex: stats conn"),
+    ("stats latency dump now", "stats", "Wrong syntax, ex: stats conn"),
+    ("stats latency clear", "stats", "Stats action clear not supported"),
+    ("record", "record", "Wrong syntax, ex: record on"),
+    ("record on a.rec b.rec", "record", "Wrong syntax, ex: record on"),
+    ("record pause", "record", "Record action pause not supported"),
+    ("history", "history", "Wrong syntax, ex: history btcusdt"),
+]
+
+
+class CompileCmdTest(unittest.TestCase):
+
+    def test_valid_cmds(self) -> None:
+        for text, name, args in VALID_CMDS:
+            with self.subTest(text):
+                cmd = compile_cmd(text)
+                self.assertEqual(cmd, {"name": name, "text": text, "args": args, "error": None})
+
+    def test_invalid_cmds(self) -> None:
+        for text, name, error in INVALID_CMDS:
+            with self.subTest(text):
+                cmd = compile_cmd(text)
+                self.assertEqual(cmd, {"name": name, "text": text, "args": None, "error": error})
+
+    def test_unknown_cmd(self) -> None:
+        self.assertEqual(compile_cmd("buy btc"), {"name": None, "text": "buy btc", "args": None, "error": None})
+        self.assertEqual(compile_cmd(""), {"name": None, "text": "", "args": None, "error": None})
+
+    def test_shortcut_add_compiles_its_value(self) -> None:
+        for action in ["add", "up", "UPDATE"]:
+            with self.subTest(action):
+                cmd = compile_cmd(f"shortcut {action} s1 scale 5 0.1 0.5")
+                self.assertIsNone(cmd["error"])
+                self.assertEqual(cmd["args"]["action"], "ADD")  # type: ignore
+                self.assertEqual(cmd["args"]["name"], "s1")  # type: ignore
+                self.assertEqual(cmd["args"]["value"], compile_cmd("scale 5 0.1 0.5"))  # type: ignore
+
+    def test_remove_space_and_split(self) -> None:
+        self.assertEqual(remove_space_and_split("  scale   10 0.1\t0.5 "), ["scale", "10", "0.1", "0.5"])
+        self.assertEqual(remove_space_and_split("   "), [""])
+
+
+class BuildAutoTpDataTest(unittest.TestCase):
+
+    def test_scale_and_tp(self) -> None:
+        self.assertEqual(build_auto_tp_data(compile_cmd("scale 5 0.1 0.5"), False),
+                         {"number_of_orders": 5, "scale_from": 0.1, "scale_to": 0.5, "auto_cancel_orders": False})
+        self.assertEqual(build_auto_tp_data(compile_cmd("tp 0.3"), True), {"percent_away": 0.3, "auto_cancel_orders": True})
+
+    def test_errors(self) -> None:
+        with self.assertRaisesRegex(ValueError, "^Wrong scale syntax$"):
+            build_auto_tp_data(compile_cmd("scale 5"), True)
+        with self.assertRaisesRegex(ValueError, "^Wrong shortcut, please only set scale or tp shortcut for atp command$"):
+            build_auto_tp_data(compile_cmd("ticker btcusdt"), True)
+
+
+class ShortcutCacheTest(unittest.TestCase):
+
+    def test_resolve_set_delete(self) -> None:
+        cache = ShortcutCache({"btc": "ticker btcusdt"})
+
+        self.assertEqual(cache.resolve("btc"), compile_cmd("ticker btcusdt"))
+        # not a shortcut, compiled as a cmd
+        self.assertEqual(cache.resolve("tp 0.5"), compile_cmd("tp 0.5"))
+
+        cache.set("t1", compile_cmd("tp 1"))
+        self.assertEqual(cache.resolve("t1"), compile_cmd("tp 1"))
+        cache.delete("t1")
+        cache.delete("never_set")
+        self.assertEqual(cache.resolve("t1")["name"], None)
+
+    def test_get_errors(self) -> None:
+        cache = ShortcutCache({"ok": "scale 5 0.1 0.5", "bad": "scale 10 0.2 0.2", "unknown": "buy btc"})
+
+        self.assertEqual(sorted(cache.get_errors()), [
+            ("bad", "\"scale 10 0.2 0.2\" : Wrong data for scale order"),
+            ("unknown", "\"buy btc\" is not a command"),
+        ])
+
+
+if __name__ == "__main__":
+    unittest.main()
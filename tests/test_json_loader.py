@@ -0,0 +1,115 @@
+""" Checks of the JSON_CONFIG journal, the changes not in the file yet survive a crash
+
+    python -m pytest tests
+    python -m unittest discover tests
+"""
+import json
+import os
+import sys
+import tempfile
+import unittest
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "terminal"))
+
+from json_loader import JOURNAL_SUFFIX, JSON_CONFIG
+
+# the writer thread never flushes on its own during a test, flushes are explicit
+NO_AUTO_FLUSH_S = 3600.0
+
+
+class JsonConfigJournalTest(unittest.TestCase):
+
+    def setUp(self) -> None:
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.tmp_dir.name, "shortcuts.json")
+        self.journal_path = self.path + JOURNAL_SUFFIX
+        self._write_file({"tp1": "scale 5 0.1 0.5", "tp2": "tp 0.5"})
+
+    def tearDown(self) -> None:
+        self.tmp_dir.cleanup()
+
+    def _write_file(self, data: dict) -> None:
+        with open(self.path, "w") as f:
+            json.dump(data, f)
+
+    def _read_file(self) -> dict:
+        with open(self.path, "r") as f:
+            return json.load(f)
+
+    def _write_journal(self, text: str) -> None:
+        with open(self.journal_path, "w") as f:
+            f.write(text)
+
+    def test_journal_replayed_on_load(self) -> None:
+        self._write_journal(json.dumps({"op": "add", "key": "tp3", "value": "scale 3 1 2"}) + "\n"
+                            + json.dumps({"op": "delete", "key": "tp1"}) + "\n"
+                            + json.dumps({"op": "add", "key": "tp2", "value": "tp 1"}) + "\n")
+
+        config = JSON_CONFIG(self.path, live=False)
+
+        expected = {"tp2": "tp 1", "tp3": "scale 3 1 2"}
+        self.assertEqual(dict(config.data), expected)
+        # recovered changes are written to the file, the journal is gone
+        self.assertEqual(self._read_file(), expected)
+        self.assertFalse(os.path.exists(self.journal_path))
+
+    def test_torn_last_line_ignored(self) -> None:
+        # crash while appending the last change
+        self._write_journal(json.dumps({"op": "add", "key": "tp3", "value": "scale 3 1 2"}) + "\n"
+                            + '{"op": "add", "key": "tp4", "val')
+
+        config = JSON_CONFIG(self.path, live=False)
+
+        self.assertEqual(dict(config.data), {"tp1": "scale 5 0.1 0.5", "tp2": "tp 0.5", "tp3": "scale 3 1 2"})
+        self.assertEqual(self._read_file(), dict(config.data))
+        self.assertFalse(os.path.exists(self.journal_path))
+
+    def test_only_torn_line(self) -> None:
+        self._write_journal('{"op": "delete", "ke')
+
+        config = JSON_CONFIG(self.path, live=False)
+
+        self.assertEqual(dict(config.data), {"tp1": "scale 5 0.1 0.5", "tp2": "tp 0.5"})
+        self.assertEqual(self._read_file(), dict(config.data))
+
+    def test_unflushed_changes_recovered_after_crash(self) -> None:
+        config = JSON_CONFIG(self.path, live=True, flush_delay_s=NO_AUTO_FLUSH_S)
+        config.add("tp3", "scale 3 1 2")
+        config.delete("tp1")
+
+        # the file is only rewritten by the writer, the journal has both changes
+        self.assertEqual(self._read_file(), {"tp1": "scale 5 0.1 0.5", "tp2": "tp 0.5"})
+        self.assertTrue(os.path.exists(self.journal_path))
+
+        # no flush (crash), a new process loads file + journal
+        recovered = JSON_CONFIG(self.path, live=False)
+        self.assertEqual(dict(recovered.data), {"tp2": "tp 0.5", "tp3": "scale 3 1 2"})
+
+    def test_flush_writes_file_and_removes_journal(self) -> None:
+        config = JSON_CONFIG(self.path, live=True, flush_delay_s=NO_AUTO_FLUSH_S)
+        config.add("tp3", "scale 3 1 2")
+        self.assertEqual(config.get_stats()["pending_changes"], 1)
+
+        self.assertTrue(config.flush())
+
+        self.assertEqual(self._read_file(), {"tp1": "scale 5 0.1 0.5", "tp2": "tp 0.5", "tp3": "scale 3 1 2"})
+        self.assertFalse(os.path.exists(self.journal_path))
+        self.assertEqual(config.get_stats()["pending_changes"], 0)
+
+        # next change opens a new journal
+        config.delete("tp2")
+        self.assertTrue(os.path.exists(self.journal_path))
+        self.assertTrue(config.flush())
+        self.assertFalse(os.path.exists(self.journal_path))
+        self.assertEqual(self._read_file(), {"tp1": "scale 5 0.1 0.5", "tp3": "scale 3 1 2"})
+
+    def test_not_live_never_journals(self) -> None:
+        config = JSON_CONFIG(self.path, live=False)
+        config.add("tp3", "scale 3 1 2")
+
+        self.assertFalse(os.path.exists(self.journal_path))
+        self.assertEqual(config.version, 1)
+
+
+if __name__ == "__main__":
+    unittest.main()
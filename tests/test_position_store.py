@@ -0,0 +1,132 @@
+""" Checks of the position events (opened / increased / reduced / closed) driving the auto tp
+
+    python -m pytest tests
+    python -m unittest discover tests
+"""
+import os
+import sys
+import unittest
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "terminal"))
+
+from abstract.positions_info import Position
+from exchanges.bybit.position_store import PositionStore, get_position_key
+
+
+def _position(symbol: str = "BTCUSDT", side: str = "Buy", size: float = 1.0, position_idx: int = 0,
+              entry_price: float = 20000.0) -> Position:
+    return {"symbol": symbol, "side": side, "size": size, "entry_price": entry_price, "position_idx": position_idx}  # type: ignore
+
+
+def _kinds(events: list) -> list[tuple[str, str, float]]:
+    return [(event["kind"], event["symbol"], event["previous_size"]) for event in events]
+
+
+class PositionStoreDeltaTest(unittest.TestCase):
+
+    def test_opened(self) -> None:
+        store = PositionStore()
+        events = store.apply([_position(size=1.0)])
+
+        self.assertEqual(_kinds(events), [("opened", "BTCUSDT", 0.0)])
+        self.assertEqual(store.get("BTCUSDT")["size"], 1.0)  # type: ignore
+
+    def test_increased(self) -> None:
+        store = PositionStore()
+        store.apply([_position(size=1.0)])
+        events = store.apply([_position(size=2.5)])
+
+        self.assertEqual(_kinds(events), [("increased", "BTCUSDT", 1.0)])
+        self.assertEqual(events[0]["position"]["size"], 2.5)
+
+    def test_reduced(self) -> None:
+        store = PositionStore()
+        store.apply([_position(size=2.0)])
+        events = store.apply([_position(size=0.5)])
+
+        self.assertEqual(_kinds(events), [("reduced", "BTCUSDT", 2.0)])
+        self.assertEqual(store.get("BTCUSDT")["size"], 0.5)  # type: ignore
+
+    def test_closed(self) -> None:
+        store = PositionStore()
+        store.apply([_position(size=2.0)])
+        events = store.apply([_position(size=0.0)])
+
+        self.assertEqual(_kinds(events), [("closed", "BTCUSDT", 2.0)])
+        self.assertIsNone(store.get("BTCUSDT"))
+        self.assertEqual(store.positions(), [])
+
+    def test_same_size_no_event(self) -> None:
+        # only the entry price / pnl changed, nothing for the auto tp
+        store = PositionStore()
+        store.apply([_position(size=1.0)])
+        events = store.apply([_position(size=1.0, entry_price=20100.0)])
+
+        self.assertEqual(events, [])
+        self.assertEqual(store.get("BTCUSDT")["entry_price"], 20100.0)  # type: ignore
+
+    def test_close_of_unknown_position_ignored(self) -> None:
+        # bybit sends the empty side of a symbol with a size of 0
+        store = PositionStore()
+        self.assertEqual(store.apply([_position(side="Sell", size=0.0)]), [])
+
+    def test_hedge_mode_sides_are_separate(self) -> None:
+        store = PositionStore()
+        events = store.apply([_position(side="Buy", size=1.0, position_idx=1),
+                              _position(side="Sell", size=2.0, position_idx=2)])
+
+        self.assertEqual(_kinds(events), [("opened", "BTCUSDT", 0.0), ("opened", "BTCUSDT", 0.0)])
+        self.assertEqual(len(store.positions_for_symbol("BTCUSDT")), 2)
+
+        events = store.apply([_position(side="Sell", size=0.0, position_idx=2)])
+        self.assertEqual(_kinds(events), [("closed", "BTCUSDT", 2.0)])
+        self.assertEqual([get_position_key(position) for position in store.positions()], [("BTCUSDT", "Buy", 1)])
+
+    def test_delta_leaves_other_symbols(self) -> None:
+        store = PositionStore()
+        store.apply([_position(symbol="BTCUSDT"), _position(symbol="ETHUSDT", entry_price=1500.0)])
+        events = store.apply([_position(symbol="ETHUSDT", size=3.0, entry_price=1500.0)])
+
+        self.assertEqual(_kinds(events), [("increased", "ETHUSDT", 1.0)])
+        self.assertEqual(store.get("BTCUSDT")["size"], 1.0)  # type: ignore
+
+
+class PositionStoreSnapshotTest(unittest.TestCase):
+
+    def test_snapshot_closes_missing_positions(self) -> None:
+        store = PositionStore()
+        store.apply([_position(side="Buy", size=1.0, position_idx=1), _position(side="Sell", size=1.0, position_idx=2)])
+        events = store.replace_symbol("BTCUSDT", [_position(side="Buy", size=1.5, position_idx=1)])
+
+        self.assertEqual(sorted(_kinds(events)), [("closed", "BTCUSDT", 1.0), ("increased", "BTCUSDT", 1.0)])
+        self.assertEqual([get_position_key(position) for position in store.positions()], [("BTCUSDT", "Buy", 1)])
+
+    def test_snapshot_does_not_wipe_other_symbols(self) -> None:
+        store = PositionStore()
+        store.apply([_position(symbol="BTCUSDT"), _position(symbol="ETHUSDT", entry_price=1500.0)])
+        events = store.replace_symbol("BTCUSDT", [])
+
+        self.assertEqual(_kinds(events), [("closed", "BTCUSDT", 1.0)])
+        self.assertIsNone(store.get("BTCUSDT"))
+        self.assertEqual(store.get("ETHUSDT")["size"], 1.0)  # type: ignore
+
+    def test_snapshot_then_delta(self) -> None:
+        # REST snapshot at ticker switch, then websocket deltas compare to it
+        store = PositionStore()
+        events = store.replace_symbol("BTCUSDT", [_position(size=1.0), _position(side="Sell", size=0.0)])
+        self.assertEqual(_kinds(events), [("opened", "BTCUSDT", 0.0)])
+
+        self.assertEqual(store.replace_symbol("BTCUSDT", [_position(size=1.0)]), [])
+        self.assertEqual(_kinds(store.apply([_position(size=0.4)])), [("reduced", "BTCUSDT", 1.0)])
+
+    def test_delta_then_snapshot(self) -> None:
+        # a delta the snapshot already knows gives no event, a missed delta shows up in the snapshot
+        store = PositionStore()
+        store.apply([_position(size=1.0)])
+
+        self.assertEqual(store.replace_symbol("BTCUSDT", [_position(size=1.0)]), [])
+        self.assertEqual(_kinds(store.replace_symbol("BTCUSDT", [_position(size=2.0)])), [("increased", "BTCUSDT", 1.0)])
+
+
+if __name__ == "__main__":
+    unittest.main()
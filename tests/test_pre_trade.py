@@ -0,0 +1,123 @@
+""" Table checks of the local pre trade validation, every rejection & auto fix branch
+
+    python -m pytest tests
+    python -m unittest discover tests
+"""
+import os
+import sys
+import unittest
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "terminal"))
+
+from exchanges.bybit.bybit_tools import ScaleOrder
+from exchanges.bybit.pre_trade import MarketPrices, parse_market_prices, validate_order, validate_orders
+from exchanges.bybit.symbol_catalogue import parse_symbol_filters
+
+FILTERS = parse_symbol_filters({
+    "name": "BTCUSDT",
+    "price_scale": 2,
+    "price_filter": {"min_price": "0.50", "max_price": "199999.50", "tick_size": "0.50"},
+    "lot_size_filter": {"max_trading_qty": 100, "min_trading_qty": "0.001", "qty_step": "0.001",
+                        "post_only_max_trading_qty": "50"}
+})  # type: ignore
+
+LAST_ONLY: MarketPrices = {"last_price": 20000.0, "best_bid": None, "best_ask": None}
+BOOK: MarketPrices = {"last_price": 20000.0, "best_bid": 19999.5, "best_ask": 20000.0}
+
+
+def _order(side: str = "Sell", price: float = 20100.0, qty: float = 0.01, time_in_force: str = "PostOnly",
+           symbol: str = "BTCUSDT") -> ScaleOrder:
+    return {"symbol": symbol, "side": side, "order_type": "Limit", "qty": qty, "price": price,
+            "time_in_force": time_in_force, "reduce_only": True, "close_on_trigger": False, "position_idx": 0}  # type: ignore
+
+
+# (case, order, market, price band %, auto fix, expected (price, qty) or None, expected error start or None)
+CASES = [
+    ("valid order untouched", _order(), LAST_ONLY, None, True, (20100.0, 0.01), None),
+    ("no market, no market checks", _order(price=100.0), None, 10.0, True, (100.0, 0.01), None),
+    ("wrong symbol", _order(symbol="ETHUSDT"), None, None, True, None, "order symbol ETHUSDT does not match"),
+
+    # tick snapping away from the market
+    ("sell off tick snapped up", _order(price=20100.2), None, None, True, (20100.5, 0.01), None),
+    ("buy off tick snapped down", _order(side="Buy", price=19900.7), None, None, True, (19900.5, 0.01), None),
+    ("off tick without auto fix", _order(price=20100.2), None, None, False, None, "price 20100.2 is not a multiple"),
+
+    # qty step floor, never more than the position
+    ("qty off step floored", _order(qty=0.0129), None, None, True, (20100.0, 0.012), None),
+    ("qty off step without auto fix", _order(qty=0.0129), None, None, False, None, "qty 0.0129 is not a multiple"),
+
+    # min / max qty, PostOnly has its own max
+    ("qty below min", _order(qty=0.0009), None, None, True, None, "qty 0.0 below min qty"),
+    ("postonly qty above postonly max", _order(qty=60.0), None, None, True, None, "qty 60.0 above max qty 50.0"),
+    ("gtc qty above postonly max is fine", _order(qty=60.0, time_in_force="GoodTillCancel"), None, None, True,
+     (20100.0, 60.0), None),
+    ("gtc qty above max", _order(qty=101.0, time_in_force="GoodTillCancel"), None, None, True, None,
+     "qty 101.0 above max qty 100.0"),
+
+    # exchange price limits
+    ("price above max price", _order(price=200000.0), None, None, True, None, "price 200000.0 outside of"),
+
+    # optional price band
+    ("band off by default", _order(price=30000.0), LAST_ONLY, None, True, (30000.0, 0.01), None),
+    ("inside band", _order(price=21500.0), LAST_ONLY, 10.0, True, (21500.0, 0.01), None),
+    ("outside band", _order(price=22500.0), LAST_ONLY, 10.0, True, None, "price 22500.0 more than 10.0% away"),
+
+    # PostOnly crossing on the last price, equality allowed
+    ("sell at last price", _order(price=20000.0), LAST_ONLY, None, True, (20000.0, 0.01), None),
+    ("sell under last price", _order(price=19999.5), LAST_ONLY, None, True, None, "PostOnly Sell at 19999.5 would cross 20000.0"),
+    ("buy at last price", _order(side="Buy", price=20000.0), LAST_ONLY, None, True, (20000.0, 0.01), None),
+    ("buy over last price", _order(side="Buy", price=20000.5), LAST_ONLY, None, True, None, "PostOnly Buy at 20000.5 would cross 20000.0"),
+
+    # PostOnly crossing on bid1 / ask1 when the feed sends them
+    ("sell over best bid", _order(price=20000.0), BOOK, None, True, (20000.0, 0.01), None),
+    ("sell at best bid", _order(price=19999.5), BOOK, None, True, None, "PostOnly Sell at 19999.5 would cross 19999.5"),
+    ("buy under best ask", _order(side="Buy", price=19999.5), BOOK, None, True, (19999.5, 0.01), None),
+    ("buy at best ask", _order(side="Buy", price=20000.0), BOOK, None, True, None, "PostOnly Buy at 20000.0 would cross 20000.0"),
+    ("gtc can cross", _order(price=19000.0, time_in_force="GoodTillCancel"), BOOK, None, True, (19000.0, 0.01), None),
+]
+
+
+class ValidateOrderTest(unittest.TestCase):
+
+    def test_cases(self) -> None:
+        for case, order, market, band, auto_fix, expected, error in CASES:
+            with self.subTest(case):
+                checked_order, reason = validate_order(order, FILTERS, market, band, auto_fix)
+                if expected is None:
+                    self.assertIsNone(checked_order)
+                    self.assertIsNotNone(reason)
+                    self.assertTrue(str(reason).startswith(error), reason)
+                else:
+                    self.assertIsNone(reason)
+                    self.assertEqual((checked_order["price"], checked_order["qty"]), expected)  # type: ignore
+
+    def test_input_order_not_modified(self) -> None:
+        order = _order(price=20100.2, qty=0.0129)
+        validate_order(order, FILTERS, None)
+        self.assertEqual((order["price"], order["qty"]), (20100.2, 0.0129))
+
+    def test_validate_orders_split(self) -> None:
+        orders = [_order(price=20100.0), _order(price=19000.0), _order(price=20100.2)]
+        valid, rejected = validate_orders(orders, FILTERS, LAST_ONLY)
+        self.assertEqual([order["price"] for order in valid], [20100.0, 20100.5])
+        self.assertEqual([order["price"] for order, reason in rejected], [19000.0])
+
+    def test_validate_orders_without_filters(self) -> None:
+        valid, rejected = validate_orders([_order()], None, LAST_ONLY)
+        self.assertEqual(valid, [])
+        self.assertEqual(rejected[0][1], "no instrument filters for this symbol")
+
+
+class ParseMarketPricesTest(unittest.TestCase):
+
+    def test_parse(self) -> None:
+        self.assertEqual(parse_market_prices({"last_price": "20000", "bid1_price": "19999.5", "ask1_price": "20000"}),
+                         BOOK)
+        # bid / ask missing or 0 are unknown, a message without last price is ignored
+        self.assertEqual(parse_market_prices({"last_price": "20000", "bid1_price": "0"}), LAST_ONLY)
+        self.assertIsNone(parse_market_prices({"bid1_price": "19999.5"}))
+        self.assertIsNone(parse_market_prices({"last_price": None}))
+
+
+if __name__ == "__main__":
+    unittest.main()
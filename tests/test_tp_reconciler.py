@@ -0,0 +1,129 @@
+""" Checks of the tp reconcile plan, which live orders are kept, amended, created or cancelled
+
+    python -m pytest tests
+    python -m unittest discover tests
+"""
+import os
+import sys
+import unittest
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "terminal"))
+
+from exchanges.bybit.bybit_tools import ScaleOrder
+from exchanges.bybit.tp_reconciler import LiveOrder, parse_live_orders, reconcile_tp_orders
+
+
+def _tp(price: float, qty: float, side: str = "Sell") -> ScaleOrder:
+    return {"symbol": "BTCUSDT", "side": side, "order_type": "Limit", "qty": qty, "price": price,
+            "time_in_force": "PostOnly", "reduce_only": True, "close_on_trigger": False, "position_idx": 0}  # type: ignore
+
+
+def _live(order_id: str, price: float, qty: float, side: str = "Sell", reduce_only: bool = True) -> LiveOrder:
+    return {"order_id": order_id, "symbol": "BTCUSDT", "side": side, "price": price, "qty": qty, "reduce_only": reduce_only}
+
+
+def _ids(orders: list) -> list[str]:
+    return sorted(order["order_id"] for order in orders)
+
+
+class ReconcileTpOrdersTest(unittest.TestCase):
+
+    def test_exact_match_kept(self) -> None:
+        plan = reconcile_tp_orders([_tp(101.0, 1.0), _tp(102.0, 1.0)],
+                                   [_live("b", 102.0, 1.0), _live("a", 101.0, 1.0)])
+
+        self.assertEqual(plan["unchanged"], 2)
+        self.assertEqual(plan["to_amend"], [])
+        self.assertEqual(plan["to_create"], [])
+        self.assertEqual(plan["to_cancel"], [])
+
+    def test_price_pairing_into_amends(self) -> None:
+        # new ladder after a size increase, paired lowest with lowest, only the changed fields are sent
+        plan = reconcile_tp_orders([_tp(105.0, 2.0), _tp(101.0, 2.0), _tp(103.0, 1.0)],
+                                   [_live("high", 104.0, 1.0), _live("low", 101.0, 1.0), _live("mid", 103.0, 1.0)])
+
+        self.assertEqual(plan["unchanged"], 1)
+        self.assertEqual(plan["to_amend"], [
+            {"order_id": "low", "symbol": "BTCUSDT", "price": None, "qty": 2.0},
+            {"order_id": "high", "symbol": "BTCUSDT", "price": 105.0, "qty": 2.0},
+        ])
+        self.assertEqual(plan["to_create"], [])
+        self.assertEqual(plan["to_cancel"], [])
+
+    def test_other_side_and_not_reduce_only_cancelled(self) -> None:
+        live_orders = [_live("tp", 101.0, 1.0),
+                       _live("entry", 99.0, 1.0, side="Buy", reduce_only=False),
+                       _live("other_side_tp", 98.0, 1.0, side="Buy"),
+                       _live("not_reduce_only", 101.0, 1.0, reduce_only=False)]
+        plan = reconcile_tp_orders([_tp(101.0, 1.0)], live_orders)
+
+        self.assertEqual(plan["unchanged"], 1)
+        self.assertEqual(_ids(plan["to_cancel"]), ["entry", "not_reduce_only", "other_side_tp"])
+
+    def test_more_live_than_desired(self) -> None:
+        plan = reconcile_tp_orders([_tp(101.0, 1.0), _tp(106.0, 1.0)],
+                                   [_live("a", 101.0, 1.0), _live("b", 102.0, 1.0), _live("c", 103.0, 1.0)])
+
+        self.assertEqual(plan["unchanged"], 1)
+        self.assertEqual(plan["to_amend"], [{"order_id": "b", "symbol": "BTCUSDT", "price": 106.0, "qty": None}])
+        self.assertEqual(plan["to_create"], [])
+        self.assertEqual(_ids(plan["to_cancel"]), ["c"])
+
+    def test_more_desired_than_live(self) -> None:
+        plan = reconcile_tp_orders([_tp(101.0, 1.0), _tp(102.0, 1.0), _tp(103.0, 1.0)],
+                                   [_live("a", 102.5, 1.0)])
+
+        self.assertEqual(plan["unchanged"], 0)
+        self.assertEqual(plan["to_amend"], [{"order_id": "a", "symbol": "BTCUSDT", "price": 101.0, "qty": None}])
+        self.assertEqual([order["price"] for order in plan["to_create"]], [102.0, 103.0])
+        self.assertEqual(plan["to_cancel"], [])
+
+    def test_no_live_orders(self) -> None:
+        plan = reconcile_tp_orders([_tp(101.0, 1.0)], [])
+
+        self.assertEqual(len(plan["to_create"]), 1)
+        self.assertEqual(plan["to_amend"], [])
+        self.assertEqual(plan["to_cancel"], [])
+
+    def test_held_orders_keep_their_live_order(self) -> None:
+        # 103 refused locally, the live tp it pairs with stays on the book untouched
+        plan = reconcile_tp_orders([_tp(101.0, 1.0)],
+                                   [_live("a", 101.0, 1.0), _live("b", 102.5, 1.0)],
+                                   held_orders=[_tp(103.0, 1.0)])
+
+        self.assertEqual(plan["unchanged"], 1)
+        self.assertEqual(plan["held"], 1)
+        self.assertEqual(plan["to_amend"], [])
+        self.assertEqual(plan["to_create"], [])
+        self.assertEqual(plan["to_cancel"], [])
+
+    def test_only_held_orders_cancel_nothing_of_the_tp_side(self) -> None:
+        plan = reconcile_tp_orders([], [_live("a", 101.0, 1.0), _live("b", 102.0, 1.0)],
+                                   held_orders=[_tp(101.0, 1.0), _tp(102.5, 1.0)])
+
+        self.assertEqual(plan["held"], 2)
+        self.assertEqual(plan["to_amend"], [])
+        self.assertEqual(plan["to_create"], [])
+        self.assertEqual(plan["to_cancel"], [])
+
+
+class ParseLiveOrdersTest(unittest.TestCase):
+
+    def test_only_open_orders_kept(self) -> None:
+        raw_orders = [
+            {"order_id": "a", "symbol": "BTCUSDT", "side": "Sell", "price": "101", "qty": "1", "reduce_only": True,
+             "order_status": "New"},
+            {"order_id": "b", "symbol": "BTCUSDT", "side": "Sell", "price": "102", "qty": "1", "reduce_only": True,
+             "order_status": "Filled"},
+            {"order_id": "c", "symbol": "BTCUSDT", "side": "Sell", "price": "103", "qty": "0.5", "reduce_only": False,
+             "order_status": "PartiallyFilled"},
+        ]
+        live_orders = parse_live_orders(raw_orders)
+
+        self.assertEqual(_ids(live_orders), ["a", "c"])
+        self.assertEqual(live_orders[1], _live("c", 103.0, 0.5, reduce_only=False))
+        self.assertEqual(parse_live_orders(None), [])
+
+
+if __name__ == "__main__":
+    unittest.main()